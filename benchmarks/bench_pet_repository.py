@@ -0,0 +1,136 @@
+"""
+Pet repository paging at depth: keyset cursors against LIMIT/OFFSET,
+batch reads and writes, and peak memory of listing every pet
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, List, Optional
+
+from src.openapi_router import load_router
+from src.pet_repository import ConnectionPool, PetRepository, BATCH_GET_LIMIT
+from src.petstore_server import SPEC_PATH, PetstoreApp
+
+OFFSETS = (0.0, 0.01, 0.1, 0.5, 0.9, 0.99)
+
+def percentiles(samples: List[float]) -> dict:
+    ordered = sorted(samples)
+    return {"p50_us": ordered[len(ordered) // 2] * 1e6,
+            "p99_us": ordered[min(len(ordered) - 1, int(0.99 * len(ordered)))] * 1e6}
+
+def timed(call: Callable[[], object], repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - started)
+    return percentiles(samples)
+
+def offset_page(repository: PetRepository, offset: int, limit: int) -> list:
+    # What paging without cursors costs: the skipped rows are still read
+    with repository.pool.connection() as connection:
+        return connection.execute("SELECT id, name, tag FROM pets ORDER BY id LIMIT ? OFFSET ?",
+                                  (limit, offset)).fetchall()
+
+def walk_api(app: PetstoreApp, limit: int) -> int:
+    """
+    Follow x-next through every listPets page in process; returns pets seen
+    """
+    async def walk():
+        seen = 0
+        target = f"/pets?limit={limit}"
+        while target:
+            path, _, query = target.partition("?")
+            scope = {"type": "http", "method": "GET", "path": path,
+                     "query_string": query.encode(), "headers": []}
+            messages = [{"type": "http.request", "body": b""}]
+            chunks: List[bytes] = []
+            headers = {}
+
+            async def receive():
+                return messages.pop()
+
+            async def send(message):
+                if message["type"] == "http.response.start":
+                    headers.update(message["headers"])
+                else:
+                    chunks.append(message.get("body", b""))
+
+            await app(scope, receive, send)
+            seen += len(json.loads(b"".join(chunks)))
+            target = headers.get(b"x-next", b"").decode()
+        return seen
+    return asyncio.run(walk())
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pets", type=int, default=200_000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--output", help="Write results as JSON")
+    args = parser.parse_args(argv)
+    rng = random.Random(1)
+    results = {"pets": args.pets}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        repository = PetRepository(ConnectionPool(os.path.join(tmp, "pets.db"), size=2))
+        started = time.perf_counter()
+        repository.batch_write({"id": i, "name": f"pet-{i}", "tag": ("cat", "dog")[i % 2]}
+                               for i in range(args.pets))
+        elapsed = time.perf_counter() - started
+        results["batch_write_per_second"] = args.pets / elapsed
+        print(f"BatchWrite: {args.pets} pets in {elapsed:.1f}s ({args.pets / elapsed:,.0f}/s)")
+
+        ids = [rng.randrange(args.pets * 2) for _ in range(BATCH_GET_LIMIT)]
+        results["batch_get"] = timed(lambda: repository.batch_get(ids), args.repeat)
+        print(f"BatchGet of {BATCH_GET_LIMIT} ids (half missing): "
+              f"p50 {results['batch_get']['p50_us']:.0f} us, p99 {results['batch_get']['p99_us']:.0f} us")
+
+        results["pages"] = []
+        print(f"Page of {args.limit} at depth:   cursor p50/p99        offset p50/p99")
+        for fraction in OFFSETS:
+            offset = int(fraction * (args.pets - args.limit))
+            cursor = repository.encode_cursor(offset - 1) if offset else None
+            keyset = timed(lambda: repository.page(args.limit, cursor), args.repeat)
+            skipping = timed(lambda: offset_page(repository, offset, args.limit),
+                             max(5, args.repeat // 20))
+            results["pages"].append({"offset": offset, "cursor": keyset, "offset_scan": skipping})
+            print(f"  {offset:>10}  {keyset['p50_us']:8.0f} {keyset['p99_us']:8.0f} us   "
+                  f"{skipping['p50_us']:10.0f} {skipping['p99_us']:10.0f} us")
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        seen = sum(1 for _ in repository.scan())
+        scan_seconds = time.perf_counter() - started
+        scan_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        app = PetstoreApp(load_router(SPEC_PATH), repository=repository)
+        tracemalloc.start()
+        started = time.perf_counter()
+        listed = walk_api(app, args.limit)
+        api_seconds = time.perf_counter() - started
+        api_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        results["scan"] = {"pets": seen, "seconds": scan_seconds, "peak_bytes": scan_peak}
+        results["list_all"] = {"pets": listed, "seconds": api_seconds, "peak_bytes": api_peak}
+        print(f"Scan of {seen} pets: {scan_seconds:.1f}s, peak {scan_peak / 1024:.0f} KiB")
+        print(f"listPets through every x-next page ({listed} pets): {api_seconds:.1f}s, "
+              f"peak {api_peak / 1024:.0f} KiB")
+        repository.pool.close()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0 if seen == listed == args.pets else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""
+Latency and throughput of the local PetStore API: spec compilation
+(cold and cached), in-process ASGI calls and HTTP over keep-alive
+connections
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import asyncio
+import contextlib
+import json
+import statistics
+import tempfile
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.openapi_router import load_artifact, Router
+from src.petstore_server import SPEC_PATH, PetstoreApp, serve, stack_publisher
+
+def summarize(latencies: Sequence[float], elapsed: float) -> dict:
+    ordered = sorted(latencies)
+
+    def pct(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1e6
+    return {
+        "requests": len(ordered),
+        "per_second": len(ordered) / elapsed if elapsed else 0.0,
+        "p50_us": pct(0.50),
+        "p99_us": pct(0.99),
+        "max_us": ordered[-1] * 1e6,
+    }
+
+def bench_compile(spec: str, repeat: int) -> Dict[str, float]:
+    """
+    Median seconds to a ready Router, parsing the spec or from the cache
+    """
+    cold, cached = [], []
+    with tempfile.TemporaryDirectory() as cache_dir:
+        load_artifact(spec, cache_dir)
+        for _ in range(repeat):
+            started = time.perf_counter()
+            Router(load_artifact(spec))
+            cold.append(time.perf_counter() - started)
+            started = time.perf_counter()
+            Router(load_artifact(spec, cache_dir))
+            cached.append(time.perf_counter() - started)
+    return {"cold_ms": statistics.median(cold) * 1000, "cached_ms": statistics.median(cached) * 1000}
+
+def request_mix(count: int, pets: int) -> List[Tuple[str, str, bytes]]:
+    """
+    Reads and writes in a fixed 8:1:1 show/list/create ratio
+    """
+    mix = []
+    for i in range(count):
+        if i % 10 == 8:
+            mix.append(("GET", "/pets?limit=20", b""))
+        elif i % 10 == 9:
+            pet = {"id": pets + i, "name": f"pet-{i}", "tag": "cat"}
+            mix.append(("POST", "/pets", json.dumps(pet).encode()))
+        else:
+            mix.append(("GET", f"/pets/{i % pets}", b""))
+    return mix
+
+async def bench_asgi(app, requests: List[Tuple[str, str, bytes]]) -> dict:
+    latencies = []
+    started = time.perf_counter()
+    for method, target, body in requests:
+        path, _, query = target.partition("?")
+        scope = {"type": "http", "method": method, "path": path,
+                 "query_string": query.encode(), "headers": []}
+        messages = [{"type": "http.request", "body": body}]
+
+        async def receive():
+            return messages.pop()
+
+        async def send(message):
+            if message["type"] == "http.response.start" and message["status"] >= 400:
+                raise RuntimeError(f"{method} {target}: {message['status']}")
+
+        t = time.perf_counter()
+        await app(scope, receive, send)
+        latencies.append(time.perf_counter() - t)
+    return summarize(latencies, time.perf_counter() - started)
+
+async def bench_http(app, requests: List[Tuple[str, str, bytes]], connections: int) -> dict:
+    started_future = asyncio.get_running_loop().create_future()
+    server = asyncio.ensure_future(serve(app, "127.0.0.1", 0, started_future))
+    host, port = await started_future
+    latencies: List[float] = []
+
+    async def client(share: List[Tuple[str, str, bytes]]):
+        reader, writer = await asyncio.open_connection(host, port)
+        for method, target, body in share:
+            request = (f"{method} {target} HTTP/1.1\r\nhost: {host}\r\n"
+                       f"content-length: {len(body)}\r\n\r\n").encode() + body
+            t = time.perf_counter()
+            writer.write(request)
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - t)
+            if not head.startswith(b"HTTP/1.1 2"):
+                raise RuntimeError(f"{method} {target}: {head.splitlines()[0]}")
+        writer.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(requests[i::connections]) for i in range(connections)))
+    elapsed = time.perf_counter() - started
+    server.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await server
+    return dict(summarize(latencies, elapsed), connections=connections)
+
+def seeded_app(router: Router, pets: int, actor: bool) -> PetstoreApp:
+    app = PetstoreApp(router, stack_publisher() if actor else None)
+    app.repository.batch_write({"id": i, "name": f"pet-{i}"} for i in range(pets))
+    return app
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--spec", default=SPEC_PATH)
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--pets", type=int, default=1000)
+    parser.add_argument("--connections", type=int, default=8)
+    parser.add_argument("--no-actor", action="store_true")
+    parser.add_argument("--output", help="Write results as JSON")
+    args = parser.parse_args(argv)
+
+    results = {"compile": bench_compile(args.spec, repeat=20)}
+    print(f"Compile: {results['compile']['cold_ms']:.2f} ms from YAML, "
+          f"{results['compile']['cached_ms']:.2f} ms from the cached artifact")
+
+    router = Router(load_artifact(args.spec))
+    requests = request_mix(args.requests, args.pets)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        results["asgi"] = asyncio.run(bench_asgi(seeded_app(router, args.pets, not args.no_actor),
+                                                 requests))
+        results["http"] = asyncio.run(bench_http(seeded_app(router, args.pets, not args.no_actor),
+                                                 requests, args.connections))
+    for name in ("asgi", "http"):
+        r = results[name]
+        print(f"{name.upper():<5} {r['requests']} requests: {r['per_second']:,.0f}/s, "
+              f"p50 {r['p50_us']:.0f} us, p99 {r['p99_us']:.0f} us, max {r['max_us']:.0f} us")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
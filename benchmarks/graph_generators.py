@@ -0,0 +1,111 @@
+"""
+Seeded synthetic service graphs for benchmarking the analyzers
+"""
+
+import random
+from typing import Callable, Dict
+
+from src.dependency_analyzer import Service, DependencyType
+
+def _name(i: int) -> str:
+    return f"svc-{i:07d}"
+
+def layered_dag(n: int, seed: int = 0, layers: int = 8, avg_degree: float = 3.0,
+                soft_ratio: float = 0.2) -> Dict[str, Service]:
+    """
+    Acyclic graph whose services only depend on strictly lower layers
+    """
+    rng = random.Random(seed)
+    layer_of = sorted(rng.randint(1, layers) for _ in range(n))
+    # First service index of each layer, so deps can be drawn from below it
+    first = {}
+    for i, layer in enumerate(layer_of):
+        first.setdefault(layer, i)
+
+    services = {}
+    for i in range(n):
+        below = first[layer_of[i]]
+        deps = {}
+        if below:
+            for _ in range(_degree(rng, avg_degree)):
+                dep_type = DependencyType.SOFT if rng.random() < soft_ratio else DependencyType.HARD
+                deps[_name(rng.randrange(below))] = dep_type
+        services[_name(i)] = Service(_name(i), layer_of[i], deps)
+    return services
+
+def planted_cycles(n: int, seed: int = 0, cycle_count: int = None, cycle_length: int = 4,
+                   avg_degree: float = 3.0) -> Dict[str, Service]:
+    """
+    Random DAG with cycle_count disjoint HARD cycles planted in it
+
+    Defaults to one cycle per 100 services.
+    """
+    rng = random.Random(seed)
+    if cycle_count is None:
+        cycle_count = max(1, n // 100)
+
+    services = {}
+    for i in range(n):
+        deps = {}
+        if i:
+            for _ in range(_degree(rng, avg_degree)):
+                deps[_name(rng.randrange(i))] = DependencyType.HARD
+        services[_name(i)] = Service(_name(i), 1 + i * 8 // max(n, 1), deps)
+
+    # Each cycle spans a block of consecutive services closed by one back
+    # edge, so DAG paths cannot pull outsiders into it and every cycle
+    # group stays cycle_length services
+    blocks = rng.sample(range(n // cycle_length), min(cycle_count, n // cycle_length))
+    for block in blocks:
+        first, last = block * cycle_length, (block + 1) * cycle_length - 1
+        for i in range(first + 1, last + 1):
+            services[_name(i)].dependencies[_name(i - 1)] = DependencyType.HARD
+        services[_name(first)].dependencies[_name(last)] = DependencyType.HARD
+    return services
+
+def scale_free(n: int, seed: int = 0, edges_per_service: int = 2) -> Dict[str, Service]:
+    """
+    Barabasi-Albert preferential attachment: a few hub services (auth,
+    DNS, the database) collect most of the dependents
+
+    Layers are assigned as longest dependency path + 1, so the graph
+    layers cleanly.
+    """
+    rng = random.Random(seed)
+    # Each service appears once per incident edge, so uniform draws
+    # from this list are degree-proportional
+    endpoints = []
+    layers = []
+    services = {}
+    for i in range(n):
+        deps = set()
+        if i:
+            for _ in range(min(edges_per_service, i)):
+                deps.add(rng.choice(endpoints) if endpoints else rng.randrange(i))
+        layer = 1 + max((layers[d] for d in deps), default=0)
+        layers.append(layer)
+        endpoints.extend(deps)
+        endpoints.extend([i] * len(deps))
+        services[_name(i)] = Service(_name(i), layer, {_name(d): DependencyType.HARD for d in deps})
+    return services
+
+def deep_chain(n: int, seed: int = 0) -> Dict[str, Service]:
+    """
+    Each service hard-depends on the previous one: worst case for recursion
+    depth and for anything that rescans per recovery wave
+    """
+    return {
+        _name(i): Service(_name(i), i + 1, {_name(i - 1): DependencyType.HARD} if i else {})
+        for i in range(n)
+    }
+
+def _degree(rng: random.Random, mean: float) -> int:
+    # Geometric-ish spread around the mean, cheap to draw
+    return int(rng.expovariate(1.0 / mean)) if mean > 0 else 0
+
+GENERATORS: Dict[str, Callable[..., Dict[str, Service]]] = {
+    "layered-dag": layered_dag,
+    "planted-cycles": planted_cycles,
+    "scale-free": scale_free,
+    "deep-chain": deep_chain,
+}
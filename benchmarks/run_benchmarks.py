@@ -0,0 +1,189 @@
+"""
+Time and memory benchmarks for the analyzer entry points on synthetic graphs
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import contextlib
+import gc
+import json
+import platform
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.graph_generators import GENERATORS
+from exercises.ex3_recovery_simulation import RecoverySimulation
+from src.dependency_analyzer import (
+    assign_layers, detect_circular_dependencies, validate_layering,
+)
+
+def _run_recovery(services):
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        RecoverySimulation(services).run_recovery()
+
+TARGETS: Dict[str, Callable] = {
+    "detect_circular_dependencies": detect_circular_dependencies,
+    "validate_layering": validate_layering,
+    "assign_layers": assign_layers,
+    "run_recovery": _run_recovery,
+}
+
+DEFAULT_SIZES = [100, 1000, 10000, 100000]
+
+def measure(target: Callable, services, repeat: int = 3, memory: bool = False) -> dict:
+    """
+    Best-of-repeat wall time, and optionally peak traced allocation
+
+    Memory is measured in a separate run because tracemalloc slows the
+    code under test several times over.
+    """
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        target(services)
+        times.append(time.perf_counter() - start)
+    result = {"seconds": min(times), "median_seconds": sorted(times)[len(times) // 2]}
+
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            target(services)
+            result["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result
+
+def run_suite(sizes: List[int], generators: List[str], targets: List[str],
+              seed: int = 0, repeat: int = 3, memory: bool = False,
+              time_limit: float = 30.0, log=None) -> dict:
+    """
+    Benchmark every target on every generator and size
+
+    Once a target takes longer than time_limit at some size, larger sizes
+    of that generator are recorded as skipped instead of run.
+    """
+    results = []
+    for generator_name in generators:
+        too_slow = set()
+        for size in sorted(sizes):
+            services = GENERATORS[generator_name](size, seed=seed)
+            edges = sum(len(s.dependencies) for s in services.values())
+            for target_name in targets:
+                entry = {"generator": generator_name, "size": size, "edges": edges,
+                         "target": target_name}
+                if target_name in too_slow:
+                    entry["skipped"] = True
+                else:
+                    entry.update(measure(TARGETS[target_name], services, repeat, memory))
+                    if entry["seconds"] > time_limit:
+                        too_slow.add(target_name)
+                results.append(entry)
+                if log:
+                    log(_format_entry(entry))
+            del services
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "seed": seed,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+def compare(current: dict, baseline: dict, threshold: float = 1.25,
+            min_seconds: float = 0.005) -> List[str]:
+    """
+    Regressions of current against baseline
+
+    A timing regresses when it is more than threshold times the baseline
+    and slower by at least min_seconds (to ignore noise on tiny inputs).
+    Peak memory regresses when it grows by more than threshold. Entries
+    run in the baseline but skipped now count as regressions.
+    """
+    def key(entry):
+        return entry["generator"], entry["size"], entry["target"]
+
+    previous = {key(entry): entry for entry in baseline["results"]}
+    regressions = []
+    for entry in current["results"]:
+        old = previous.get(key(entry))
+        if old is None or old.get("skipped"):
+            continue
+        label = "{} {} n={}".format(entry["target"], entry["generator"], entry["size"])
+        if entry.get("skipped"):
+            regressions.append(f"{label}: skipped (over the time limit), baseline {old['seconds']:.4f}s")
+            continue
+        if entry["seconds"] > old["seconds"] * threshold and \
+                entry["seconds"] - old["seconds"] >= min_seconds:
+            regressions.append(f"{label}: {entry['seconds']:.4f}s vs baseline "
+                               f"{old['seconds']:.4f}s ({entry['seconds'] / old['seconds']:.2f}x)")
+        if "peak_bytes" in entry and old.get("peak_bytes") and \
+                entry["peak_bytes"] > old["peak_bytes"] * threshold:
+            regressions.append(f"{label}: peak {entry['peak_bytes']} bytes vs baseline "
+                               f"{old['peak_bytes']} ({entry['peak_bytes'] / old['peak_bytes']:.2f}x)")
+    return regressions
+
+def _format_entry(entry: dict) -> str:
+    label = f"{entry['target']:<29} {entry['generator']:<15} n={entry['size']:<8}"
+    if entry.get("skipped"):
+        return f"{label} skipped"
+    line = f"{label} {entry['seconds'] * 1000:10.2f} ms"
+    if "peak_bytes" in entry:
+        line += f" {entry['peak_bytes'] / 2**20:9.2f} MiB"
+    return line
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument("--sizes", type=lambda s: [int(float(x)) for x in s.split(",")],
+                        default=DEFAULT_SIZES, help="Comma-separated node counts, e.g. 1e2,1e4,1e6")
+    parser.add_argument("--generators", type=lambda s: s.split(","), default=list(GENERATORS))
+    parser.add_argument("--targets", type=lambda s: s.split(","), default=list(TARGETS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--memory", action="store_true", help="Also record peak allocations")
+    parser.add_argument("--time-limit", type=float, default=30.0,
+                        help="Skip larger sizes once a target exceeds this many seconds")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", metavar="BASELINE", help="Fail on regressions against this results file")
+    parser.add_argument("--threshold", type=float, default=1.25)
+    args = parser.parse_args(argv)
+
+    for name in args.generators:
+        if name not in GENERATORS:
+            parser.error(f"unknown generator {name}; choose from {', '.join(GENERATORS)}")
+    for name in args.targets:
+        if name not in TARGETS:
+            parser.error(f"unknown target {name}; choose from {', '.join(TARGETS)}")
+
+    results = run_suite(args.sizes, args.generators, args.targets, seed=args.seed,
+                        repeat=args.repeat, memory=args.memory, time_limit=args.time_limit,
+                        log=lambda line: print(line, file=sys.stderr))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), threshold=args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+        print("No regressions against baseline.", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,6 +6,8 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.dependency_analyzer import Service, DependencyType, detect_circular_dependencies, validate_layering
+from src.incremental_analyzer import IncrementalAnalyzer
+from src.cycle_breaker import suggest_soft_flips
 
 # Task 1: Add at least 5 services with dependencies
 # We define a mix of services, including a deliberate circular dependency to demonstrate the issue.
@@ -61,18 +63,31 @@ def run_exercise():
         print("No circular dependencies found.")
 
     print("\n--- Task 3: Fix any cycles found ---")
-    # Fix: artifact-store should not hard-depend on deployment-service for its basic operation/recovery
-    print("Applying fix: Removing hard dependency from artifact-store to deployment-service (changing to SOFT)")
-    services["artifact-store"].dependencies["deployment-service"] = DependencyType.SOFT
+    # Track the graph incrementally so the fix is checked without a full rescan
+    analyzer = IncrementalAnalyzer(services)
     
-    cycles_fixed = detect_circular_dependencies(services)
+    # Let the suggester pick the cheapest edges to demote; edges that point
+    # up the layer stack go first
+    plan = suggest_soft_flips(services)
+    print(f"Suggested SOFT flips: {plan.edges()}")
+    
+    # Demote each suggested edge to SOFT, in the service map and in the
+    # incremental analyzer, reporting cycles as they are resolved
+    for service_name, dep_name in plan.edges():
+        print(f"Applying fix: Removing hard dependency from {service_name} to {dep_name} (changing to SOFT)")
+        services[service_name].dependencies[dep_name] = DependencyType.SOFT
+        change = analyzer.retype_edge(service_name, dep_name, DependencyType.SOFT)
+        if change.resolved_cycles:
+            print(f"Resolved cycles: {change.resolved_cycles}")
+    
+    cycles_fixed = analyzer.cycle_groups()
     if cycles_fixed:
         print(f"Still found cycles: {cycles_fixed}")
     else:
         print("Cycles eliminated!")
 
     print("\n--- Verifying Layers ---")
-    violations = validate_layering(services)
+    violations = analyzer.violations()
     if violations:
         print("Found layer violations:")
         for v in violations:
@@ -6,6 +6,7 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.dependency_analyzer import Service, DependencyType, validate_layering
+from src.dependency_analyzer import assign_layers as layer_engine
 
 services_data = {
     "database": {"current_layer": None, "dependencies": ["aws-rds"]},
@@ -26,54 +27,27 @@ def assign_layers(services_data):
     """
     print("Starting layer assignment...")
     
-    # Reset layers (except fixed Layer 1)
-    for s in services_data.values():
-        if s.get("current_layer") != 1: 
-            s["current_layer"] = None
-            
-    changed = True
-    iteration = 0
-    while changed:
-        changed = False
-        iteration += 1
-        # Safe guard against infinite loops
-        if iteration > 100:
-            break
-            
-        for name, svc in services_data.items():
-            if svc["current_layer"] is not None:
-                continue
-                
-            # Check if all dependencies have layers
-            deps_resolved = True
-            max_dep_layer = 0
-            
-            for dep in svc["dependencies"]:
-                if dep not in services_data:
-                    # Skip unknown dependencies or assume they are external
-                    continue
-                    
-                if services_data[dep]["current_layer"] is None:
-                    deps_resolved = False
-                    break
-                max_dep_layer = max(max_dep_layer, services_data[dep]["current_layer"])
-            
-            if deps_resolved:
-                # Assign layer: strictly greater than max dependency
-                # If max_dep_layer is 0 (no deps), assign 2 (since 1 is cloud)
-                if max_dep_layer == 0:
-                     new_layer = 2
-                else:
-                     new_layer = max_dep_layer + 1
-                
-                svc["current_layer"] = new_layer
-                changed = True
-                print(f"Assigned {name} to Layer {new_layer}")
+    # Layer 1 (cloud) stays fixed, everything else is recomputed
+    pinned = {n: 1 for n, s in services_data.items() if s.get("current_layer") == 1}
+    services = {
+        n: Service(
+            name=n,
+            layer=s["current_layer"] or 0,
+            dependencies={dep: DependencyType.HARD for dep in s["dependencies"]}
+        )
+        for n, s in services_data.items()
+    }
+    
+    result = layer_engine(services, pinned=pinned)
+    for name, svc in services_data.items():
+        svc["current_layer"] = result.layers.get(name)
+    for name, layer in sorted(result.layers.items(), key=lambda x: x[1]):
+        if name not in pinned:
+            print(f"Assigned {name} to Layer {layer}")
 
     # Check for unassigned (cycles)
-    unassigned = [n for n, s in services_data.items() if s["current_layer"] is None]
-    if unassigned:
-        print(f"Could not assign layers to: {unassigned} (likely circular dependency)")
+    if result.unassigned:
+        print(f"Could not assign layers to: {result.unassigned} (blocked by cycles {result.cycles})")
     else:
         print("\nLayer assignment complete:")
         # Sort by layer
@@ -81,6 +55,15 @@ def assign_layers(services_data):
         for n, s in sorted_services:
             print(f"  Layer {s['current_layer']}: {n}")
 
+        # Verify no layer violations exist
+        for name, service in services.items():
+            service.layer = result.layers[name]
+        violations = validate_layering(services)
+        if violations:
+            print(f"Layer violations: {violations}")
+        else:
+            print("No layer violations found.")
+
 # Task: Implement assign_layers() function
 # Verify no layer violations exist
 if __name__ == "__main__":
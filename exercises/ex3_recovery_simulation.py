@@ -5,15 +5,22 @@ import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from typing import Set, Dict
+from typing import Set, Dict, List
+import heapq
 import time
-from src.dependency_analyzer import Service, DependencyType
+from src.dependency_analyzer import Service, ServiceGraph, DependencyType
+from src.instrumentation import count, event, span
+from src.recovery_executor import ExecutionReport, RecoveryExecutor
+from src.recovery_montecarlo import MonteCarloResult, simulate_recovery_times
+from src.degraded_recovery import DegradedRecoveryResult, simulate_degraded_recovery
+from src.recovery_planner import WavePlan
 
 class RecoverySimulation:
     def __init__(self, services: Dict[str, Service]):
         self.services = services
         self.recovered = set()
         self.failed_attempts = []
+        self.waves: List[List[str]] = []
         
     def can_recover(self, service_name: str) -> bool:
         """
@@ -44,20 +51,39 @@ class RecoverySimulation:
             self.failed_attempts.append(service_name)
             return False
 
-    def run_recovery(self):
+    def run_recovery(self, mode: str = "ready-queue"):
         """
         Attempt to recover all services until stable
+        
+        mode "scan" rescans every remaining service each iteration;
+        "ready-queue" only revisits dependents of recovered services.
+        Both recover services in the same waves and order.
         """
         print("Starting recovery simulation...")
         print(f"Total services to recover: {len(self.services)}")
         
+        if mode not in ("scan", "ready-queue"):
+            raise ValueError(f"Unknown recovery mode: {mode}")
+        
+        with span("run_recovery", mode=mode, services=len(self.services)) as trace:
+            success = self._run_scan() if mode == "scan" else self._run_ready_queue()
+            trace.set_attribute("waves", len(self.waves))
+            trace.set_attribute("success", success)
+        count("recovery.services_recovered", len(self.recovered))
+        count("recovery.failed_attempts", len(self.failed_attempts))
+        return success
+
+    def _run_scan(self):
         iteration = 0
         while len(self.recovered) < len(self.services):
             iteration += 1
             print(f"\n--- Iteration {iteration} ---")
+            event("recovery.iteration", iteration=iteration, recovered=len(self.recovered))
             progress = False
+            wave = []
             
             remaining = [s for s in self.services if s not in self.recovered]
+            count("recovery.services_scanned", len(remaining))
             # Sort remaining by layer (low to high) to optimize recovery
             # This simulates the 'bottom-up' approach
             remaining.sort(key=lambda k: self.services[k].layer)
@@ -65,15 +91,138 @@ class RecoverySimulation:
             for service_name in remaining:
                 if self.recover_service(service_name):
                     progress = True
+                    wave.append(service_name)
             
             if not progress:
                 print("\nCRITICAL FAILURE: Deadlock detected. Cannot recover remaining services.")
                 print(f"Unrecovered services: {remaining}")
                 return False
+            self.waves.append(wave)
                 
         print("\nALL SERVICES RECOVERED SUCCESSFULLY!")
         return True
 
+    def _run_ready_queue(self):
+        """
+        Event-driven recovery in O((V+E) log V)
+        
+        Each service counts its unrecovered HARD dependencies. Recovering a
+        service decrements its dependents, and those reaching zero enter a
+        heap keyed by (wave, layer, position). A dependent lands in its
+        dependency's wave if a scan would reach it later in the same pass,
+        otherwise in the next wave.
+        """
+        graph = ServiceGraph.from_services(self.services)
+        names, layers = graph.names, graph.layers
+        n = len(graph)
+        dep_offsets, dependents = graph.reverse_hard_edges()
+        
+        # Position of each service in the scan's stable layer sort
+        order = sorted(range(n), key=lambda i: layers[i])
+        rank = [0] * n
+        for position, svc_id in enumerate(order):
+            rank[svc_id] = position
+        
+        # HARD dependencies on unknown services can never be satisfied
+        pending = [len(graph.hard_dependencies(i)) for i in range(n)]
+        wave_of = [1] * n
+        ready = [(1, rank[i], i) for i in range(n) if pending[i] == 0]
+        heapq.heapify(ready)
+        
+        iteration = 0
+        relaxed = 0
+        while ready:
+            wave, _, svc_id = heapq.heappop(ready)
+            if wave > iteration:
+                iteration = wave
+                print(f"\n--- Iteration {iteration} ---")
+                event("recovery.iteration", iteration=iteration, recovered=len(self.recovered))
+                self.waves.append([])
+            
+            self.recover_service(names[svc_id])
+            self.waves[-1].append(names[svc_id])
+            
+            for pos in range(dep_offsets[svc_id], dep_offsets[svc_id + 1]):
+                relaxed += 1
+                dependent = dependents[pos]
+                earliest = wave if rank[svc_id] < rank[dependent] else wave + 1
+                if earliest > wave_of[dependent]:
+                    wave_of[dependent] = earliest
+                pending[dependent] -= 1
+                if pending[dependent] == 0:
+                    heapq.heappush(ready, (wave_of[dependent], rank[dependent], dependent))
+        count("recovery.edges_relaxed", relaxed)
+        
+        if len(self.recovered) < len(self.services):
+            remaining = [names[i] for i in order if names[i] not in self.recovered]
+            self.failed_attempts.extend(remaining)
+            print(f"\n--- Iteration {iteration + 1} ---")
+            print("\nCRITICAL FAILURE: Deadlock detected. Cannot recover remaining services.")
+            print(f"Unrecovered services: {remaining}")
+            return False
+        
+        print("\nALL SERVICES RECOVERED SUCCESSFULLY!")
+        return True
+
+    def run_wave_plan(self, plan: WavePlan):
+        """
+        Recover services in the waves of a plan from plan_recovery
+        
+        Each wave is one iteration, so the plan's parallelism budget is
+        respected.
+        """
+        print("Starting planned recovery...")
+        print(f"Total services to recover: {len(self.services)}")
+        
+        with span("run_wave_plan", services=len(self.services), waves=len(plan.waves)):
+            for iteration, planned in enumerate(plan.waves, 1):
+                print(f"\n--- Iteration {iteration} ---")
+                event("recovery.iteration", iteration=iteration, recovered=len(self.recovered))
+                self.waves.append([name for name in planned if self.recover_service(name)])
+        
+        if len(self.recovered) < len(self.services):
+            remaining = [name for name in self.services if name not in self.recovered]
+            print("\nCRITICAL FAILURE: Deadlock detected. Cannot recover remaining services.")
+            print(f"Unrecovered services: {remaining}")
+            return False
+        
+        print("\nALL SERVICES RECOVERED SUCCESSFULLY!")
+        return True
+
+    def run_recovery_async(self, action, **executor_options) -> ExecutionReport:
+        """
+        Run real recovery actions concurrently instead of simulating them
+        
+        action is a coroutine function called with each Service; see
+        RecoveryExecutor for the concurrency, timeout and retry options.
+        """
+        report = RecoveryExecutor(self.services, action, **executor_options).run_sync()
+        self.recovered.update(report.recovered)
+        self.failed_attempts.extend(report.failed + report.blocked)
+        return report
+
+    def run_monte_carlo(self, profiles, **options) -> MonteCarloResult:
+        """
+        Sample the distribution of time to full recovery
+        
+        profiles maps service names to RecoveryProfile; see
+        simulate_recovery_times for trials, seed and worker options.
+        """
+        return simulate_recovery_times(self.services, profiles, **options)
+
+    def run_degraded_recovery(self, durations=None, **options) -> DegradedRecoveryResult:
+        """
+        Model degraded mode: start services once their HARD dependencies
+        serve, and mark them healthy once their SOFT dependencies are too
+        
+        durations maps service names to recovery times; see
+        simulate_degraded_recovery for max_parallel and priority.
+        """
+        result = simulate_degraded_recovery(self.services, durations, **options)
+        self.recovered.update(name for name, timeline in result.timelines.items()
+                              if timeline.serving_at is not None)
+        return result
+
 if __name__ == "__main__":
     # Setup services
     # Using a valid layered architecture
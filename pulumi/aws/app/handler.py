@@ -1,9 +1,65 @@
+"""
+Layer 3 compute: reads and writes items in the Layer 2 table
+
+Configuration is read once per execution environment. boto3 is only
+imported, and the DynamoDB client only created, by the first invocation
+that touches the table; warm invocations reuse the client and its
+connection pool.
+"""
+import json
 import os
-import boto3
+
+TABLE_NAME = os.environ.get('TABLE_NAME')
+# Only set when running against a local DynamoDB stand-in
+ENDPOINT_URL = os.environ.get('DYNAMODB_ENDPOINT_URL')
+MAX_POOL_CONNECTIONS = int(os.environ.get('DYNAMODB_MAX_POOL_CONNECTIONS', '10'))
+
+_client = None
+
+def dynamodb():
+    """
+    The shared DynamoDB client, created on first use
+    """
+    global _client
+    if _client is None:
+        import boto3
+        from botocore.config import Config
+
+        _client = boto3.session.Session().client(
+            "dynamodb",
+            endpoint_url=ENDPOINT_URL,
+            config=Config(
+                max_pool_connections=MAX_POOL_CONNECTIONS,
+                connect_timeout=2,
+                read_timeout=5,
+                retries={"max_attempts": 3, "mode": "standard"},
+                tcp_keepalive=True,
+            ),
+        )
+    return _client
 
 def handle(event, context):
-    table_name = os.environ.get('TABLE_NAME')
+    """
+    Without an Id, report the table; with Id and Value, store the item;
+    with only an Id, fetch it
+    """
+    item_id = (event or {}).get('Id')
+    if item_id is None:
+        return {
+            "statusCode": 200,
+            "body": f"Connected to Layer 2: {TABLE_NAME}"
+        }
+
+    key = {"Id": {"S": str(item_id)}}
+    if 'Value' in event:
+        item = dict(key, Value={"S": str(event['Value'])})
+        dynamodb().put_item(TableName=TABLE_NAME, Item=item)
+        return {"statusCode": 200, "body": json.dumps({"Id": item_id, "stored": True})}
+
+    item = dynamodb().get_item(TableName=TABLE_NAME, Key=key).get('Item')
+    if item is None:
+        return {"statusCode": 404, "body": json.dumps({"Id": item_id, "found": False})}
     return {
         "statusCode": 200,
-        "body": f"Connected to Layer 2: {table_name}"
+        "body": json.dumps({"Id": item_id, "Value": item.get('Value', {}).get('S')})
     }
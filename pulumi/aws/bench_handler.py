@@ -0,0 +1,224 @@
+"""
+Local cold and warm start measurements for the Layer 3 handler
+
+Every run starts a fresh interpreter, imports app/handler.py and invokes
+it against an in-memory DynamoDB stand-in served over HTTP, so the
+numbers include interpreter startup, module import, and boto3's import
+and client creation where a Lambda cold start pays for them. Fake
+credentials are used; nothing leaves the machine.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app")
+TABLE_NAME = "layer2-table"
+
+# Runs in the fresh interpreter; argv: app dir, warm invocation count
+CHILD = r"""
+import json, sys, time
+started = time.time()
+t0 = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+import handler
+t1 = time.perf_counter()
+result = {"started": started, "import": t1 - t0, "boto3_at_import": "boto3" in sys.modules}
+
+import importlib.util
+table = importlib.util.find_spec("boto3") is not None
+result["table"] = table
+
+def invoke(event):
+    t = time.perf_counter()
+    response = handler.handle(event, None)
+    elapsed = time.perf_counter() - t
+    if response["statusCode"] != 200:
+        raise SystemExit(f"unexpected response: {response}")
+    return elapsed
+
+if table:
+    result["cold"] = invoke({"Id": "bench", "Value": "cold"})
+    result["warm"] = [invoke({"Id": "bench"}) for _ in range(int(sys.argv[2]))]
+else:
+    result["cold"] = invoke({})
+    result["warm"] = [invoke({}) for _ in range(int(sys.argv[2]))]
+print(json.dumps(result))
+"""
+
+class LocalDynamoDB:
+    """
+    Just enough of the DynamoDB JSON API (GetItem and PutItem) for the
+    handler, keyed on the Id attribute like the stack's table
+    """
+    def __init__(self, tables: Sequence[str] = (TABLE_NAME,), host: str = "127.0.0.1",
+                 port: int = 0, key_attributes: Sequence[str] = ("Id",)):
+        self.tables: Dict[str, Dict[str, dict]] = {name: {} for name in tables}
+        self.key_attributes = tuple(key_attributes)
+        self.requests = 0
+        self.lock = threading.Lock()
+        store = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive, so a pooled client reuses its connection
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes; without this,
+            # delayed ACKs add ~40 ms to every warm request
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                operation = self.headers.get("X-Amz-Target", "").rpartition(".")[2]
+                status, body = store.dispatch(operation, request)
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/x-amz-json-1.0")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def endpoint_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def dispatch(self, operation: str, request: dict) -> Tuple[int, dict]:
+        with self.lock:
+            self.requests += 1
+            table = self.tables.get(request.get("TableName"))
+            if table is None:
+                return 400, _error("ResourceNotFoundException", "Requested resource not found")
+            if operation == "PutItem":
+                item = request.get("Item", {})
+                table[self._key(item)] = item
+                return 200, {}
+            if operation == "GetItem":
+                item = table.get(self._key(request.get("Key", {})))
+                return 200, ({"Item": item} if item is not None else {})
+        return 400, _error("UnknownOperationException", f"Unsupported operation: {operation}")
+
+    def _key(self, attributes: dict) -> str:
+        return json.dumps([attributes.get(name) for name in self.key_attributes], sort_keys=True)
+
+    def __enter__(self) -> "LocalDynamoDB":
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+def _error(kind: str, message: str) -> dict:
+    return {"__type": f"com.amazonaws.dynamodb.v20120810#{kind}", "message": message}
+
+def child_env(endpoint_url: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update({
+        "TABLE_NAME": TABLE_NAME,
+        "DYNAMODB_ENDPOINT_URL": endpoint_url,
+        "AWS_ACCESS_KEY_ID": "local",
+        "AWS_SECRET_ACCESS_KEY": "local",
+        "AWS_DEFAULT_REGION": "us-east-1",
+        # Keep botocore from looking for shared config or instance metadata
+        "AWS_CONFIG_FILE": os.devnull,
+        "AWS_SHARED_CREDENTIALS_FILE": os.devnull,
+        "AWS_EC2_METADATA_DISABLED": "true",
+    })
+    env.pop("AWS_PROFILE", None)
+    env.pop("AWS_SESSION_TOKEN", None)
+    return env
+
+def run_once(env: Dict[str, str], warm: int) -> dict:
+    """
+    One fresh interpreter: startup, import, cold and warm invocations
+    """
+    spawned = time.time()
+    completed = subprocess.run([sys.executable, "-c", CHILD, APP_DIR, str(warm)],
+                               env=env, capture_output=True, text=True, check=False)
+    if completed.returncode != 0:
+        raise RuntimeError(f"handler run failed:\n{completed.stderr}")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result["startup"] = max(0.0, result.pop("started") - spawned)
+    return result
+
+def import_profile(env: Dict[str, str], top: int) -> List[Tuple[float, str]]:
+    """
+    Slowest imports (cumulative seconds) of one cold invocation, from -X importtime
+    """
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", CHILD, APP_DIR, "0"],
+                               env=env, capture_output=True, text=True, check=False)
+    rows = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:"):].split("|")
+        # Top-level entries only: nested ones are already in their parent's total
+        if len(module) - len(module.lstrip()) == 1:
+            rows.append((int(cumulative) / 1e6, module.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+def percentile(values: Sequence[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+def summarize(runs: List[dict]) -> Dict[str, Dict[str, float]]:
+    summary = {}
+    for phase in ("startup", "import", "cold"):
+        values = [run[phase] for run in runs]
+        summary[phase] = {"median": statistics.median(values), "p95": percentile(values, 0.95)}
+    warm = [t for run in runs for t in run["warm"]]
+    summary["warm"] = {"median": statistics.median(warm) if warm else 0.0,
+                       "p99": percentile(warm, 0.99)}
+    return summary
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="Fresh interpreters to start")
+    parser.add_argument("--warm", type=int, default=50, help="Warm invocations per run")
+    parser.add_argument("--imports", type=int, default=0, metavar="N",
+                        help="Also list the N slowest imports of a cold start")
+    parser.add_argument("--output", help="Write runs and summary as JSON")
+    args = parser.parse_args(argv)
+
+    with LocalDynamoDB() as dynamodb:
+        env = child_env(dynamodb.endpoint_url)
+        runs = [run_once(env, args.warm) for _ in range(args.runs)]
+        profile = import_profile(env, args.imports) if args.imports else []
+        requests = dynamodb.requests
+
+    summary = summarize(runs)
+    if not runs[0]["table"]:
+        print("boto3 is not installed: measuring invocations that do not touch the table")
+    if any(run["boto3_at_import"] for run in runs):
+        print("warning: boto3 was imported with the handler module")
+    print(f"{args.runs} cold starts, {args.warm} warm invocations each, "
+          f"{requests} DynamoDB requests")
+    for phase, stats in summary.items():
+        print(f"  {phase:<8}" + "".join(f"  {key} {value * 1000:8.2f} ms"
+                                        for key, value in stats.items()))
+    for seconds, module in profile:
+        print(f"  import {module:<30} {seconds * 1000:8.2f} ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"runs": runs, "summary": summary,
+                       "imports": [{"module": m, "seconds": s} for s, m in profile]}, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
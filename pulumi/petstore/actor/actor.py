@@ -1,15 +1,118 @@
+"""
+PetStore actor: processes PetCreated events, one at a time or in batches
+
+Accepts a single EventBridge event, a list of EventBridge events (as
+delivered by EventBridge Pipes) or an SQS batch whose message bodies are
+EventBridge events. A single event always gets a 200 response, with
+pet_id None if it was malformed. Batches report failed records in
+batchItemFailures so only those are retried. Logs are JSON lines;
+per-record lines are sampled, failures and batch summaries are always
+logged.
+"""
 import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-def handler(event, context):
-    print(f"Received event: {json.dumps(event)}")
-    
-    # Simulate processing
-    detail = event.get('detail', {})
+CONCURRENCY = int(os.environ.get('ACTOR_CONCURRENCY', '4'))
+LOG_SAMPLE_RATE = float(os.environ.get('ACTOR_LOG_SAMPLE_RATE', '0.01'))
+# Smaller batches (and the remainder of larger ones) stay on one thread
+MIN_CHUNK = 32
+
+_executor = None
+
+def log(level, message, **fields):
+    fields.update(level=level, message=message)
+    sys.stdout.write(json.dumps(fields, default=str) + "\n")
+
+def sampled():
+    return LOG_SAMPLE_RATE > 0 and random.random() < LOG_SAMPLE_RATE
+
+def process_pet(detail):
+    """
+    Handle one PetCreated detail; raises ValueError for malformed ones
+    """
+    if not isinstance(detail, dict):
+        raise ValueError("event detail is not an object")
     pet_id = detail.get('id')
-    
-    print(f"Processing Pet ID: {pet_id}")
-    
+    if pet_id is None:
+        raise ValueError("PetCreated event without a pet id")
+    return pet_id
+
+def handler(event, context):
+    if isinstance(event, dict) and 'Records' in event:
+        records = [(_identifier(record, 'messageId', index),
+                    record.get('body') if isinstance(record, dict) else record)
+                   for index, record in enumerate(event['Records'])]
+        return process_batch(records, "sqs")
+    if isinstance(event, list):
+        records = [(_identifier(item, 'id', index), item) for index, item in enumerate(event)]
+        return process_batch(records, "eventbridge")
+
+    # A single EventBridge event keeps its original response: 200, with
+    # pet_id None for a malformed event, which is logged but not retried
+    try:
+        pet_id = process_pet(event.get('detail', {}))
+    except ValueError as exc:
+        pet_id = None
+        log("WARNING", "event not processed", event_id=event.get('id'), error=str(exc))
+    else:
+        if sampled():
+            log("INFO", "processed pet", pet_id=pet_id, event_id=event.get('id'))
     return {
         "statusCode": 200,
         "body": json.dumps({"status": "processed", "pet_id": pet_id})
     }
+
+def _identifier(record, key, index):
+    """
+    The record's own identifier, or its batch index as a string
+
+    A null or empty itemIdentifier fails the whole batch, so every
+    record needs one.
+    """
+    identifier = record.get(key) if isinstance(record, dict) else None
+    return identifier if identifier else str(index)
+
+def process_batch(records, source):
+    """
+    Process (identifier, event) records, concurrently for large batches
+
+    event may be a JSON string (SQS bodies). Returns the partial batch
+    response: the identifiers of the records that failed.
+    """
+    started = time.perf_counter()
+    chunks = max(1, min(CONCURRENCY, len(records) // MIN_CHUNK))
+    if chunks == 1:
+        failures = _process_chunk(records)
+    else:
+        size = -(-len(records) // chunks)
+        parts = [records[i:i + size] for i in range(0, len(records), size)]
+        failures = [f for part in _pool().map(_process_chunk, parts) for f in part]
+
+    log("INFO", "processed batch", source=source, records=len(records),
+        failed=len(failures), duration_ms=round((time.perf_counter() - started) * 1000, 3))
+    return {"batchItemFailures": [{"itemIdentifier": identifier} for identifier in failures]}
+
+def _process_chunk(records):
+    failures = []
+    for identifier, event in records:
+        try:
+            if isinstance(event, str):
+                event = json.loads(event)
+            pet_id = process_pet(event.get('detail', {}))
+        except Exception as exc:
+            failures.append(identifier)
+            log("ERROR", "record failed", record=identifier, error=str(exc))
+            continue
+        if sampled():
+            log("INFO", "processed pet", pet_id=pet_id, record=identifier)
+    return failures
+
+def _pool():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=CONCURRENCY, thread_name_prefix="actor")
+    return _executor
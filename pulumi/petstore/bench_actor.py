@@ -0,0 +1,133 @@
+"""
+Local throughput test for the PetStore actor
+
+Pushes synthetic PetCreated events through actor.handler as SQS batches,
+EventBridge batches or one event per invocation, checks that exactly the
+malformed records come back in batchItemFailures, and reports events per
+second and log volume.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from contextlib import redirect_stdout
+from typing import List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "actor"))
+import actor
+
+class CountingSink:
+    """
+    Discards log output, counting lines and bytes
+    """
+    def __init__(self):
+        self.lines = 0
+        self.bytes = 0
+
+    def write(self, text: str) -> int:
+        self.lines += text.count("\n")
+        self.bytes += len(text)
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+def pet_created(index: int, malformed: bool) -> dict:
+    detail = {"name": f"pet-{index}", "tag": "dog"}
+    if not malformed:
+        detail["id"] = index
+    return {
+        "version": "0",
+        "id": f"evt-{index}",
+        "source": "com.petstore",
+        "detail-type": "PetCreated",
+        "time": "2025-01-01T00:00:00Z",
+        "detail": detail,
+    }
+
+def make_batches(events: List[dict], mode: str, batch_size: int) -> List:
+    if mode == "single":
+        return events
+    batches = []
+    for start in range(0, len(events), batch_size):
+        chunk = events[start:start + batch_size]
+        if mode == "sqs":
+            batches.append({"Records": [
+                {"messageId": event["id"], "body": json.dumps(event),
+                 "eventSource": "aws:sqs"} for event in chunk
+            ]})
+        else:
+            batches.append(chunk)
+    return batches
+
+def run(mode: str, events: List[dict], batch_size: int) -> dict:
+    batches = make_batches(events, mode, batch_size)
+    sink = CountingSink()
+    failed = []
+    started = time.perf_counter()
+    with redirect_stdout(sink):
+        for batch in batches:
+            if mode == "single":
+                response = actor.handler(batch, None)
+                if json.loads(response["body"])["pet_id"] is None:
+                    failed.append(batch["id"])
+            else:
+                response = actor.handler(batch, None)
+                failed.extend(item["itemIdentifier"] for item in response["batchItemFailures"])
+    elapsed = time.perf_counter() - started
+    return {"mode": mode, "events": len(events), "invocations": len(batches),
+            "seconds": elapsed, "events_per_second": len(events) / elapsed if elapsed else 0.0,
+            "log_lines": sink.lines, "log_bytes": sink.bytes, "failed": failed}
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=1000,
+                        help="Records per invocation (SQS allows up to 10000 with a batching window)")
+    parser.add_argument("--modes", default="single,eventbridge,sqs",
+                        help="Comma-separated: single, eventbridge, sqs")
+    parser.add_argument("--failure-rate", type=float, default=0.001,
+                        help="Fraction of events sent without a pet id")
+    parser.add_argument("--concurrency", type=int, help="Override ACTOR_CONCURRENCY")
+    parser.add_argument("--io-ms", type=float, default=0.0,
+                        help="Simulated downstream latency per record")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write results as JSON")
+    args = parser.parse_args(argv)
+
+    if args.concurrency:
+        actor.CONCURRENCY = args.concurrency
+    if args.io_ms:
+        process = actor.process_pet
+
+        def process_with_io(detail):
+            time.sleep(args.io_ms / 1000)
+            return process(detail)
+        actor.process_pet = process_with_io
+
+    rng = random.Random(args.seed)
+    events = [pet_created(i, rng.random() < args.failure_rate) for i in range(args.events)]
+    expected = [event["id"] for event in events if "id" not in event["detail"]]
+
+    results = []
+    status = 0
+    for mode in args.modes.split(","):
+        result = run(mode.strip(), events, args.batch_size)
+        ok = sorted(result.pop("failed")) == sorted(expected)
+        result["failures_match"] = ok
+        status |= 0 if ok else 1
+        results.append(result)
+        print(f"{result['mode']:<12} {result['events']} events in {result['invocations']} "
+              f"invocations: {result['seconds']:.2f}s, {result['events_per_second']:,.0f} events/s, "
+              f"{result['log_lines']} log lines ({result['log_bytes'] / 1024:.0f} KiB), "
+              f"{len(expected)} failures {'reported' if ok else 'MISMATCHED'}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,252 @@
+"""
+Monte Carlo availability under independent per-service failures, with
+trials packed into the bits of Python integers
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import math
+import random
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from src.dependency_analyzer import Service, ServiceGraph, DependencyType, _strongly_connected_ids
+
+@dataclass
+class Contributor:
+    """
+    How much one failing service accounts for another's outages
+
+    share is the fraction of the target's outage trials in which this
+    service had failed itself; sole_share the fraction in which it was
+    the only failed service the target depends on.
+    """
+    name: str
+    share: float
+    sole_share: float
+
+@dataclass
+class AvailabilityEstimate:
+    trials: int
+    unavailability: Dict[str, float]
+    contributors: Dict[str, List[Contributor]] = field(default_factory=dict)
+
+    def availability(self, name: str) -> float:
+        return 1.0 - self.unavailability[name]
+
+    def standard_error(self, name: str) -> float:
+        u = self.unavailability[name]
+        return math.sqrt(u * (1.0 - u) / self.trials) if self.trials else 0.0
+
+    def worst(self, top: int = 10) -> List[Tuple[str, float]]:
+        """
+        Least available services first
+        """
+        ranked = sorted(self.unavailability.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:top]
+
+def estimate_availability(services: Mapping[str, Service],
+                          failure_probabilities: Mapping[str, float],
+                          trials: int = 1_000_000,
+                          seed: Optional[int] = None,
+                          batch_size: int = 1 << 16,
+                          contributors_for: Optional[Iterable[str]] = None,
+                          top: int = 5) -> AvailabilityEstimate:
+    """
+    Estimate how often each service is unavailable
+
+    Each service fails on its own with its given probability (default 0)
+    and is unavailable whenever it or any transitive HARD dependency
+    fails; members of a HARD cycle go down together. Unknown dependencies
+    count as always available.
+
+    batch_size trials are packed into one int per service and failures
+    propagate with one OR per HARD edge, in dependency order over the
+    strongly connected components. Random masks use NumPy when it is
+    installed.
+
+    Contributors are ranked for contributors_for (default: services no
+    other service hard-depends on), costing one AND per target and
+    failure-prone dependency per batch.
+    """
+    graph = ServiceGraph.from_services(services)
+    names = graph.names
+    n = len(graph)
+    probability = [min(1.0, max(0.0, float(failure_probabilities.get(names[i], 0.0))))
+                   for i in range(n)]
+    components = _strongly_connected_ids(graph)
+    component_of = [0] * n
+    for component_id, members in enumerate(components):
+        for member in members:
+            component_of[member] = component_id
+
+    # Dependency components of each component, deduplicated
+    component_deps: List[List[int]] = []
+    for component_id, members in enumerate(components):
+        deps = set()
+        for member in members:
+            for dep_id in graph.hard_dependencies(member):
+                if dep_id < n and component_of[dep_id] != component_id:
+                    deps.add(component_of[dep_id])
+        component_deps.append(sorted(deps))
+    failing = [i for i in range(n) if probability[i] > 0.0]
+
+    if contributors_for is None:
+        dep_offsets, _ = graph.reverse_hard_edges()
+        targets = [i for i in range(n) if dep_offsets[i] == dep_offsets[i + 1]]
+    else:
+        targets = [graph.index_of[name] for name in contributors_for]
+    suspects = {target: _failure_prone_ancestors(target, components, component_of,
+                                                 component_deps, probability)
+                for target in targets}
+
+    make_mask = _NumpyMasks(seed) if np is not None else _PythonMasks(seed)
+    down_counts = [0] * len(components)
+    share_counts = {target: [0] * len(suspects[target]) for target in targets}
+    sole_counts = {target: [0] * len(suspects[target]) for target in targets}
+
+    done = 0
+    while done < trials:
+        size = min(batch_size, trials - done)
+        own = {i: make_mask(probability[i], size) for i in failing}
+
+        down = [0] * len(components)
+        for component_id, members in enumerate(components):
+            mask = 0
+            for member in members:
+                if member in own:
+                    mask |= own[member]
+            for dep_component in component_deps[component_id]:
+                mask |= down[dep_component]
+            down[component_id] = mask
+            down_counts[component_id] += _popcount(mask)
+
+        for target in targets:
+            outage = down[component_of[target]]
+            # Bits where exactly one suspect failed: ones minus twos
+            ones = twos = 0
+            for suspect in suspects[target]:
+                mask = own[suspect]
+                twos |= ones & mask
+                ones ^= mask
+            ones &= ~twos
+            shares, soles = share_counts[target], sole_counts[target]
+            for k, suspect in enumerate(suspects[target]):
+                mask = own[suspect] & outage
+                shares[k] += _popcount(mask)
+                soles[k] += _popcount(mask & ones)
+        done += size
+
+    unavailability = {names[i]: down_counts[component_of[i]] / trials if trials else 0.0
+                      for i in range(n)}
+    contributors = {}
+    for target in targets:
+        outages = down_counts[component_of[target]]
+        ranked = [
+            Contributor(names[suspect],
+                        share_counts[target][k] / outages if outages else 0.0,
+                        sole_counts[target][k] / outages if outages else 0.0)
+            for k, suspect in enumerate(suspects[target])
+        ]
+        ranked.sort(key=lambda c: (-c.sole_share, -c.share, c.name))
+        contributors[names[target]] = ranked[:top]
+    return AvailabilityEstimate(trials, unavailability, contributors)
+
+def _failure_prone_ancestors(target: int, components, component_of, component_deps,
+                             probability) -> List[int]:
+    """
+    Services that can fail and that target transitively hard-depends on,
+    itself and its cycle included
+    """
+    start = component_of[target]
+    seen = {start}
+    queue = [start]
+    for component_id in queue:
+        for dep_component in component_deps[component_id]:
+            if dep_component not in seen:
+                seen.add(dep_component)
+                queue.append(dep_component)
+    return sorted(member for component_id in seen for member in components[component_id]
+                  if probability[member] > 0.0)
+
+def _popcount(mask: int) -> int:
+    return mask.bit_count() if hasattr(mask, "bit_count") else bin(mask).count("1")
+
+class _PythonMasks:
+    """
+    Bernoulli bit masks from the random module
+
+    Rare failures are placed by geometric skips, costing O(p * size);
+    otherwise the probability's binary expansion combines uniform random
+    words with AND/OR, 24 words per mask.
+    """
+    _PRECISION = 24
+
+    def __init__(self, seed: Optional[int]):
+        self.rng = random.Random(seed)
+
+    def __call__(self, p: float, size: int) -> int:
+        if p >= 1.0:
+            return (1 << size) - 1
+        if p * self._PRECISION < 1.0:
+            bits = bytearray((size + 7) // 8)
+            log_q = math.log1p(-p)
+            position = -1
+            while True:
+                position += 1 + int(math.log(1.0 - self.rng.random()) / log_q)
+                if position >= size:
+                    break
+                bits[position >> 3] |= 1 << (position & 7)
+            return int.from_bytes(bits, "little")
+
+        threshold = int(p * (1 << self._PRECISION))
+        mask = 0
+        # From the least significant digit: 1 means OR, 0 means AND
+        for digit in range(self._PRECISION):
+            word = self.rng.getrandbits(size)
+            mask = (mask | word) if (threshold >> digit) & 1 else (mask & word)
+        return mask
+
+class _NumpyMasks:
+    def __init__(self, seed: Optional[int]):
+        self.rng = np.random.default_rng(seed)
+
+    def __call__(self, p: float, size: int) -> int:
+        if p >= 1.0:
+            return (1 << size) - 1
+        if p < 0.01:
+            # Sparse: draw only the failing positions
+            count = self.rng.binomial(size, p)
+            bits = np.zeros(size, dtype=bool)
+            bits[self.rng.choice(size, count, replace=False)] = True
+        else:
+            bits = self.rng.random(size, dtype=np.float32) < p
+        return int.from_bytes(np.packbits(bits, bitorder="little").tobytes(), "little")
+
+# Example usage
+if __name__ == "__main__":
+    services = {
+        "aws-infra": Service("aws-infra", 1, {}),
+        "iam": Service("iam", 2, {"aws-infra": DependencyType.HARD}),
+        "dns": Service("dns", 2, {"aws-infra": DependencyType.HARD}),
+        "database": Service("database", 3, {"iam": DependencyType.HARD}),
+        "app-api": Service("app-api", 4, {"database": DependencyType.HARD,
+                                          "dns": DependencyType.HARD}),
+        "frontend": Service("frontend", 5, {"app-api": DependencyType.HARD,
+                                            "cdn": DependencyType.SOFT}),
+    }
+    failure_probabilities = {"aws-infra": 0.0005, "iam": 0.001, "dns": 0.002,
+                             "database": 0.004, "app-api": 0.001}
+
+    estimate = estimate_availability(services, failure_probabilities, trials=200_000, seed=1)
+    for name, u in estimate.worst():
+        print(f"{name}: unavailable {u:.4%} (+/- {estimate.standard_error(name):.4%})")
+    for contributor in estimate.contributors["frontend"]:
+        print(f"  frontend outages with {contributor.name} down: {contributor.share:.1%}, "
+              f"only {contributor.name}: {contributor.sole_share:.1%}")
@@ -0,0 +1,137 @@
+"""
+Check many service catalogs in parallel, one JSON line per catalog
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import json
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Iterable, Iterator, List, Optional
+
+from src.dependency_analyzer import (
+    assign_layers, find_cycle_groups, validate_layering,
+)
+
+CATALOG_EXTENSIONS = (".jsonl", ".ndjson", ".csv", ".yaml", ".yml", ".lcgs")
+
+def find_catalogs(paths: Iterable[str]) -> List[str]:
+    """
+    Expand directories into the catalog files under them, sorted
+    """
+    catalogs = []
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, dirnames, filenames in os.walk(path):
+                dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+                catalogs.extend(os.path.join(dirpath, name) for name in sorted(filenames)
+                                if name.endswith(CATALOG_EXTENSIONS))
+        else:
+            catalogs.append(path)
+    return catalogs
+
+def analyze_catalog(path: str, include_layers: bool = False) -> dict:
+    """
+    Load one catalog and run cycle detection, layer validation and layer
+    assignment on it
+
+    Never raises: a catalog that cannot be loaded gets an "error" entry.
+    """
+    start = time.perf_counter()
+    try:
+        if path.endswith(".lcgs"):
+            from src.graph_snapshot import load_snapshot
+            graph, issues = load_snapshot(path).graph, []
+        else:
+            from src.catalog_loader import load_catalog
+            graph, issues = load_catalog(path)
+
+        cycles = find_cycle_groups(graph)
+        violations = validate_layering(graph)
+        assignment = assign_layers(graph)
+    except Exception as e:
+        return {"path": path, "ok": False, "error": f"{type(e).__name__}: {e}",
+                "seconds": round(time.perf_counter() - start, 6)}
+
+    result = {
+        "path": path,
+        "ok": not cycles and not violations,
+        "services": len(graph),
+        "hard_edges": len(graph.hard_targets),
+        "soft_edges": len(graph.soft_targets),
+        "cycles": cycles,
+        "violations": violations,
+        "unassigned": assignment.unassigned,
+        "issues": [str(issue) for issue in issues],
+        "seconds": round(time.perf_counter() - start, 6),
+    }
+    if include_layers:
+        result["assigned_layers"] = assignment.layers
+    return result
+
+def analyze_catalogs(paths: List[str], workers: Optional[int] = None,
+                     include_layers: bool = False) -> Iterator[dict]:
+    """
+    Yield analyze_catalog results in completion order
+
+    At most two catalogs per worker are in flight, so results stream out
+    as they finish and memory stays bounded for long file lists.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or len(paths) <= 1:
+        for path in paths:
+            yield analyze_catalog(path, include_layers)
+        return
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+        queued = iter(paths)
+        running = set()
+        for path in queued:
+            running.add(pool.submit(analyze_catalog, path, include_layers))
+            if len(running) >= 2 * workers:
+                break
+        while running:
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+                path = next(queued, None)
+                if path is not None:
+                    running.add(pool.submit(analyze_catalog, path, include_layers))
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Check service catalogs for dependency cycles and layer violations. "
+                    "Prints one JSON object per catalog as it finishes.")
+    parser.add_argument("paths", nargs="+", help="Catalog files or directories to search")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument("--layers", action="store_true",
+                        help="Include the assigned layer of every service")
+    parser.add_argument("--strict", action="store_true",
+                        help="Also fail on malformed records and undeclared dependencies")
+    args = parser.parse_args(argv)
+
+    catalogs = find_catalogs(args.paths)
+    if not catalogs:
+        print("No catalog files found", file=sys.stderr)
+        return 2
+
+    failed = errors = 0
+    for result in analyze_catalogs(catalogs, args.workers, args.layers):
+        sys.stdout.write(json.dumps(result) + "\n")
+        sys.stdout.flush()
+        if "error" in result:
+            errors += 1
+        elif not result["ok"] or (args.strict and result["issues"]):
+            failed += 1
+
+    print(f"{len(catalogs)} catalogs checked: {failed} failed, {errors} could not be loaded",
+          file=sys.stderr)
+    if errors:
+        return 2
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,359 @@
+"""
+Stream service catalogs (JSON Lines, CSV, YAML) straight into a ServiceGraph
+"""
+
+import csv
+import json
+import sys
+from array import array
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+from src.dependency_analyzer import DependencyType, ServiceGraph
+
+@dataclass
+class LoadIssue:
+    """
+    A record that could not be used, or a reference to an undeclared service
+    """
+    location: str
+    message: str
+
+    def __str__(self) -> str:
+        return f"{self.location}: {self.message}"
+
+class CatalogBuilder:
+    """
+    Incrementally build a ServiceGraph from service and edge records
+
+    Two record shapes are accepted, in any order:
+    - service: {"name": ..., "layer": ..., "dependencies": {dep: "hard"}}
+      (layer and dependencies optional)
+    - edge: {"service": ..., "dependency": ..., "type": "hard"|"soft"}
+
+    Names are interned to ids as they arrive and edges are kept in flat
+    int arrays, so memory is bounded by the graph, not the input size.
+    """
+
+    def __init__(self):
+        self.names: List[str] = []
+        self.index_of = {}
+        self.layers = array("i")
+        self.declared = bytearray()
+        self._sources = {DependencyType.HARD: array("i"), DependencyType.SOFT: array("i")}
+        self._targets = {DependencyType.HARD: array("i"), DependencyType.SOFT: array("i")}
+        self._issues: List[LoadIssue] = []
+
+    def intern(self, name: str) -> int:
+        name_id = self.index_of.get(name)
+        if name_id is None:
+            name_id = self.index_of[name] = len(self.names)
+            self.names.append(sys.intern(name))
+            self.layers.append(0)
+            self.declared.append(0)
+        return name_id
+
+    def add_service(self, name: str, layer: Optional[int] = None) -> int:
+        service_id = self.intern(name)
+        self.declared[service_id] = 1
+        if layer is not None:
+            self.layers[service_id] = layer
+        return service_id
+
+    def add_dependency(self, service: str, dependency: str,
+                       dep_type: DependencyType = DependencyType.HARD) -> None:
+        self._sources[dep_type].append(self.intern(service))
+        self._targets[dep_type].append(self.intern(dependency))
+
+    def add_record(self, record, location: str = "") -> None:
+        """
+        Add one service or edge record, noting an issue if it is malformed
+
+        The whole record is validated before anything is added, so a
+        malformed one leaves the builder untouched.
+        """
+        name, layer = None, None
+        try:
+            if not isinstance(record, dict):
+                raise ValueError(f"expected an object, got {type(record).__name__}")
+            if "name" in record:
+                name = _require_name(record, "name")
+                layer = record.get("layer")
+                layer = int(layer) if layer not in (None, "") else None
+                dependencies = record.get("dependencies") or {}
+                if not isinstance(dependencies, dict):
+                    raise ValueError("'dependencies' must map service names to types")
+                edges = [(name, str(dep_name), _dependency_type(dep_type))
+                         for dep_name, dep_type in dependencies.items()]
+            elif "service" in record:
+                edges = [(_require_name(record, "service"),
+                          _require_name(record, "dependency"),
+                          _dependency_type(record.get("type", "hard")))]
+            else:
+                raise ValueError("record has neither 'name' nor 'service'")
+        except (ValueError, TypeError) as e:
+            self._issues.append(LoadIssue(location, str(e)))
+            return
+        if name is not None:
+            self.add_service(name, layer)
+        for service, dependency, dep_type in edges:
+            self.add_dependency(service, dependency, dep_type)
+
+    def issues(self) -> Iterator[LoadIssue]:
+        """
+        Malformed records seen so far, then dangling references
+
+        Dangling references are only looked up when iterated this far, and
+        each undeclared service is reported once, at its first reference.
+        """
+        yield from self._issues
+        reported = bytearray(len(self.names))
+        for dep_type in DependencyType:
+            for source, target in zip(self._sources[dep_type], self._targets[dep_type]):
+                if not self.declared[source]:
+                    if not reported[source]:
+                        reported[source] = 1
+                        yield LoadIssue(self.names[source], "has dependencies but is never declared")
+                elif not self.declared[target] and not reported[target]:
+                    reported[target] = 1
+                    yield LoadIssue(self.names[source],
+                                    f"depends on undeclared service {self.names[target]}")
+
+    def build(self) -> ServiceGraph:
+        """
+        Produce the CSR graph; undeclared names become external dependencies
+
+        Duplicate edges are dropped, and an edge given as both HARD and
+        SOFT is kept as HARD.
+        """
+        # Declared services take ids 0..n-1, externals follow
+        remap = array("i", bytes(4 * len(self.names)))
+        names = []
+        for declared_pass in (1, 0):
+            for name_id, declared in enumerate(self.declared):
+                if declared == declared_pass:
+                    remap[name_id] = len(names)
+                    names.append(self.names[name_id])
+        n = sum(self.declared)
+        layers = array("i", (self.layers[i] for i in range(len(self.names)) if self.declared[i]))
+
+        hard_offsets, hard_targets = self._csr(DependencyType.HARD, remap, n)
+        soft_offsets, soft_targets = self._csr(DependencyType.SOFT, remap, n,
+                                               hard_offsets, hard_targets)
+        return ServiceGraph(names, layers, hard_offsets, hard_targets, soft_offsets, soft_targets)
+
+    def _csr(self, dep_type: DependencyType, remap: array, n: int,
+             exclude_offsets: array = None, exclude_targets: array = None) -> Tuple[array, array]:
+        """
+        Counting-sort the edge list into CSR rows, dropping duplicates
+        """
+        sources, targets = self._sources[dep_type], self._targets[dep_type]
+
+        # Edges of undeclared services have no owner to attach to
+        counts = array("q", bytes(8 * (n + 1)))
+        for source in sources:
+            if remap[source] < n:
+                counts[remap[source] + 1] += 1
+        for i in range(n):
+            counts[i + 1] += counts[i]
+
+        slots = array("i", bytes(4 * counts[n]))
+        fill = array("q", counts)
+        for source, target in zip(sources, targets):
+            source = remap[source]
+            if source < n:
+                slots[fill[source]] = remap[target]
+                fill[source] += 1
+
+        offsets, flat = array("q", [0]), array("i")
+        for source in range(n):
+            seen = set()
+            if exclude_offsets is not None:
+                seen.update(exclude_targets[exclude_offsets[source]:exclude_offsets[source + 1]])
+            for pos in range(counts[source], counts[source + 1]):
+                target = slots[pos]
+                if target not in seen:
+                    seen.add(target)
+                    flat.append(target)
+            offsets.append(len(flat))
+        return offsets, flat
+
+def iter_records(path: str) -> Iterator[Tuple[str, object]]:
+    """
+    Yield (location, record) pairs from a catalog file, chosen by extension
+    """
+    if path.endswith((".jsonl", ".ndjson")):
+        return _iter_jsonl(path)
+    if path.endswith(".csv"):
+        return _iter_csv(path)
+    if path.endswith((".yaml", ".yml")):
+        return _iter_yaml(path)
+    raise ValueError(f"Unsupported catalog format: {path}")
+
+def load_catalog(paths: Union[str, Iterable[str]]) -> Tuple[ServiceGraph, Iterator[LoadIssue]]:
+    """
+    Load one or more catalog files into a single ServiceGraph
+
+    Issues come back as the builder's lazy iterator, so a caller that
+    ignores them never materializes the dangling-reference scan.
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+    builder = CatalogBuilder()
+    for path in paths:
+        for location, record in iter_records(path):
+            if isinstance(record, LoadIssue):
+                builder._issues.append(record)
+            else:
+                builder.add_record(record, location)
+    return builder.build(), builder.issues()
+
+def _require_name(record: dict, key: str) -> str:
+    value = record.get(key)
+    if not isinstance(value, str) or not value:
+        raise ValueError(f"'{key}' must be a non-empty string")
+    return value
+
+def _dependency_type(value) -> DependencyType:
+    if isinstance(value, DependencyType):
+        return value
+    return DependencyType(str(value).lower())
+
+def _iter_jsonl(path: str):
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            location = f"{path}:{line_no}"
+            try:
+                yield location, json.loads(line)
+            except json.JSONDecodeError as e:
+                yield location, LoadIssue(location, f"invalid JSON: {e.msg}")
+
+def _iter_csv(path: str):
+    """
+    Rows with columns name/service, layer, dependency, type
+
+    A row declares a service (with its layer if given) and, if the
+    dependency column is filled, one edge from it.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        for line_no, row in enumerate(csv.DictReader(f), 2):
+            location = f"{path}:{line_no}"
+            name = row.get("name") or row.get("service")
+            yield location, {"name": name, "layer": row.get("layer")}
+            if row.get("dependency"):
+                yield location, {"service": name, "dependency": row["dependency"],
+                                 "type": row.get("type") or "hard"}
+
+def _iter_yaml(path: str):
+    """
+    Stream records from a YAML file without loading the whole document
+
+    Records are the items of a top-level sequence, of the top-level
+    'services' or 'edges' sequences, or whole documents of a multi-document
+    stream. Scalars stay strings; add_record converts layers.
+
+    A record using an alias becomes a LoadIssue. A syntax error becomes
+    one too, and reading resumes at the next document.
+    """
+    import yaml
+    Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+    with open(path, "rb") as f:
+        item_index = 0
+        start_line = 0
+        while True:
+            problems: List[str] = []
+            try:
+                events = yaml.parse(f, Loader=Loader)
+                for event in events:
+                    if not isinstance(event, yaml.DocumentStartEvent):
+                        continue
+                    top = next(events)
+                    if isinstance(top, yaml.SequenceStartEvent):
+                        items = _sequence_items(events, problems)
+                    elif isinstance(top, yaml.MappingStartEvent):
+                        items = _stream_mapping(events, problems)
+                    else:
+                        _build(top, events, problems)
+                        problems.clear()
+                        continue
+                    for item in items:
+                        item_index += 1
+                        location = f"{path}#{item_index}"
+                        if problems:
+                            yield location, LoadIssue(location, problems[0])
+                            problems.clear()
+                        else:
+                            yield location, item
+                return
+            except yaml.YAMLError as e:
+                mark = getattr(e, "problem_mark", None) or getattr(e, "context_mark", None)
+                line = start_line + (mark.line if mark else 0)
+                location = f"{path}:{line + 1}"
+                yield location, LoadIssue(location, f"invalid YAML: {getattr(e, 'problem', None) or e}")
+                start_line = _seek_next_document(f, line)
+                if start_line is None:
+                    return
+
+def _seek_next_document(f, line: int) -> Optional[int]:
+    """
+    Position f at the first '---' marker after line; returns its line
+    number, or None if there is none
+    """
+    f.seek(0)
+    offset = 0
+    for line_no, text in enumerate(f):
+        if line_no > line and text.startswith(b"---"):
+            f.seek(offset)
+            return line_no
+        offset += len(text)
+    return None
+
+def _stream_mapping(events, problems: List[str]):
+    """
+    Inside a top-level mapping: stream 'services'/'edges' sequences, or
+    treat the whole mapping as one record
+    """
+    import yaml
+    record = {}
+    streamed = False
+    for event in events:
+        if isinstance(event, yaml.MappingEndEvent):
+            break
+        key = event.value
+        value_start = next(events)
+        if key in ("services", "edges") and isinstance(value_start, yaml.SequenceStartEvent):
+            streamed = True
+            yield from _sequence_items(events, problems)
+        else:
+            record[key] = _build(value_start, events, problems)
+    if not streamed and record:
+        yield record
+
+def _sequence_items(events, problems: List[str]):
+    import yaml
+    for event in events:
+        if isinstance(event, yaml.SequenceEndEvent):
+            return
+        yield _build(event, events, problems)
+
+def _build(start, events, problems: List[str]):
+    """
+    Construct one node from its events, noting unsupported ones in problems
+    """
+    import yaml
+    if isinstance(start, yaml.ScalarEvent):
+        return None if start.value in ("", "~", "null") and start.style is None else start.value
+    if isinstance(start, yaml.SequenceStartEvent):
+        return list(_sequence_items(events, problems))
+    if isinstance(start, yaml.MappingStartEvent):
+        node = {}
+        for event in events:
+            if isinstance(event, yaml.MappingEndEvent):
+                return node
+            node[_build(event, events, problems)] = _build(next(events), events, problems)
+    if isinstance(start, yaml.AliasEvent):
+        problems.append("YAML aliases are not supported in catalogs")
+    return None
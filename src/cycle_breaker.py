@@ -0,0 +1,295 @@
+"""
+Suggest HARD dependencies to demote to SOFT so that no cycles remain
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import heapq
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Mapping, Tuple
+
+from src.dependency_analyzer import (
+    Service, ServiceGraph, DependencyType, _cycle_group_ids,
+)
+
+@dataclass
+class EdgeFlip:
+    """
+    One HARD dependency to demote to SOFT
+
+    layer_gap is the service's layer minus the dependency's; zero or
+    less means the edge already violates layering, so it is the cheapest
+    kind to demote. weight is the cost the suggester minimized.
+    """
+    service: str
+    dependency: str
+    weight: int
+    layer_gap: int
+    cycle_group: int
+
+@dataclass
+class CycleBreakPlan:
+    """
+    Ranked flips that together break every HARD cycle, cheapest first
+    """
+    flips: List[EdgeFlip] = field(default_factory=list)
+    cycle_groups: int = 0
+    exact_groups: int = 0
+
+    @property
+    def total_weight(self) -> int:
+        return sum(flip.weight for flip in self.flips)
+
+    def edges(self) -> List[Tuple[str, str]]:
+        return [(flip.service, flip.dependency) for flip in self.flips]
+
+def flip_weight(service_layer: int, dependency_layer: int) -> int:
+    """
+    Cost of demoting an edge: 1 for edges that already violate layering,
+    growing with how far down the layer stack a legitimate edge reaches
+    """
+    return 1 + max(0, service_layer - dependency_layer)
+
+def suggest_soft_flips(services: Mapping[str, Service], exact_limit: int = 12,
+                       minimize_budget: int = 1_000_000) -> CycleBreakPlan:
+    """
+    Pick a low-weight set of HARD edges whose demotion leaves no cycle
+
+    Each cycle group (SCC) is solved on its own with the weighted
+    Eades-Lin-Smyth heuristic: peel sinks and sources, otherwise the
+    service with the largest outgoing minus incoming weight, and demote
+    the edges that point backwards in the resulting order. O(E log V).
+    Groups of at most exact_limit services are solved exactly instead
+    (dynamic programming over subsets).
+
+    Afterwards, flips that are not needed once the others are applied are
+    dropped again, heaviest first. Each check is a graph search, so this
+    pass stops after visiting minimize_budget services in total (0 turns
+    it off) and keeps the remaining flips as they are.
+    """
+    graph = ServiceGraph.from_services(services)
+    names, layers = graph.names, graph.layers
+    plan = CycleBreakPlan()
+    budget = [minimize_budget]
+
+    for group_index, group in enumerate(_cycle_group_ids(graph)):
+        plan.cycle_groups += 1
+        members = set(group)
+        local_of = {svc_id: i for i, svc_id in enumerate(group)}
+
+        # Flow edges run dependency -> dependent (recovery order); a
+        # self-loop can only be broken by demoting it
+        edges: List[Tuple[int, int, int]] = []
+        for svc_id in group:
+            for dep_id in graph.hard_dependencies(svc_id):
+                if dep_id in members:
+                    weight = flip_weight(layers[svc_id], layers[dep_id])
+                    edges.append((local_of[dep_id], local_of[svc_id], weight))
+        loops = [(u, v, w) for u, v, w in edges if u == v]
+        edges = [(u, v, w) for u, v, w in edges if u != v]
+
+        if len(group) <= exact_limit:
+            order = _exact_order(len(group), edges)
+            plan.exact_groups += 1
+        else:
+            order = _eades_lin_smyth(len(group), edges)
+
+        position = [0] * len(group)
+        for rank, node in enumerate(order):
+            position[node] = rank
+        backward = [(u, v, w) for u, v, w in edges if position[u] > position[v]]
+        if budget[0] > 0:
+            backward = _drop_redundant(len(group), edges, backward, budget)
+
+        for u, v, w in loops + backward:
+            service, dependency = group[v], group[u]
+            plan.flips.append(EdgeFlip(
+                service=names[service],
+                dependency=names[dependency],
+                weight=w,
+                layer_gap=layers[service] - layers[dependency],
+                cycle_group=group_index,
+            ))
+
+    plan.flips.sort(key=lambda f: (f.weight, f.layer_gap, f.service, f.dependency))
+    return plan
+
+def apply_flips(services: Mapping[str, Service],
+                flips: Iterable[EdgeFlip]) -> Dict[str, Service]:
+    """
+    Copy of services with the given edges demoted to SOFT
+    """
+    result = {
+        name: Service(service.name, service.layer, dict(service.dependencies))
+        for name, service in services.items()
+    }
+    for flip in flips:
+        result[flip.service].dependencies[flip.dependency] = DependencyType.SOFT
+    return result
+
+def _eades_lin_smyth(n: int, edges: List[Tuple[int, int, int]]) -> List[int]:
+    """
+    Weighted Eades-Lin-Smyth ordering with a lazy max-heap on delta
+    """
+    out_edges: List[List[Tuple[int, int]]] = [[] for _ in range(n)]
+    in_edges: List[List[Tuple[int, int]]] = [[] for _ in range(n)]
+    out_degree, in_degree = [0] * n, [0] * n
+    delta = [0] * n
+    for u, v, w in edges:
+        out_edges[u].append((v, w))
+        in_edges[v].append((u, w))
+        out_degree[u] += 1
+        in_degree[v] += 1
+        delta[u] += w
+        delta[v] -= w
+
+    removed = [False] * n
+    sinks = [i for i in range(n) if out_degree[i] == 0]
+    sources = [i for i in range(n) if in_degree[i] == 0 and out_degree[i] > 0]
+    heap = [(-delta[i], i) for i in range(n)]
+    heapq.heapify(heap)
+    head: List[int] = []
+    tail: List[int] = []
+
+    def remove(node: int) -> None:
+        removed[node] = True
+        for v, w in out_edges[node]:
+            if not removed[v]:
+                in_degree[v] -= 1
+                delta[v] += w
+                if in_degree[v] == 0:
+                    sources.append(v)
+                heapq.heappush(heap, (-delta[v], v))
+        for u, w in in_edges[node]:
+            if not removed[u]:
+                out_degree[u] -= 1
+                delta[u] -= w
+                if out_degree[u] == 0:
+                    sinks.append(u)
+                heapq.heappush(heap, (-delta[u], u))
+
+    remaining = n
+    while remaining:
+        if sinks:
+            node = sinks.pop()
+            if removed[node]:
+                continue
+            tail.append(node)
+        elif sources:
+            node = sources.pop()
+            if removed[node]:
+                continue
+            head.append(node)
+        else:
+            neg_delta, node = heapq.heappop(heap)
+            if removed[node] or -neg_delta != delta[node]:
+                continue
+            head.append(node)
+        remove(node)
+        remaining -= 1
+
+    return head + tail[::-1]
+
+def _exact_order(n: int, edges: List[Tuple[int, int, int]]) -> List[int]:
+    """
+    Ordering with the minimum total weight of backward edges
+
+    best[S] is the cheapest ordering of the set S placed first; placing v
+    right after S turns v's edges into S backward. O(2^n * n).
+    """
+    into = [[0] * n for _ in range(n)]
+    for u, v, w in edges:
+        into[u][v] += w
+
+    size = 1 << n
+    best = [0] + [None] * (size - 1)
+    choice = [0] * size
+    # back_cost[v][S]: weight of edges from v into S, built by low bit
+    back_cost = []
+    for v in range(n):
+        costs = [0] * size
+        row = into[v]
+        for subset in range(1, size):
+            low = subset & -subset
+            costs[subset] = costs[subset ^ low] + row[low.bit_length() - 1]
+        back_cost.append(costs)
+
+    for subset in range(size):
+        base = best[subset]
+        if base is None:
+            continue
+        for v in range(n):
+            bit = 1 << v
+            if subset & bit:
+                continue
+            cost = base + back_cost[v][subset]
+            extended = subset | bit
+            if best[extended] is None or cost < best[extended]:
+                best[extended] = cost
+                choice[extended] = v
+
+    order = []
+    subset = size - 1
+    while subset:
+        v = choice[subset]
+        order.append(v)
+        subset ^= 1 << v
+    return order[::-1]
+
+def _drop_redundant(n: int, edges: List[Tuple[int, int, int]],
+                    backward: List[Tuple[int, int, int]],
+                    budget: List[int]) -> List[Tuple[int, int, int]]:
+    """
+    Restore flipped edges, heaviest first, where doing so closes no cycle
+
+    budget is a one-element list of remaining visits, shared across groups
+    """
+    flipped = set((u, v) for u, v, _ in backward)
+    adjacency: List[List[int]] = [[] for _ in range(n)]
+    for u, v, _ in edges:
+        if (u, v) not in flipped:
+            adjacency[u].append(v)
+
+    kept = []
+    for u, v, w in sorted(backward, key=lambda e: -e[2]):
+        if budget[0] <= 0:
+            kept.append((u, v, w))
+            continue
+        # u -> v closes a cycle exactly when v already reaches u
+        seen = {v}
+        stack = [v]
+        closes = False
+        while stack and not closes:
+            for nxt in adjacency[stack.pop()]:
+                if nxt == u:
+                    closes = True
+                    break
+                if nxt not in seen:
+                    seen.add(nxt)
+                    stack.append(nxt)
+        budget[0] -= len(seen)
+        if closes:
+            kept.append((u, v, w))
+        else:
+            adjacency[u].append(v)
+    return kept
+
+# Example usage
+if __name__ == "__main__":
+    from src.dependency_analyzer import find_cycle_groups
+
+    services = {
+        "dns": Service("dns", 1, {"config": DependencyType.HARD}),
+        "config": Service("config", 2, {"dns": DependencyType.HARD, "vault": DependencyType.HARD}),
+        "vault": Service("vault", 2, {"config": DependencyType.HARD, "dns": DependencyType.HARD}),
+        "deploy": Service("deploy", 5, {"artifacts": DependencyType.HARD, "vault": DependencyType.HARD}),
+        "artifacts": Service("artifacts", 4, {"deploy": DependencyType.HARD}),
+    }
+
+    plan = suggest_soft_flips(services)
+    print(f"Cycle groups: {find_cycle_groups(services)}")
+    for flip in plan.flips:
+        print(f"Demote {flip.service} -> {flip.dependency} to SOFT "
+              f"(weight {flip.weight}, layer gap {flip.layer_gap})")
+    print(f"Cycles after demotion: {find_cycle_groups(apply_flips(services, plan.flips))}")
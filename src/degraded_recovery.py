@@ -0,0 +1,238 @@
+"""
+Recovery timeline with degraded mode: services serve once their HARD
+dependencies are up and become healthy once every dependency is healthy
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import heapq
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+from src.dependency_analyzer import Service, ServiceGraph, DependencyType
+
+class ServiceState(Enum):
+    DOWN = "down"
+    DEGRADED = "degraded"
+    HEALTHY = "healthy"
+
+@dataclass
+class ServiceTimeline:
+    """
+    When a service started recovering, began serving and became healthy
+
+    A time is None if it never happened: blocked by a HARD cycle or
+    unknown HARD dependency, or degraded for good because a dependency
+    never becomes healthy.
+    """
+    name: str
+    started_at: Optional[float] = None
+    serving_at: Optional[float] = None
+    healthy_at: Optional[float] = None
+
+    def state_at(self, t: float) -> ServiceState:
+        if self.healthy_at is not None and self.healthy_at <= t:
+            return ServiceState.HEALTHY
+        if self.serving_at is not None and self.serving_at <= t:
+            return ServiceState.DEGRADED
+        return ServiceState.DOWN
+
+@dataclass
+class DegradedRecoveryResult:
+    """
+    Per-service timelines plus serving and healthy counts over time
+
+    The curves are step functions: (time, count) points where the count of
+    serving (degraded or healthy) or healthy services changes.
+    """
+    timelines: Dict[str, ServiceTimeline]
+    serving_curve: List[Tuple[float, int]] = field(default_factory=list)
+    healthy_curve: List[Tuple[float, int]] = field(default_factory=list)
+
+    @property
+    def never_serving(self) -> List[str]:
+        return [name for name, t in self.timelines.items() if t.serving_at is None]
+
+    @property
+    def never_healthy(self) -> List[str]:
+        return [name for name, t in self.timelines.items() if t.healthy_at is None]
+
+    @property
+    def time_to_first_serving(self) -> Optional[float]:
+        """
+        Time until the first service serves; None if none ever does
+        """
+        return min((t.serving_at for t in self.timelines.values() if t.serving_at is not None),
+                   default=None)
+
+    @property
+    def time_to_all_serving(self) -> Optional[float]:
+        """
+        Time until every service serves, at least degraded; None if some never do
+        """
+        if self.never_serving:
+            return None
+        return max((t.serving_at for t in self.timelines.values()), default=0.0)
+
+    @property
+    def time_to_fully_healthy(self) -> Optional[float]:
+        """
+        Time until every service is healthy; None if some never are
+        """
+        if self.never_healthy:
+            return None
+        return max((t.healthy_at for t in self.timelines.values()), default=0.0)
+
+    def downtime(self, weights: Optional[Mapping[str, float]] = None,
+                 horizon: Optional[float] = None) -> float:
+        """
+        Weighted service-time spent not serving
+
+        weights mark customer-facing services (default 1 each). Services
+        that never serve count until horizon, which defaults to the last
+        event time.
+        """
+        return self._area(lambda t: t.serving_at, weights, horizon)
+
+    def degraded_time(self, weights: Optional[Mapping[str, float]] = None,
+                      horizon: Optional[float] = None) -> float:
+        """
+        Weighted service-time spent serving but not healthy
+        """
+        return self._area(lambda t: t.healthy_at, weights, horizon) - \
+            self._area(lambda t: t.serving_at, weights, horizon)
+
+    def _area(self, when, weights, horizon) -> float:
+        if horizon is None:
+            points = self.serving_curve + self.healthy_curve
+            horizon = max((time for time, _ in points), default=0.0)
+        total = 0.0
+        for name, timeline in self.timelines.items():
+            at = when(timeline)
+            weight = 1.0 if weights is None else weights.get(name, 0.0)
+            total += weight * min(horizon, at if at is not None else horizon)
+        return total
+
+def simulate_degraded_recovery(services: Mapping[str, Service],
+                               durations: Optional[Mapping[str, float]] = None,
+                               default_duration: float = 1.0,
+                               max_parallel: Optional[int] = None,
+                               priority: Optional[Sequence[str]] = None) -> DegradedRecoveryResult:
+    """
+    Event-driven recovery where SOFT dependencies only limit health
+
+    A service starts recovering once all its HARD dependencies serve and
+    serves durations[name] later: degraded if any dependency (HARD or
+    SOFT) is not healthy yet, healthy otherwise. It is upgraded to
+    healthy the moment its last dependency becomes healthy. At most
+    max_parallel services recover at once; ready services start in
+    priority order (names listed first, in that order), then by layer.
+    O((V+E) log V).
+    """
+    if max_parallel is not None and max_parallel < 1:
+        raise ValueError("max_parallel must be at least 1")
+    graph = ServiceGraph.from_services(services)
+    names, layers = graph.names, graph.layers
+    n = len(graph)
+    durations = durations or {}
+    rank = {name: i for i, name in enumerate(priority or ())}
+
+    # Reverse edges over both dependency types
+    dependents: List[List[int]] = [[] for _ in range(n)]
+    hard_dependents: List[List[int]] = [[] for _ in range(n)]
+    pending_hard = [0] * n
+    unhealthy = [0] * n
+    for svc_id in range(n):
+        for dep_id in graph.hard_dependencies(svc_id):
+            pending_hard[svc_id] += 1
+            unhealthy[svc_id] += 1
+            if dep_id < n:
+                hard_dependents[dep_id].append(svc_id)
+                dependents[dep_id].append(svc_id)
+        for dep_id in graph.soft_dependencies(svc_id):
+            # Unknown dependencies never recover, so never decrement
+            unhealthy[svc_id] += 1
+            if dep_id < n:
+                dependents[dep_id].append(svc_id)
+
+    timelines = {names[i]: ServiceTimeline(names[i]) for i in range(n)}
+    serving = bytearray(n)
+    healthy = bytearray(n)
+    serving_curve: List[Tuple[float, int]] = []
+    healthy_curve: List[Tuple[float, int]] = []
+    counts = [0, 0]
+
+    def record(curve: List[Tuple[float, int]], index: int, now: float) -> None:
+        counts[index] += 1
+        if curve and curve[-1][0] == now:
+            curve[-1] = (now, counts[index])
+        else:
+            curve.append((now, counts[index]))
+
+    def become_healthy(svc_id: int, now: float) -> None:
+        # Healthiness cascades through dependents that already serve
+        stack = [svc_id]
+        while stack:
+            node = stack.pop()
+            healthy[node] = 1
+            timelines[names[node]].healthy_at = now
+            record(healthy_curve, 1, now)
+            for dependent in dependents[node]:
+                unhealthy[dependent] -= 1
+                if unhealthy[dependent] == 0 and serving[dependent]:
+                    stack.append(dependent)
+
+    def key(svc_id: int) -> tuple:
+        return (rank.get(names[svc_id], len(rank)), layers[svc_id], svc_id)
+
+    ready = [key(i) for i in range(n) if pending_hard[i] == 0]
+    heapq.heapify(ready)
+    running: List[Tuple[float, int]] = []
+    now = 0.0
+
+    while ready or running:
+        while ready and (max_parallel is None or len(running) < max_parallel):
+            svc_id = heapq.heappop(ready)[-1]
+            timelines[names[svc_id]].started_at = now
+            duration = durations.get(names[svc_id], default_duration)
+            heapq.heappush(running, (now + duration, svc_id))
+
+        now, svc_id = heapq.heappop(running)
+        serving[svc_id] = 1
+        timelines[names[svc_id]].serving_at = now
+        record(serving_curve, 0, now)
+        if unhealthy[svc_id] == 0:
+            become_healthy(svc_id, now)
+        for dependent in hard_dependents[svc_id]:
+            pending_hard[dependent] -= 1
+            if pending_hard[dependent] == 0:
+                heapq.heappush(ready, key(dependent))
+
+    return DegradedRecoveryResult(timelines, serving_curve, healthy_curve)
+
+# Example usage
+if __name__ == "__main__":
+    services = {
+        "aws-infra": Service("aws-infra", 1, {}),
+        "iam": Service("iam", 2, {"aws-infra": DependencyType.HARD}),
+        "database": Service("database", 3, {"iam": DependencyType.HARD}),
+        "logging": Service("logging", 3, {"iam": DependencyType.HARD}),
+        "app-api": Service("app-api", 4, {"database": DependencyType.HARD,
+                                          "logging": DependencyType.SOFT}),
+        "frontend": Service("frontend", 5, {"app-api": DependencyType.HARD,
+                                            "cdn-analytics": DependencyType.SOFT}),
+    }
+    durations = {"database": 5.0, "logging": 20.0}
+
+    result = simulate_degraded_recovery(services, durations, max_parallel=2)
+    for name, timeline in result.timelines.items():
+        print(f"{name}: serving at {timeline.serving_at}, healthy at {timeline.healthy_at}")
+    print(f"Serving curve: {result.serving_curve}")
+    print(f"Healthy curve: {result.healthy_curve}")
+    print(f"Time to first serving: {result.time_to_first_serving}")
+    print(f"Time to all serving: {result.time_to_all_serving}")
+    print(f"Time to fully healthy: {result.time_to_fully_healthy}")
+    print(f"Never healthy: {result.never_healthy}")
+    print(f"Customer-facing downtime: {result.downtime({'frontend': 1.0})}")
@@ -1,88 +1,394 @@
 """
 Analyze circular dependencies in service architecture
 """
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from typing import Set, Dict, List, Tuple
-from dataclasses import dataclass
+from array import array
+from collections.abc import Mapping as MappingABC
+from typing import Set, Dict, Iterator, List, Mapping, Optional, Tuple
+from dataclasses import dataclass, field
 from enum import Enum
 
+from src.instrumentation import count, span, traced
+
 class DependencyType(Enum):
     HARD = "hard"
     SOFT = "soft"
 
 @dataclass
 class Service:
+    __slots__ = ("name", "layer", "dependencies")
     name: str
     layer: int
     dependencies: Dict[str, DependencyType]
+
+class ServiceGraph(MappingABC):
+    """
+    Compact integer-indexed service graph
+    
+    Service names are interned to integer ids 0..n-1. HARD and SOFT edges are
+    stored as compressed sparse rows (offsets/targets arrays) and layers in a
+    parallel int array. Dependencies on services that are not part of the
+    graph get external ids >= n so they survive a round trip.
     
-def detect_circular_dependencies(services: Dict[str, Service]) -> List[Tuple[str, str]]:
+    Behaves as a read-only Mapping[str, Service]; Service objects are built
+    on access, so existing code keeps working while the analyzer functions
+    read the arrays directly.
     """
-    Detect circular dependencies in service graph
+    __slots__ = (
+        "names", "index_of", "layers",
+        "hard_offsets", "hard_targets", "soft_offsets", "soft_targets",
+    )
     
-    Returns list of (service_a, service_b) tuples representing cycles
+    def __init__(self, names: List[str], layers: array,
+                 hard_offsets: array, hard_targets: array,
+                 soft_offsets: array, soft_targets: array):
+        self.names = names
+        self.index_of = {name: i for i, name in enumerate(names)}
+        self.layers = layers
+        self.hard_offsets = hard_offsets
+        self.hard_targets = hard_targets
+        self.soft_offsets = soft_offsets
+        self.soft_targets = soft_targets
+    
+    @classmethod
+    def from_services(cls, services: Mapping[str, Service]) -> "ServiceGraph":
+        """
+        Build a graph from a Dict[str, Service]
+        """
+        if isinstance(services, ServiceGraph):
+            return services
+        return cls._build(services)
+    
+    @classmethod
+    @traced("graph.build")
+    def _build(cls, services: Mapping[str, Service]) -> "ServiceGraph":
+        names = [sys.intern(name) for name in services]
+        index_of = {name: i for i, name in enumerate(names)}
+        layers = array("i", (service.layer for service in services.values()))
+        hard_offsets, hard_targets = array("q", [0]), array("i")
+        soft_offsets, soft_targets = array("q", [0]), array("i")
+        
+        for service in services.values():
+            for dep_name, dep_type in service.dependencies.items():
+                dep_id = index_of.get(dep_name)
+                if dep_id is None:
+                    dep_id = index_of[dep_name] = len(names)
+                    names.append(sys.intern(dep_name))
+                if dep_type == DependencyType.HARD:
+                    hard_targets.append(dep_id)
+                else:
+                    soft_targets.append(dep_id)
+            hard_offsets.append(len(hard_targets))
+            soft_offsets.append(len(soft_targets))
+        
+        count("graph.services", len(layers))
+        count("graph.edges", len(hard_targets) + len(soft_targets))
+        return cls(names, layers, hard_offsets, hard_targets,
+                   soft_offsets, soft_targets)
+    
+    def to_services(self) -> Dict[str, Service]:
+        """
+        Convert back to a Dict[str, Service]
+        """
+        return {name: self[name] for name in self}
+    
+    def hard_dependencies(self, service_id: int) -> array:
+        """
+        Ids of HARD dependencies of a service, external ids included
+        """
+        return self.hard_targets[self.hard_offsets[service_id]:self.hard_offsets[service_id + 1]]
+    
+    def soft_dependencies(self, service_id: int) -> array:
+        """
+        Ids of SOFT dependencies of a service, external ids included
+        """
+        return self.soft_targets[self.soft_offsets[service_id]:self.soft_offsets[service_id + 1]]
+    
+    def reverse_hard_edges(self) -> Tuple[array, array]:
+        """
+        CSR (offsets, sources) of HARD dependents between services in the graph
+        """
+        n = len(self)
+        offsets, targets = self.hard_offsets, self.hard_targets
+        counts = array("q", bytes(8 * (n + 1)))
+        for dep_id in targets:
+            if dep_id < n:
+                counts[dep_id + 1] += 1
+        for i in range(n):
+            counts[i + 1] += counts[i]
+        
+        sources = array("i", bytes(4 * counts[n]))
+        fill = array("q", counts)
+        for svc_id in range(n):
+            for pos in range(offsets[svc_id], offsets[svc_id + 1]):
+                dep_id = targets[pos]
+                if dep_id < n:
+                    sources[fill[dep_id]] = svc_id
+                    fill[dep_id] += 1
+        return counts, sources
+    
+    def __getitem__(self, name: str) -> Service:
+        service_id = self.index_of.get(name)
+        if service_id is None or service_id >= len(self.layers):
+            raise KeyError(name)
+        dependencies = {}
+        for dep_id in self.hard_dependencies(service_id):
+            dependencies[self.names[dep_id]] = DependencyType.HARD
+        for dep_id in self.soft_dependencies(service_id):
+            dependencies[self.names[dep_id]] = DependencyType.SOFT
+        return Service(name=name, layer=self.layers[service_id],
+                       dependencies=dependencies)
+    
+    def __contains__(self, name) -> bool:
+        service_id = self.index_of.get(name)
+        return service_id is not None and service_id < len(self.layers)
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names[:len(self.layers)])
+    
+    def __len__(self) -> int:
+        return len(self.layers)
+    
+def strongly_connected_components(services: Mapping[str, Service]) -> List[List[str]]:
     """
-    cycles = []
+    Find strongly connected components of the HARD dependency graph
     
-    def has_path(start: str, end: str, visited: Set[str] = None) -> bool:
-        if visited is None:
-            visited = set()
+    Iterative Tarjan's algorithm, O(V+E), so deep dependency chains do not
+    hit the recursion limit. Dependencies on unknown services are ignored.
+    Components are returned in reverse topological order (dependencies
+    before dependents), members in service insertion order.
+    """
+    graph = ServiceGraph.from_services(services)
+    return [[graph.names[i] for i in component]
+            for component in _strongly_connected_ids(graph)]
+
+@traced("scc")
+def _strongly_connected_ids(graph: ServiceGraph) -> List[List[int]]:
+    """
+    Tarjan's algorithm over the HARD CSR arrays, returning sorted id lists
+    """
+    n = len(graph)
+    offsets, targets = graph.hard_offsets, graph.hard_targets
+    
+    index = [-1] * n
+    lowlink = [0] * n
+    on_stack = [False] * n
+    stack = []
+    components = []
+    counter = 0
+    
+    for root in range(n):
+        if index[root] != -1:
+            continue
         
-        if start == end:
-            return True
+        # Each frame is (node, position of next edge to explore)
+        work = [(root, offsets[root])]
+        index[root] = lowlink[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
         
-        if start in visited:
-            return False
+        while work:
+            node, pos = work[-1]
+            if pos < offsets[node + 1]:
+                work[-1] = (node, pos + 1)
+                succ = targets[pos]
+                if succ >= n:
+                    continue
+                if index[succ] == -1:
+                    index[succ] = lowlink[succ] = counter
+                    counter += 1
+                    stack.append(succ)
+                    on_stack[succ] = True
+                    work.append((succ, offsets[succ]))
+                elif on_stack[succ] and index[succ] < lowlink[node]:
+                    lowlink[node] = index[succ]
+                continue
             
-        visited.add(start)
-        
-        service = services.get(start)
-        if not service:
-            return False
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                if lowlink[node] < lowlink[parent]:
+                    lowlink[parent] = lowlink[node]
             
-        for dep_name, dep_type in service.dependencies.items():
-            if dep_type == DependencyType.HARD:
-                if has_path(dep_name, end, visited.copy()):
-                    return True
+            if lowlink[node] == index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = False
+                    component.append(member)
+                    if member == node:
+                        break
+                component.sort()
+                components.append(component)
+    
+    # Tarjan visits every service and every HARD edge exactly once
+    count("scc.nodes_visited", n)
+    count("scc.edges_visited", len(targets))
+    count("scc.components", len(components))
+    return components
+
+@traced("find_cycle_groups")
+def find_cycle_groups(services: Mapping[str, Service]) -> List[List[str]]:
+    """
+    Find groups of services that are mutually reachable over HARD edges
+    
+    Returns one list per cycle, including single services that hard-depend
+    on themselves
+    """
+    graph = ServiceGraph.from_services(services)
+    return [[graph.names[i] for i in group] for group in _cycle_group_ids(graph)]
+
+def _cycle_group_ids(graph: ServiceGraph) -> List[List[int]]:
+    groups = []
+    for component in _strongly_connected_ids(graph):
+        if len(component) > 1 or component[0] in graph.hard_dependencies(component[0]):
+            groups.append(component)
+    return groups
+
+@traced("detect_circular_dependencies")
+def detect_circular_dependencies(services: Mapping[str, Service]) -> List[Tuple[str, str]]:
+    """
+    Detect circular dependencies in service graph
+    
+    Returns list of (service_a, service_b) tuples representing cycles
+    """
+    graph = ServiceGraph.from_services(services)
+    ordered_pairs = []
+    
+    groups = _cycle_group_ids(graph)
+    
+    with span("detect_circular_dependencies.pairs", groups=len(groups)):
+        # Every two members of a cycle group reach each other
+        for group in groups:
+            for i, svc_a in enumerate(group):
+                for svc_b in group[i + 1:]:
+                    ordered_pairs.append((svc_a, svc_b))
         
-        return False
-    
-    # Check each pair of services
-    for svc_a in services:
-        for svc_b in services:
-            if svc_a != svc_b:
-                # Check if A->B and B->A both exist
-                if (has_path(svc_a, svc_b) and 
-                    has_path(svc_b, svc_a)):
-                    # Avoid duplicate entries
-                    pair = tuple(sorted([svc_a, svc_b]))
-                    if pair not in cycles:
-                        cycles.append(pair)
-    
-    return cycles
+        # Keep the order in which a pairwise scan would discover them
+        ordered_pairs.sort()
+        names = graph.names
+        pairs = [tuple(sorted([names[a], names[b]])) for a, b in ordered_pairs]
+    count("cycles.pairs", len(pairs))
+    return pairs
 
-def validate_layering(services: Dict[str, Service]) -> List[str]:
+@traced("validate_layering")
+def validate_layering(services: Mapping[str, Service]) -> List[str]:
     """
     Validate that services only depend on lower layers
     
     Returns list of violations
     """
-    violations = []
+    graph = ServiceGraph.from_services(services)
+    names, layers = graph.names, graph.layers
+    n = len(graph)
+    offending = []
+    
+    for svc_id in range(n):
+        layer = layers[svc_id]
+        for dep_id in graph.hard_dependencies(svc_id):
+            if dep_id < n and layers[dep_id] >= layer:
+                offending.append((svc_id, dep_id))
+    count("layering.edges_checked", len(graph.hard_targets))
+    count("layering.violations", len(offending))
     
-    for svc_name, service in services.items():
-        for dep_name, dep_type in service.dependencies.items():
-            if dep_type == DependencyType.HARD:
-                dep_service = services.get(dep_name)
-                if dep_service:
-                    if dep_service.layer >= service.layer:
-                        violation = (
-                            f"{svc_name} (L{service.layer}) depends on "
-                            f"{dep_name} (L{dep_service.layer})"
-                        )
-                        violations.append(violation)
+    with span("validate_layering.format", violations=len(offending)):
+        violations = [
+            f"{names[svc_id]} (L{layers[svc_id]}) depends on "
+            f"{names[dep_id]} (L{layers[dep_id]})"
+            for svc_id, dep_id in offending
+        ]
     
     return violations
 
+@dataclass
+class LayerAssignment:
+    """
+    Result of assign_layers
+    
+    Services that depend on a cycle, directly or transitively, cannot be
+    layered; cycles lists the exact groups that block them.
+    """
+    layers: Dict[str, int]
+    unassigned: List[str] = field(default_factory=list)
+    cycles: List[List[str]] = field(default_factory=list)
+
+@traced("assign_layers")
+def assign_layers(services: Mapping[str, Service],
+                  pinned: Optional[Mapping[str, int]] = None,
+                  base_layer: int = 2) -> LayerAssignment:
+    """
+    Assign each service the lowest layer above all of its HARD dependencies
+    
+    Rules:
+    1. Services with no dependencies → base_layer (Layer 1 is cloud)
+    2. Services depend only on lower layers
+    3. Pinned services keep their given layer
+    
+    Kahn's algorithm over HARD edges, O(V+E). Service.layer is ignored
+    unless the service is pinned.
+    """
+    graph = ServiceGraph.from_services(services)
+    names = graph.names
+    n = len(graph)
+    offsets, targets = graph.hard_offsets, graph.hard_targets
+    dep_offsets, dependents = graph.reverse_hard_edges()
+    pinned = pinned or {}
+    
+    # A service is ready once all of its known HARD dependencies are layered
+    pending = array("i", bytes(4 * n))
+    for svc_id in range(n):
+        for pos in range(offsets[svc_id], offsets[svc_id + 1]):
+            if targets[pos] < n:
+                pending[svc_id] += 1
+    
+    layers = array("i", bytes(4 * n))
+    assigned = bytearray(n)
+    ready = [i for i in range(n) if pending[i] == 0 or names[i] in pinned]
+    
+    while ready:
+        svc_id = ready.pop()
+        if assigned[svc_id]:
+            continue
+        assigned[svc_id] = 1
+        
+        layer = pinned.get(names[svc_id])
+        if layer is None:
+            layer = base_layer
+            for pos in range(offsets[svc_id], offsets[svc_id + 1]):
+                dep_id = targets[pos]
+                if dep_id < n and layers[dep_id] >= layer:
+                    layer = layers[dep_id] + 1
+        layers[svc_id] = layer
+        
+        for pos in range(dep_offsets[svc_id], dep_offsets[svc_id + 1]):
+            dependent = dependents[pos]
+            pending[dependent] -= 1
+            if pending[dependent] == 0:
+                ready.append(dependent)
+    
+    result = LayerAssignment(
+        layers={names[i]: layers[i] for i in range(n) if assigned[i]},
+        unassigned=[names[i] for i in range(n) if not assigned[i]],
+    )
+    count("assign_layers.assigned", len(result.layers))
+    count("assign_layers.unassigned", len(result.unassigned))
+    if result.unassigned:
+        # Cycles among the leftovers are what blocks them
+        blocked = set(result.unassigned)
+        result.cycles = find_cycle_groups({
+            name: Service(name, 0, {
+                dep_name: dep_type
+                for dep_name, dep_type in services[name].dependencies.items()
+                if dep_type == DependencyType.HARD and dep_name in blocked
+            })
+            for name in result.unassigned
+        })
+    return result
+
 # Example usage
 if __name__ == "__main__":
     # Atlassian 2021 problem scenario
@@ -102,5 +408,8 @@ if __name__ == "__main__":
     cycles = detect_circular_dependencies(services)
     print(f"Circular dependencies found: {cycles}")
     
+    groups = find_cycle_groups(services)
+    print(f"Cycle groups: {groups}")
+    
     violations = validate_layering(services)
     print(f"Layer violations: {violations}")
@@ -0,0 +1,559 @@
+"""
+In-process EventBridge stand-in: rules and targets read from a Pulumi
+stack, event patterns compiled into a field index
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import ast
+import asyncio
+import importlib.util
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from src.pulumi_extractor import _provider_aliases
+
+_MISSING = object()
+
+_ROUTING_KINDS = ("EventBus", "EventRule", "EventTarget", "Function")
+
+@dataclass
+class BusRule:
+    name: str
+    pattern: dict
+    event_bus: Optional[str] = None
+    targets: List[str] = field(default_factory=list)
+
+@dataclass
+class BusTarget:
+    """
+    A rule target; module and handler are set when it is a Lambda
+    function whose code lives in the stack directory
+    """
+    name: str
+    rule: str
+    function: Optional[str] = None
+    module: Optional[str] = None
+    handler: Optional[str] = None
+
+@dataclass
+class BusStats:
+    published: int = 0
+    unmatched: int = 0
+    delivered: int = 0
+    invocations: int = 0
+    failed: int = 0
+
+def load_stack_routing(stack_dir: str) -> Tuple[List[BusRule], Dict[str, BusTarget]]:
+    """
+    EventRules (with json.dumps(...) or string patterns) and their
+    EventTargets from a stack's __main__.py, without running Pulumi
+    """
+    with open(os.path.join(stack_dir, "__main__.py"), encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    providers = _provider_aliases(tree)
+
+    calls: List[Tuple[Optional[str], str, ast.Call]] = []
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Assign, ast.Expr)) and isinstance(node.value, ast.Call):
+            kind = _resource_kind(node.value, providers)
+            if kind:
+                target = node.targets[0] if isinstance(node, ast.Assign) else None
+                calls.append((target.id if isinstance(target, ast.Name) else None,
+                              kind, node.value))
+    calls.sort(key=lambda item: item[2].lineno)
+
+    # Variable -> (kind, logical name, call)
+    variables: Dict[str, Tuple[str, str, ast.Call]] = {}
+    rules: Dict[str, BusRule] = {}
+    targets: Dict[str, BusTarget] = {}
+    for variable, kind, call in calls:
+        name = _logical_name(call) or variable
+        if name is None:
+            continue
+        if variable:
+            variables[variable] = (kind, name, call)
+        keywords = {k.arg: k.value for k in call.keywords if k.arg}
+        if kind == "EventRule" and "event_pattern" in keywords:
+            rules[name] = BusRule(name, _literal_pattern(keywords["event_pattern"]),
+                                  _referenced(keywords.get("event_bus_name"), variables))
+        elif kind == "EventTarget":
+            rule = _referenced(keywords.get("rule"), variables)
+            if rule not in rules:
+                continue
+            target = BusTarget(name, rule)
+            source = _referenced_call(keywords.get("arn"), variables)
+            if source is not None and source[0] == "Function":
+                target.function = source[1]
+                target.module, target.handler = _function_handler(stack_dir, source[2])
+            rules[rule].targets.append(name)
+            targets[name] = target
+    return list(rules.values()), targets
+
+def load_handler(target: BusTarget) -> Callable:
+    """
+    Import a target's Lambda handler from its module file
+    """
+    if target.module is None or target.handler is None:
+        raise ValueError(f"Target {target.name} has no local handler")
+    module_name = f"_bus_target_{target.function}".replace("-", "_")
+    spec = importlib.util.spec_from_file_location(module_name, target.module)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return getattr(module, target.handler)
+
+def _resource_kind(call: ast.Call, providers) -> Optional[str]:
+    func = call.func
+    if not isinstance(func, ast.Attribute) or func.attr not in _ROUTING_KINDS:
+        return None
+    root = func.value
+    while isinstance(root, ast.Attribute):
+        root = root.value
+    return func.attr if isinstance(root, ast.Name) and root.id in providers else None
+
+def _logical_name(call: ast.Call) -> Optional[str]:
+    first = call.args[0] if call.args else None
+    if isinstance(first, ast.Constant) and isinstance(first.value, str):
+        return first.value
+    return None
+
+def _referenced_call(node, variables) -> Optional[Tuple[str, str, ast.Call]]:
+    # rule.name, actor_func.arn -> the resource held by rule / actor_func
+    while isinstance(node, ast.Attribute):
+        node = node.value
+    if isinstance(node, ast.Name):
+        return variables.get(node.id)
+    return None
+
+def _referenced(node, variables) -> Optional[str]:
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    source = _referenced_call(node, variables)
+    return source[1] if source else None
+
+def _literal_pattern(node: ast.AST) -> dict:
+    # json.dumps({...}) or a JSON string
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) \
+            and node.func.attr == "dumps" and node.args:
+        return ast.literal_eval(node.args[0])
+    value = ast.literal_eval(node)
+    return json.loads(value) if isinstance(value, str) else value
+
+def _function_handler(stack_dir: str, call: ast.Call) -> Tuple[Optional[str], Optional[str]]:
+    # handler="actor.handler" with code from FileArchive("./actor")
+    keywords = {k.arg: k.value for k in call.keywords if k.arg}
+    handler = keywords.get("handler")
+    if not (isinstance(handler, ast.Constant) and isinstance(handler.value, str)):
+        return None, None
+    module_name, _, function = handler.value.rpartition(".")
+    for node in ast.walk(keywords.get("code", ast.Constant(None))):
+        if isinstance(node, ast.Call) and getattr(node.func, "attr", None) == "FileArchive" \
+                and node.args and isinstance(node.args[0], ast.Constant):
+            path = os.path.join(stack_dir, node.args[0].value, module_name.replace(".", os.sep) + ".py")
+            if os.path.exists(path):
+                return os.path.normpath(path), function
+    return None, None
+
+class _Condition:
+    """
+    One pattern leaf: the event value at path must match one of the
+    exact values or predicates (any element, for arrays)
+
+    exact holds _exact_key(value) for each value, so true never equals 1.
+    """
+    __slots__ = ("path", "key", "exact", "predicates", "exists")
+
+    def __init__(self, path: Tuple[str, ...], matchers: Sequence[Any]):
+        self.path = path
+        self.key = path[0] if len(path) == 1 else None
+        exact = []
+        self.predicates: List[Callable[[Any], bool]] = []
+        self.exists: Optional[bool] = None
+        for matcher in matchers:
+            if isinstance(matcher, dict):
+                if set(matcher) == {"exists"}:
+                    self.exists = bool(matcher["exists"])
+                else:
+                    self.predicates.append(_compile_filter(matcher))
+            else:
+                exact.append(_exact_key(matcher))
+        self.exact = frozenset(exact)
+
+    def values(self, event: Mapping) -> Sequence[Any]:
+        if self.key is not None:
+            value = event.get(self.key, _MISSING)
+            if value is _MISSING:
+                return ()
+            return value if isinstance(value, list) else (value,)
+        return _lookup(event, self.path)
+
+    def test(self, event: Mapping) -> bool:
+        values = self.values(event)
+        if self.exists is not None:
+            if bool(values) != self.exists:
+                return False
+            if not self.exact and not self.predicates:
+                return True
+        for value in values:
+            try:
+                if _exact_key(value) in self.exact:
+                    return True
+            except TypeError:
+                pass
+            for predicate in self.predicates:
+                if predicate(value):
+                    return True
+        return False
+
+def _exact_key(value: Any) -> Tuple[str, Any]:
+    """
+    Hashable identity for exact matching: JSON booleans and numbers are
+    distinct, though Python has True == 1
+    """
+    if isinstance(value, bool):
+        return "bool", value
+    if isinstance(value, (int, float)):
+        return "number", value
+    return type(value).__name__, value
+
+def _lookup(event: Mapping, path: Tuple[str, ...]) -> List[Any]:
+    """
+    Leaf values at path, flattening arrays; empty when the field is absent
+    """
+    nodes = [event]
+    for key in path:
+        found = []
+        for node in nodes:
+            if isinstance(node, dict) and key in node:
+                value = node[key]
+                if isinstance(value, list):
+                    found.extend(value)
+                else:
+                    found.append(value)
+        if not found:
+            return found
+        nodes = found
+    return nodes
+
+_NUMERIC_OPS = {
+    "=": lambda a, b: a == b, "<": lambda a, b: a < b, "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b, ">=": lambda a, b: a >= b,
+}
+
+def _compile_filter(matcher: dict) -> Callable[[Any], bool]:
+    """
+    Content filters: prefix, suffix, equals-ignore-case, anything-but, numeric
+    """
+    if len(matcher) != 1:
+        raise ValueError(f"Unsupported content filter: {matcher}")
+    (kind, arg), = matcher.items()
+    if kind == "prefix" and isinstance(arg, str):
+        return lambda v: isinstance(v, str) and v.startswith(arg)
+    if kind == "suffix" and isinstance(arg, str):
+        return lambda v: isinstance(v, str) and v.endswith(arg)
+    if kind == "equals-ignore-case" and isinstance(arg, str):
+        folded = arg.casefold()
+        return lambda v: isinstance(v, str) and v.casefold() == folded
+    if kind == "anything-but":
+        if isinstance(arg, dict):
+            inner = _compile_filter(arg)
+            return lambda v: not inner(v)
+        excluded = frozenset(_exact_key(a) for a in (arg if isinstance(arg, list) else [arg]))
+        return lambda v: isinstance(v, (str, int, float)) and _exact_key(v) not in excluded
+    if kind == "numeric" and isinstance(arg, list) and len(arg) % 2 == 0:
+        checks = [(_NUMERIC_OPS[arg[i]], arg[i + 1]) for i in range(0, len(arg), 2)]
+        return lambda v: isinstance(v, (int, float)) and not isinstance(v, bool) \
+            and all(op(v, bound) for op, bound in checks)
+    raise ValueError(f"Unsupported content filter: {matcher}")
+
+def compile_pattern(pattern: Mapping, prefix: Tuple[str, ...] = ()) -> List[_Condition]:
+    """
+    Flatten a nested event pattern into leaf conditions
+    """
+    conditions = []
+    for key, value in pattern.items():
+        path = prefix + (key,)
+        if isinstance(value, dict):
+            conditions.extend(compile_pattern(value, path))
+        elif isinstance(value, list):
+            conditions.append(_Condition(path, value))
+        else:
+            raise ValueError(f"Pattern value at {'.'.join(path)} must be an array or object")
+    return conditions
+
+class EventPatternIndex:
+    """
+    Finds the patterns an event matches without testing each one
+
+    Every pattern with an exact-value field is filed under one such
+    field, preferring the fields most patterns share, so an event costs
+    one dictionary lookup per indexed field plus checking the remaining
+    conditions of the candidates it hits. Patterns without exact values
+    are tested on every event.
+    """
+    def __init__(self):
+        self.patterns: List[List[_Condition]] = []
+        self._index: Dict[Tuple[str, ...], Dict[Any, List[int]]] = {}
+        self._residual: List[List[_Condition]] = []
+        self._scan: List[int] = []
+        self._lookups: List[Tuple[Tuple[str, ...], Optional[str], Dict[Any, List[int]]]] = []
+        self._dirty = False
+
+    def add(self, pattern: Mapping) -> int:
+        self.patterns.append(compile_pattern(pattern))
+        self._dirty = True
+        return len(self.patterns) - 1
+
+    def _build(self) -> None:
+        usable = [[c for c in conditions if c.exact and not c.predicates and c.exists is None]
+                  for conditions in self.patterns]
+        shared: Dict[Tuple[str, ...], int] = {}
+        for candidates in usable:
+            for condition in candidates:
+                shared[condition.path] = shared.get(condition.path, 0) + 1
+
+        self._index, self._residual, self._scan = {}, [], []
+        for pattern_id, conditions in enumerate(self.patterns):
+            if not usable[pattern_id]:
+                self._scan.append(pattern_id)
+                self._residual.append(conditions)
+                continue
+            chosen = min(usable[pattern_id],
+                         key=lambda c: (-shared[c.path], len(c.exact), c.path))
+            table = self._index.setdefault(chosen.path, {})
+            for value in chosen.exact:
+                table.setdefault(value, []).append(pattern_id)
+            self._residual.append([c for c in conditions if c is not chosen])
+        self._lookups = [(path, path[0] if len(path) == 1 else None, table)
+                         for path, table in self._index.items()]
+        self._dirty = False
+
+    def match(self, event: Mapping) -> List[int]:
+        if self._dirty:
+            self._build()
+        candidates = list(self._scan)
+        for path, key, table in self._lookups:
+            if key is not None:
+                value = event.get(key, _MISSING)
+                if value is _MISSING:
+                    continue
+                values = value if isinstance(value, list) else (value,)
+            else:
+                values = _lookup(event, path)
+            for value in values:
+                try:
+                    hits = table.get(_exact_key(value))
+                except TypeError:
+                    continue
+                if hits:
+                    candidates.extend(hits)
+        if len(candidates) > 1:
+            candidates = sorted(set(candidates))
+        residual = self._residual
+        return [pattern_id for pattern_id in candidates
+                if all(condition.test(event) for condition in residual[pattern_id])]
+
+class LocalEventBus:
+    """
+    Routes events to local handlers through bounded per-target queues
+
+    put_events waits while a target's queue holds max_pending events, so a
+    slow handler slows the producer instead of growing memory. Targets get
+    one event per invocation (EventBridge) or, with batch_size > 1, lists
+    of up to batch_size events (EventBridge Pipes); ids listed in a
+    returned batchItemFailures, or every event of an invocation that
+    raises, end up in failed. Handlers run on the event loop unless
+    workers > 0, which runs them on that many threads.
+    """
+    def __init__(self, max_pending: int = 10_000, batch_size: int = 1, workers: int = 0):
+        self.index = EventPatternIndex()
+        self.rules: List[BusRule] = []
+        self.handlers: Dict[str, Callable] = {}
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.workers = workers
+        self.stats = BusStats()
+        self.failed: List[Tuple[str, dict]] = []
+        self._rule_targets: List[List[str]] = []
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @classmethod
+    def from_stack(cls, stack_dir: str, handlers: Optional[Mapping[str, Callable]] = None,
+                   event_bus: Optional[str] = None, **options) -> "LocalEventBus":
+        """
+        Bus with a stack's rules; handlers (by target or function name)
+        override the Lambda code found in the stack directory
+        """
+        handlers = handlers or {}
+        bus = cls(**options)
+        rules, targets = load_stack_routing(stack_dir)
+        for rule in rules:
+            if event_bus is not None and rule.event_bus != event_bus:
+                continue
+            resolved = {}
+            for name in rule.targets:
+                target = targets[name]
+                handler = handlers.get(name) or handlers.get(target.function)
+                if handler is None and target.module is not None:
+                    handler = load_handler(target)
+                if handler is not None:
+                    resolved[name] = handler
+            bus.add_rule(rule, resolved)
+        return bus
+
+    def add_rule(self, rule: BusRule, handlers: Mapping[str, Callable]) -> None:
+        self.rules.append(rule)
+        self.index.add(rule.pattern)
+        self._rule_targets.append(list(handlers))
+        self.handlers.update(handlers)
+
+    def route(self, event: Mapping) -> List[str]:
+        """
+        Names of the targets the event is delivered to
+        """
+        matched = self.index.match(event)
+        if len(matched) == 1:
+            return self._rule_targets[matched[0]]
+        targets: List[str] = []
+        for rule_id in matched:
+            for name in self._rule_targets[rule_id]:
+                if name not in targets:
+                    targets.append(name)
+        return targets
+
+    async def __aenter__(self) -> "LocalEventBus":
+        if self.workers:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                thread_name_prefix="event-bus")
+        for name in self.handlers:
+            self._queues[name] = asyncio.Queue(maxsize=self.max_pending)
+            for _ in range(max(1, self.workers)):
+                self._tasks.append(asyncio.ensure_future(self._consume(name)))
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks, self._queues = [], {}
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    async def put_events(self, events) -> None:
+        stats, queues = self.stats, self._queues
+        for event in events:
+            stats.published += 1
+            targets = self.route(event)
+            if not targets:
+                stats.unmatched += 1
+            for name in targets:
+                queue = queues[name]
+                if queue.full():
+                    await queue.put(event)
+                else:
+                    queue.put_nowait(event)
+
+    async def join(self) -> None:
+        await asyncio.gather(*(queue.join() for queue in self._queues.values()))
+
+    async def _consume(self, name: str) -> None:
+        queue = self._queues[name]
+        handler = self.handlers[name]
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self.batch_size and not queue.empty():
+                batch.append(queue.get_nowait())
+            payload = batch if self.batch_size > 1 else batch[0]
+            try:
+                if self._executor is not None:
+                    response = await loop.run_in_executor(self._executor, handler, payload, None)
+                else:
+                    response = handler(payload, None)
+                failed_ids = set()
+                if self.batch_size > 1 and isinstance(response, dict):
+                    failed_ids = {item.get("itemIdentifier")
+                                  for item in response.get("batchItemFailures", ())}
+                failed = [event for event in batch if event.get("id") in failed_ids]
+            except Exception:
+                failed = batch
+            self.stats.invocations += 1
+            self.stats.delivered += len(batch) - len(failed)
+            self.stats.failed += len(failed)
+            self.failed.extend((name, event) for event in failed)
+            for _ in batch:
+                queue.task_done()
+
+    def dispatch(self, events) -> BusStats:
+        """
+        Deliver events and wait until every handler is done
+        """
+        async def run():
+            async with self:
+                await self.put_events(events)
+        asyncio.run(run())
+        return self.stats
+
+def synthetic_events(count: int, match_ratio: float = 0.5) -> List[dict]:
+    """
+    PetCreated events, mixed with other sources and detail types
+    """
+    events = []
+    stride = max(1, round(1 / match_ratio)) if match_ratio > 0 else count + 1
+    for i in range(count):
+        matching = i % stride == 0
+        events.append({
+            "version": "0",
+            "id": f"evt-{i}",
+            "source": "com.petstore" if matching or i % 2 else "com.inventory",
+            "detail-type": "PetCreated" if matching else "PetUpdated",
+            "detail": {"id": i, "name": f"pet-{i}"},
+        })
+    return events
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Route synthetic events through a stack's EventBridge rules locally")
+    parser.add_argument("stack", nargs="?", default="pulumi/petstore")
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--match-ratio", type=float, default=0.5)
+    parser.add_argument("--batch-size", type=int, default=100,
+                        help="Events per handler invocation (1 = one event per invocation)")
+    parser.add_argument("--max-pending", type=int, default=10_000)
+    parser.add_argument("--workers", type=int, default=0)
+    parser.add_argument("--show-output", action="store_true", help="Do not silence handler output")
+    args = parser.parse_args(argv)
+
+    bus = LocalEventBus.from_stack(args.stack, max_pending=args.max_pending,
+                                   batch_size=args.batch_size, workers=args.workers)
+    for rule, targets in zip(bus.rules, bus._rule_targets):
+        print(f"Rule {rule.name} on {rule.event_bus}: {json.dumps(rule.pattern)} -> {targets}")
+
+    events = synthetic_events(args.events, args.match_ratio)
+    started = time.perf_counter()
+    routed = sum(1 for event in events if bus.route(event))
+    routing = time.perf_counter() - started
+    print(f"Routing only: {len(events) / routing:,.0f} events/s ({routed} matched)")
+
+    started = time.perf_counter()
+    if args.show_output:
+        stats = bus.dispatch(events)
+    else:
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            stats = bus.dispatch(events)
+    elapsed = time.perf_counter() - started
+    print(f"End to end: {len(events) / elapsed:,.0f} events/s, {stats.delivered} delivered "
+          f"in {stats.invocations} invocations, {stats.unmatched} unmatched, {stats.failed} failed")
+    return 1 if stats.failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
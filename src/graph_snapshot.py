@@ -0,0 +1,223 @@
+"""
+Versioned binary snapshots of a ServiceGraph that can be memory-mapped
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import mmap
+import struct
+import time
+from array import array
+from typing import List, Mapping, Optional
+
+from src.dependency_analyzer import (
+    Service, ServiceGraph, _strongly_connected_ids, find_cycle_groups,
+)
+from src.reachability import ReachabilityIndex, graph_fingerprint
+
+# Layout: header, section table, then 8-byte aligned sections. Integer
+# arrays are stored in host byte order, recorded by the endian marker.
+_MAGIC = b"LCGS"
+_VERSION = 1
+_ENDIAN_MARKER = 0x01020304
+_HEADER = struct.Struct("<4sHHIIIIQ32s")
+_SECTION = struct.Struct("<QQ")
+
+_NAMES, _LAYERS, _HARD_OFFSETS, _HARD_TARGETS, _SOFT_OFFSETS, _SOFT_TARGETS, \
+    _COMPONENTS, _REACHABILITY = range(8)
+_SECTION_COUNT = 8
+
+# Header flags for the optional cached sections
+_HAS_COMPONENTS = 1
+_HAS_REACHABILITY = 2
+
+def write_snapshot(services: Mapping[str, Service], path: str,
+                   include_components: bool = True,
+                   include_reachability: bool = False) -> None:
+    """
+    Write services as a snapshot, optionally with cached SCC ids and the
+    reachability matrix
+    """
+    graph = ServiceGraph.from_services(services)
+    if any("\0" in name for name in graph.names):
+        raise ValueError("Service names must not contain NUL characters")
+
+    component_of, component_count = b"", 0
+    matrix, width = b"", 0
+    flags = 0
+    if include_reachability:
+        flags = _HAS_COMPONENTS | _HAS_REACHABILITY
+        index = ReachabilityIndex.build(graph)
+        component_of = index.component_of.tobytes()
+        component_count = len(index.matrix) // max(index.width, 1)
+        matrix, width = index.matrix, index.width
+    elif include_components:
+        flags = _HAS_COMPONENTS
+        components = _strongly_connected_ids(graph)
+        ids = array("i", bytes(4 * len(graph)))
+        for component_id, members in enumerate(components):
+            for member in members:
+                ids[member] = component_id
+        component_of, component_count = ids.tobytes(), len(components)
+
+    sections = [
+        "\0".join(graph.names).encode("utf-8"),
+        _int_array("i", graph.layers).tobytes(),
+        _int_array("q", graph.hard_offsets).tobytes(),
+        _int_array("i", graph.hard_targets).tobytes(),
+        _int_array("q", graph.soft_offsets).tobytes(),
+        _int_array("i", graph.soft_targets).tobytes(),
+        component_of,
+        bytes(matrix),
+    ]
+
+    position = _align(_HEADER.size + _SECTION.size * _SECTION_COUNT)
+    table = []
+    for data in sections:
+        table.append((position if data else 0, len(data)))
+        position = _align(position + len(data))
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, flags, _ENDIAN_MARKER,
+                             len(graph), len(graph.names), component_count, width,
+                             graph_fingerprint(graph)))
+        for offset, size in table:
+            f.write(_SECTION.pack(offset, size))
+        for (offset, size), data in zip(table, sections):
+            if data:
+                f.write(bytes(offset - f.tell()))
+                f.write(data)
+    # Readers that have the old file mapped keep seeing the old pages
+    os.replace(tmp_path, path)
+
+class GraphSnapshot:
+    """
+    A memory-mapped snapshot
+
+    graph is a ServiceGraph whose CSR and layer arrays are memoryviews into
+    the mapping, so nothing but the name table is copied and processes
+    mapping the same file share its page cache.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+
+        (magic, version, flags, endian, service_count, name_count,
+         self.component_count, width, self.fingerprint) = _HEADER.unpack_from(view, 0)
+        if magic != _MAGIC:
+            raise ValueError(f"{path} is not a graph snapshot")
+        if version != _VERSION:
+            raise ValueError(f"{path} is snapshot version {version}, expected {_VERSION}")
+        if endian != _ENDIAN_MARKER:
+            raise ValueError(f"{path} was written on a host with a different byte order")
+
+        table = [_SECTION.unpack_from(view, _HEADER.size + _SECTION.size * i)
+                 for i in range(_SECTION_COUNT)]
+
+        def section(kind: int, fmt: str):
+            offset, size = table[kind]
+            return view[offset:offset + size].cast(fmt)
+
+        names_offset, names_size = table[_NAMES]
+        names = str(view[names_offset:names_offset + names_size], "utf-8").split("\0") \
+            if name_count else []
+        self.graph = ServiceGraph(
+            names,
+            section(_LAYERS, "i"),
+            section(_HARD_OFFSETS, "q"),
+            section(_HARD_TARGETS, "i"),
+            section(_SOFT_OFFSETS, "q"),
+            section(_SOFT_TARGETS, "i"),
+        )
+        self.component_of = section(_COMPONENTS, "i") if flags & _HAS_COMPONENTS else None
+        self._reachability_width = width
+        offset, size = table[_REACHABILITY]
+        self._matrix = view[offset:offset + size] if flags & _HAS_REACHABILITY else None
+        if len(self.graph) != service_count:
+            raise ValueError(f"{path} is truncated or corrupt")
+
+    def components(self) -> Optional[List[List[str]]]:
+        """
+        Cached strongly connected components, dependencies first
+        """
+        if self.component_of is None:
+            return None
+        components = [[] for _ in range(self.component_count)]
+        for svc_id, component_id in enumerate(self.component_of):
+            components[component_id].append(self.graph.names[svc_id])
+        return components
+
+    def cycle_groups(self) -> List[List[str]]:
+        """
+        Cycle groups from the cached SCC section, recomputed if absent
+        """
+        if self.component_of is None:
+            return find_cycle_groups(self.graph)
+        groups = []
+        for members in self.components():
+            if len(members) > 1:
+                groups.append(members)
+            else:
+                svc_id = self.graph.index_of[members[0]]
+                if svc_id in self.graph.hard_dependencies(svc_id):
+                    groups.append(members)
+        return groups
+
+    def reachability(self) -> Optional[ReachabilityIndex]:
+        """
+        Zero-copy ReachabilityIndex over the cached section, if present
+        """
+        if self._matrix is None:
+            return None
+        return ReachabilityIndex(self.graph.names[:len(self.graph)], self.component_of,
+                                 self._matrix, self._reachability_width, self.fingerprint)
+
+def load_snapshot(path: str) -> GraphSnapshot:
+    return GraphSnapshot(path)
+
+def _int_array(typecode: str, values) -> array:
+    if isinstance(values, array) and values.typecode == typecode:
+        return values
+    return array(typecode, values)
+
+def _align(position: int) -> int:
+    return (position + 7) & ~7
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Build or inspect graph snapshots")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Write a snapshot from catalog files")
+    build.add_argument("output")
+    build.add_argument("catalogs", nargs="+")
+    build.add_argument("--reachability", action="store_true",
+                       help="Also cache the transitive closure")
+    info = commands.add_parser("info", help="Summarize a snapshot")
+    info.add_argument("snapshot")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        from src.catalog_loader import load_catalog
+        graph, issues = load_catalog(args.catalogs)
+        for issue in issues:
+            print(f"warning: {issue}", file=sys.stderr)
+        write_snapshot(graph, args.output, include_reachability=args.reachability)
+        print(f"Wrote {len(graph)} services to {args.output}")
+        return 0
+
+    start = time.perf_counter()
+    snapshot = load_snapshot(args.snapshot)
+    loaded = time.perf_counter() - start
+    graph = snapshot.graph
+    print(f"{args.snapshot}: {len(graph)} services, {len(graph.hard_targets)} HARD "
+          f"and {len(graph.soft_targets)} SOFT edges, loaded in {loaded * 1000:.1f} ms")
+    print(f"Cycle groups: {snapshot.cycle_groups()}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
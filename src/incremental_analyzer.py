@@ -0,0 +1,361 @@
+"""
+Incrementally maintain cycles and layer violations as edges change
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Mapping, Set, Tuple
+
+from src.dependency_analyzer import (
+    DependencyType, Service, strongly_connected_components,
+)
+from src.reachability import ReachabilityIndex
+
+@dataclass
+class ChangeReport:
+    """
+    Cycles and layer violations introduced or resolved by one edge change
+    """
+    new_cycles: List[List[str]] = field(default_factory=list)
+    resolved_cycles: List[List[str]] = field(default_factory=list)
+    new_violations: List[str] = field(default_factory=list)
+    resolved_violations: List[str] = field(default_factory=list)
+
+    def merge(self, other: "ChangeReport") -> "ChangeReport":
+        """
+        Combine two consecutive reports, cancelling changes that undo each other
+        """
+        def combine(added_a, removed_a, added_b, removed_b):
+            added = [x for x in added_a if x not in removed_b]
+            removed = [x for x in removed_a if x not in added_b]
+            added += [x for x in added_b if x not in removed_a]
+            removed += [x for x in removed_b if x not in added_a]
+            return added, removed
+
+        cycles = combine(self.new_cycles, self.resolved_cycles,
+                         other.new_cycles, other.resolved_cycles)
+        violations = combine(self.new_violations, self.resolved_violations,
+                             other.new_violations, other.resolved_violations)
+        return ChangeReport(cycles[0], cycles[1], violations[0], violations[1])
+
+class IncrementalAnalyzer:
+    """
+    Stateful cycle and layering checker for single-edge changes
+
+    HARD edges are kept as a condensation DAG of strongly connected
+    components in a dynamic topological order (Pearce-Kelly). An edge that
+    agrees with the order costs O(1); one that does not only searches the
+    components whose order lies between its endpoints. Removing an edge
+    inside a cycle only re-runs SCC detection on that cycle's members.
+    """
+
+    def __init__(self, services: Mapping[str, Service]):
+        self.layers: Dict[str, int] = {}
+        self.dependencies: Dict[str, Dict[str, DependencyType]] = {}
+        for name, service in services.items():
+            self.layers[name] = service.layer
+            self.dependencies[name] = dict(service.dependencies)
+        self._index = {name: i for i, name in enumerate(self.layers)}
+
+        # Reverse HARD edges between known services
+        self._dependents: Dict[str, Set[str]] = {name: set() for name in self.layers}
+        for name, deps in self.dependencies.items():
+            for dep_name in self._hard_deps(name):
+                self._dependents[dep_name].add(name)
+
+        # Components, their order keys and HARD edge counts between them.
+        # Keys are tuples so a split component can take keys between its
+        # old key and the next one without renumbering the rest.
+        self._component_of: Dict[str, int] = {}
+        self._members: Dict[int, Set[str]] = {}
+        self._order: Dict[int, Tuple[int, ...]] = {}
+        self._out: Dict[int, Dict[int, int]] = {}
+        self._in: Dict[int, Dict[int, int]] = {}
+        self._next_component = 0
+
+        # Tarjan emits dependencies first; dependents get the lower keys
+        components = strongly_connected_components(services)
+        for position, members in enumerate(reversed(components)):
+            self._new_component(set(members), (position,))
+        for name in self.layers:
+            for dep_name in self._hard_deps(name):
+                self._link(self._component_of[name], self._component_of[dep_name], 1)
+
+        self._violations: Dict[Tuple[str, str], str] = {}
+        for name in self.layers:
+            for dep_name in self._hard_deps(name):
+                self._check_violation(name, dep_name)
+
+        # Built on demand and dropped whenever a HARD edge changes
+        self._reachability = None
+
+    def cycle_groups(self) -> List[List[str]]:
+        """
+        Current groups of services that are mutually reachable over HARD edges
+        """
+        return [group for group in map(self._cycle_of, self._members)
+                if group is not None]
+
+    def violations(self) -> List[str]:
+        """
+        Current layer violations, formatted like validate_layering
+        """
+        return list(self._violations.values())
+
+    def to_services(self) -> Dict[str, Service]:
+        """
+        Current state as a Dict[str, Service]
+        """
+        return {name: Service(name, self.layers[name], dict(deps))
+                for name, deps in self.dependencies.items()}
+
+    def reachability(self) -> ReachabilityIndex:
+        """
+        Reachability index for the current graph, rebuilt after HARD edge changes
+        """
+        if self._reachability is None:
+            self._reachability = ReachabilityIndex.build(self.to_services())
+        return self._reachability
+
+    def add_edge(self, service_name: str, dep_name: str,
+                 dep_type: DependencyType = DependencyType.HARD) -> ChangeReport:
+        """
+        Add a dependency and report the cycles and violations it introduces
+        """
+        deps = self.dependencies[service_name]
+        if dep_name in deps:
+            raise ValueError(f"{service_name} already depends on {dep_name}")
+        deps[dep_name] = dep_type
+
+        report = ChangeReport()
+        if dep_type != DependencyType.HARD or dep_name not in self.layers:
+            return report
+
+        self._reachability = None
+        self._dependents[dep_name].add(service_name)
+        violation = self._check_violation(service_name, dep_name)
+        if violation:
+            report.new_violations.append(violation)
+
+        source = self._component_of[service_name]
+        target = self._component_of[dep_name]
+        if source == target:
+            if service_name == dep_name and len(self._members[source]) == 1:
+                report.new_cycles.append([service_name])
+            self._link(source, target, 1)
+            return report
+
+        self._link(source, target, 1)
+        if self._order[source] < self._order[target]:
+            return report
+
+        merged, absorbed = self._reorder(source, target)
+        if merged is not None:
+            report.new_cycles.append(self._cycle_of(merged))
+            report.resolved_cycles.extend(absorbed)
+        return report
+
+    def remove_edge(self, service_name: str, dep_name: str) -> ChangeReport:
+        """
+        Remove a dependency and report the cycles and violations it resolves
+        """
+        dep_type = self.dependencies[service_name].pop(dep_name)
+
+        report = ChangeReport()
+        if dep_type != DependencyType.HARD or dep_name not in self.layers:
+            return report
+
+        self._reachability = None
+        self._dependents[dep_name].discard(service_name)
+        violation = self._violations.pop((service_name, dep_name), None)
+        if violation:
+            report.resolved_violations.append(violation)
+
+        source = self._component_of[service_name]
+        target = self._component_of[dep_name]
+        old_cycle = self._cycle_of(source) if source == target else None
+        self._link(source, target, -1)
+        if source != target:
+            return report
+
+        new_components = self._split(source)
+        report.resolved_cycles.append(old_cycle)
+        for component in new_components:
+            cycle = self._cycle_of(component)
+            if cycle is not None:
+                report.new_cycles.append(cycle)
+
+        # Removing an edge inside a bigger cycle may leave it intact
+        if report.new_cycles == report.resolved_cycles:
+            report.new_cycles, report.resolved_cycles = [], []
+        return report
+
+    def retype_edge(self, service_name: str, dep_name: str,
+                    dep_type: DependencyType) -> ChangeReport:
+        """
+        Change the type of an existing dependency
+        """
+        if self.dependencies[service_name][dep_name] == dep_type:
+            return ChangeReport()
+        removed = self.remove_edge(service_name, dep_name)
+        return removed.merge(self.add_edge(service_name, dep_name, dep_type))
+
+    def _hard_deps(self, name: str) -> List[str]:
+        return [dep_name for dep_name, dep_type in self.dependencies[name].items()
+                if dep_type == DependencyType.HARD and dep_name in self.layers]
+
+    def _check_violation(self, service_name: str, dep_name: str) -> str:
+        layer, dep_layer = self.layers[service_name], self.layers[dep_name]
+        if dep_layer < layer:
+            return ""
+        violation = (
+            f"{service_name} (L{layer}) depends on "
+            f"{dep_name} (L{dep_layer})"
+        )
+        self._violations[(service_name, dep_name)] = violation
+        return violation
+
+    def _cycle_of(self, component: int):
+        members = self._members[component]
+        if len(members) == 1 and self._out[component].get(component, 0) == 0:
+            return None
+        return sorted(members, key=self._position)
+
+    def _position(self, name: str) -> int:
+        return self._index[name]
+
+    def _new_component(self, members: Set[str], order: Tuple[int, ...]) -> int:
+        component = self._next_component
+        self._next_component += 1
+        self._members[component] = members
+        self._order[component] = order
+        self._out[component] = {}
+        self._in[component] = {}
+        for name in members:
+            self._component_of[name] = component
+        return component
+
+    def _drop_component(self, component: int) -> None:
+        for neighbour in self._out.pop(component):
+            if neighbour != component:
+                del self._in[neighbour][component]
+        for neighbour in self._in.pop(component):
+            if neighbour != component:
+                del self._out[neighbour][component]
+        del self._members[component]
+        del self._order[component]
+
+    def _link(self, source: int, target: int, delta: int) -> None:
+        count = self._out[source].get(target, 0) + delta
+        if count:
+            self._out[source][target] = count
+            self._in[target][source] = count
+        else:
+            del self._out[source][target]
+            del self._in[target][source]
+
+    def _reorder(self, source: int, target: int):
+        """
+        Pearce-Kelly reorder after adding source -> target against the order
+
+        Returns the merged component if the edge closed a cycle, and the
+        cycles it absorbed
+        """
+        upper, lower = self._order[source], self._order[target]
+
+        forward = self._search(target, self._out, lambda c: self._order[c] <= upper)
+        backward = self._search(source, self._in, lambda c: self._order[c] >= lower)
+
+        keys = sorted(self._order[c] for c in forward | backward)
+        cycle = forward & backward if source in forward else set()
+
+        merged, absorbed = None, []
+        if cycle:
+            absorbed = [group for group in map(self._cycle_of, cycle)
+                        if group is not None]
+            members = set().union(*(self._members[c] for c in cycle))
+            edges_out: Dict[int, int] = {}
+            edges_in: Dict[int, int] = {}
+            for component in cycle:
+                for neighbour, count in self._out[component].items():
+                    key = -1 if neighbour in cycle else neighbour
+                    edges_out[key] = edges_out.get(key, 0) + count
+                for neighbour, count in self._in[component].items():
+                    if neighbour not in cycle:
+                        edges_in[neighbour] = edges_in.get(neighbour, 0) + count
+            for component in cycle:
+                self._drop_component(component)
+
+            merged = self._new_component(members, keys[0])
+            for neighbour, count in edges_out.items():
+                self._link(merged, merged if neighbour == -1 else neighbour, count)
+            for neighbour, count in edges_in.items():
+                self._link(neighbour, merged, count)
+
+        # Backward components take the lowest keys and forward ones the
+        # highest, so neither moves past a component outside the region
+        by_order = lambda c: self._order[c]
+        before = sorted(backward - cycle, key=by_order)
+        after = sorted(forward - cycle, key=by_order)
+        for component, key in zip(before, keys):
+            self._order[component] = key
+        if merged is not None:
+            self._order[merged] = keys[len(before)]
+        for component, key in zip(after, keys[len(keys) - len(after):]):
+            self._order[component] = key
+        return merged, absorbed
+
+    def _search(self, start: int, edges: Dict[int, Dict[int, int]], within) -> Set[int]:
+        seen = {start}
+        stack = [start]
+        while stack:
+            component = stack.pop()
+            for neighbour in edges[component]:
+                if neighbour not in seen and within(neighbour):
+                    seen.add(neighbour)
+                    stack.append(neighbour)
+        return seen
+
+    def _split(self, component: int) -> List[int]:
+        """
+        Recompute SCCs inside one component after an internal edge removal
+        """
+        members = self._members[component]
+        base = self._order[component]
+        local = {
+            name: Service(name, self.layers[name], {
+                dep_name: DependencyType.HARD
+                for dep_name in self._hard_deps(name) if dep_name in members
+            })
+            for name in sorted(members, key=self._position)
+        }
+        parts = strongly_connected_components(local)
+
+        outside_out: Dict[str, Dict[int, int]] = {}
+        outside_in: Dict[str, Dict[int, int]] = {}
+        for name in members:
+            for dep_name in self._hard_deps(name):
+                if dep_name not in members:
+                    target = self._component_of[dep_name]
+                    outside_out.setdefault(name, {})
+                    outside_out[name][target] = outside_out[name].get(target, 0) + 1
+            for dependent in self._dependents[name]:
+                if dependent not in members:
+                    source = self._component_of[dependent]
+                    outside_in.setdefault(name, {})
+                    outside_in[name][source] = outside_in[name].get(source, 0) + 1
+        self._drop_component(component)
+
+        new_components = [
+            self._new_component(set(part), base + (position,))
+            for position, part in enumerate(reversed(parts))
+        ]
+        for name in members:
+            source = self._component_of[name]
+            for dep_name in self._hard_deps(name):
+                if dep_name in members:
+                    self._link(source, self._component_of[dep_name], 1)
+            for target, count in outside_out.get(name, {}).items():
+                self._link(source, target, count)
+            for origin, count in outside_in.get(name, {}).items():
+                self._link(origin, source, count)
+        return new_components
@@ -0,0 +1,282 @@
+"""
+Opt-in counters, phase timers and trace spans for the analyzers
+"""
+
+import functools
+import json
+import os
+import re
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+# The recorder hooks report to; None means instrumentation is off and
+# every hook returns after a single global lookup
+_active: Optional["Recorder"] = None
+
+class Span:
+    """
+    One timed phase, exported as an OpenTelemetry span
+    """
+    __slots__ = ("recorder", "name", "span_id", "parent_id", "start_unix_ns",
+                 "start_ns", "end_ns", "attributes", "events", "peak", "memory_start")
+
+    def __init__(self, recorder: "Recorder", name: str, attributes: dict):
+        self.recorder = recorder
+        self.name = name
+        self.span_id = ""
+        self.parent_id = ""
+        self.start_unix_ns = self.start_ns = self.end_ns = 0
+        self.attributes = attributes
+        self.events: List[dict] = []
+        self.peak = self.memory_start = 0
+
+    def set_attribute(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def add_event(self, name: str, **attributes) -> None:
+        self.events.append({"name": name, "time_unix_ns": time.time_ns(),
+                            "attributes": attributes})
+
+    @property
+    def duration(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e9
+
+    def __enter__(self) -> "Span":
+        self.recorder._start(self)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.recorder._finish(self)
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value) -> None:
+        pass
+
+    def add_event(self, name: str, **attributes) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+_NOOP_SPAN = _NoopSpan()
+
+class Recorder:
+    """
+    Collects counters and spans while it is the active recorder
+
+    Each span name is also a phase: total wall time, call count and, with
+    track_memory, the peak bytes allocated during the phase (tracemalloc,
+    which slows the traced code noticeably).
+    """
+
+    def __init__(self, track_memory: bool = False, service_name: str = "layer-cake-analyzer"):
+        self.track_memory = track_memory
+        self.service_name = service_name
+        self.trace_id = os.urandom(16).hex()
+        self.counters: Dict[str, float] = {}
+        self.phase_seconds: Dict[str, float] = {}
+        self.phase_calls: Dict[str, int] = {}
+        self.phase_peak_bytes: Dict[str, int] = {}
+        self.spans: List[Span] = []
+        self._stack: List[Span] = []
+        self._next_id = 1
+        self._started_tracemalloc = False
+
+    def count(self, name: str, value: float = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def span(self, name: str, **attributes) -> Span:
+        return Span(self, name, attributes)
+
+    def current_span(self) -> Optional[Span]:
+        return self._stack[-1] if self._stack else None
+
+    def _start(self, span: Span) -> None:
+        span.span_id = f"{self._next_id:016x}"
+        self._next_id += 1
+        if self._stack:
+            span.parent_id = self._stack[-1].span_id
+        if self.track_memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            # The parent's peak so far, before this span resets it
+            if self._stack:
+                self._stack[-1].peak = max(self._stack[-1].peak, peak)
+            tracemalloc.reset_peak()
+            span.memory_start = current
+        self._stack.append(span)
+        span.start_unix_ns = time.time_ns()
+        span.start_ns = time.perf_counter_ns()
+
+    def _finish(self, span: Span) -> None:
+        span.end_ns = time.perf_counter_ns()
+        self._stack.pop()
+        name = span.name
+        self.phase_seconds[name] = self.phase_seconds.get(name, 0.0) + span.duration
+        self.phase_calls[name] = self.phase_calls.get(name, 0) + 1
+        if self.track_memory and tracemalloc.is_tracing():
+            span.peak = max(span.peak, tracemalloc.get_traced_memory()[1])
+            allocated = span.peak - span.memory_start
+            span.attributes["memory.peak_bytes"] = allocated
+            self.phase_peak_bytes[name] = max(self.phase_peak_bytes.get(name, 0), allocated)
+            if self._stack:
+                self._stack[-1].peak = max(self._stack[-1].peak, span.peak)
+        self.spans.append(span)
+
+    def to_prometheus(self, prefix: str = "layer_cake") -> str:
+        """
+        Counters and phase timings in the Prometheus text exposition format
+        """
+        lines = []
+        for name in sorted(self.counters):
+            metric = f"{prefix}_{_metric_name(name)}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {_number(self.counters[name])}")
+
+        for metric, kind, values in (
+            ("phase_seconds_total", "counter", self.phase_seconds),
+            ("phase_calls_total", "counter", self.phase_calls),
+            ("phase_peak_allocated_bytes", "gauge", self.phase_peak_bytes),
+        ):
+            if not values:
+                continue
+            lines.append(f"# TYPE {prefix}_{metric} {kind}")
+            for phase in sorted(values):
+                label = phase.replace("\\", "\\\\").replace('"', '\\"')
+                lines.append(f'{prefix}_{metric}{{phase="{label}"}} {_number(values[phase])}')
+        return "\n".join(lines) + "\n"
+
+    def to_otel(self) -> dict:
+        """
+        Finished spans in the OTLP/JSON trace layout
+        """
+        spans = []
+        for span in self.spans:
+            spans.append({
+                "traceId": self.trace_id,
+                "spanId": span.span_id,
+                "parentSpanId": span.parent_id,
+                "name": span.name,
+                "kind": 1,
+                "startTimeUnixNano": str(span.start_unix_ns),
+                "endTimeUnixNano": str(span.start_unix_ns + span.end_ns - span.start_ns),
+                "attributes": _otel_attributes(span.attributes),
+                "events": [
+                    {"timeUnixNano": str(event["time_unix_ns"]), "name": event["name"],
+                     "attributes": _otel_attributes(event["attributes"])}
+                    for event in span.events
+                ],
+            })
+        return {"resourceSpans": [{
+            "resource": {"attributes": _otel_attributes({"service.name": self.service_name})},
+            "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}],
+        }]}
+
+    def write_prometheus(self, path: str) -> None:
+        with open(path, "w") as f:
+            f.write(self.to_prometheus())
+
+    def write_spans(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.to_otel(), f, indent=2)
+
+def enable(track_memory: bool = False) -> Recorder:
+    """
+    Start recording into a new Recorder and return it
+    """
+    global _active
+    recorder = Recorder(track_memory=track_memory)
+    if track_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        recorder._started_tracemalloc = True
+    _active = recorder
+    return recorder
+
+def disable() -> Optional[Recorder]:
+    """
+    Stop recording and return the recorder that was active
+    """
+    global _active
+    recorder, _active = _active, None
+    if recorder is not None and recorder._started_tracemalloc:
+        tracemalloc.stop()
+    return recorder
+
+@contextmanager
+def recording(track_memory: bool = False) -> Iterator[Recorder]:
+    """
+    Record everything run inside the block
+
+        with recording() as recorder:
+            validate_layering(services)
+        recorder.write_prometheus("analysis.prom")
+    """
+    recorder = enable(track_memory)
+    try:
+        yield recorder
+    finally:
+        if _active is recorder:
+            disable()
+
+def span(name: str, **attributes):
+    """
+    Context manager timing a phase; a shared no-op when disabled
+    """
+    recorder = _active
+    if recorder is None:
+        return _NOOP_SPAN
+    return recorder.span(name, **attributes)
+
+def count(name: str, value: float = 1) -> None:
+    recorder = _active
+    if recorder is not None:
+        recorder.count(name, value)
+
+def event(name: str, **attributes) -> None:
+    """
+    Attach a progress event to the innermost open span
+    """
+    recorder = _active
+    if recorder is not None and recorder._stack:
+        recorder._stack[-1].add_event(name, **attributes)
+
+def traced(name: str):
+    """
+    Decorator running the function inside span(name) when recording
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            recorder = _active
+            if recorder is None:
+                return func(*args, **kwargs)
+            with recorder.span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def _metric_name(name: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+def _number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def _otel_attributes(attributes: dict) -> List[dict]:
+    encoded = []
+    for key, value in attributes.items():
+        if isinstance(value, bool):
+            encoded_value = {"boolValue": value}
+        elif isinstance(value, int):
+            encoded_value = {"intValue": str(value)}
+        elif isinstance(value, float):
+            encoded_value = {"doubleValue": value}
+        else:
+            encoded_value = {"stringValue": str(value)}
+        encoded.append({"key": key, "value": encoded_value})
+    return encoded
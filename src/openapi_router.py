@@ -0,0 +1,443 @@
+"""
+OpenAPI 3 routing and validation compiled once from the spec: a path
+trie for routing and closures for parameter and schema checks
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import hashlib
+import json
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+# Bump when the artifact layout changes so cached artifacts are not reused
+COMPILER_VERSION = "1"
+
+HTTP_METHODS = ("get", "put", "post", "delete", "options", "head", "patch", "trace")
+
+_INT_RANGES = {"int32": (-2**31, 2**31 - 1), "int64": (-2**63, 2**63 - 1)}
+
+# check(value, where, errors) appends messages for each problem found
+Check = Callable[[Any, str, List[str]], None]
+
+class ValidationError(ValueError):
+    def __init__(self, errors: List[str]):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+def compile_spec(spec: Mapping) -> dict:
+    """
+    Reduce a parsed spec to a JSON-serializable artifact: operations with
+    their path segments, parameters and response schemas, plus the named
+    schemas they refer to
+    """
+    operations = []
+    for path, item in (spec.get("paths") or {}).items():
+        shared = item.get("parameters", [])
+        for method in HTTP_METHODS:
+            operation = item.get(method)
+            if operation is None:
+                continue
+            parameters = {}
+            for parameter in shared + operation.get("parameters", []):
+                parameter = _resolve(spec, parameter)
+                parameters[(parameter["in"], parameter["name"])] = {
+                    "name": parameter["name"],
+                    "in": parameter["in"],
+                    "required": bool(parameter.get("required", parameter["in"] == "path")),
+                    "schema": parameter.get("schema", {}),
+                }
+            request_schema = None
+            body = _resolve(spec, operation.get("requestBody") or {})
+            if body:
+                request_schema = (body.get("content", {}).get("application/json") or {}).get("schema")
+            responses = {}
+            for status, response in (operation.get("responses") or {}).items():
+                response = _resolve(spec, response)
+                content = (response.get("content") or {}).get("application/json") or {}
+                responses[str(status)] = {
+                    "schema": content.get("schema"),
+                    "headers": sorted(response.get("headers") or {}),
+                }
+            operations.append({
+                "id": operation.get("operationId") or f"{method} {path}",
+                "method": method.upper(),
+                "path": path,
+                "segments": _segments(path),
+                "parameters": list(parameters.values()),
+                "request_schema": request_schema,
+                "request_required": bool(body.get("required")),
+                "responses": responses,
+            })
+    return {
+        "version": COMPILER_VERSION,
+        "title": (spec.get("info") or {}).get("title"),
+        "schemas": dict((spec.get("components") or {}).get("schemas") or {}),
+        "operations": operations,
+    }
+
+def load_artifact(spec_path: str, cache_dir: Optional[str] = None) -> dict:
+    """
+    Compile a YAML or JSON spec, reusing a cached artifact for identical
+    spec content
+    """
+    with open(spec_path, "rb") as f:
+        content = f.read()
+    digest = hashlib.sha256(COMPILER_VERSION.encode() + b"\0" + content).hexdigest()
+
+    cache_path = None
+    if cache_dir:
+        cache_path = os.path.join(cache_dir, f"{digest}.json")
+        try:
+            with open(cache_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    if spec_path.endswith(".json"):
+        spec = json.loads(content)
+    else:
+        import yaml
+        Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+        spec = yaml.load(content, Loader=Loader)
+    artifact = compile_spec(spec)
+    artifact["spec_sha256"] = digest
+    if cache_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(artifact, f)
+        os.replace(tmp_path, cache_path)
+    return artifact
+
+def _resolve(spec: Mapping, node: Mapping) -> Mapping:
+    # Follow local $refs outside schemas (parameters, responses, bodies)
+    while isinstance(node, Mapping) and "$ref" in node:
+        target: Any = spec
+        for part in node["$ref"].lstrip("#/").split("/"):
+            target = target[part]
+        node = target
+    return node
+
+def _segments(path: str) -> List[str]:
+    return [segment for segment in path.split("/") if segment]
+
+def compile_schemas(schemas: Mapping[str, Mapping]) -> Dict[str, Check]:
+    """
+    A check per named schema; $refs between them resolve by name at call time
+    """
+    named: Dict[str, Check] = {}
+    for name, schema in schemas.items():
+        named[name] = compile_schema(schema, named)
+    return named
+
+def compile_schema(schema: Optional[Mapping], named: Dict[str, Check]) -> Check:
+    """
+    Compile the JSON Schema subset OpenAPI 3.0 uses: type (with integer
+    formats), enum, nullable, required, properties, additionalProperties,
+    items and length/size bounds
+    """
+    if not schema:
+        return _accept
+    if "$ref" in schema:
+        name = schema["$ref"].rsplit("/", 1)[-1]
+        return lambda value, where, errors: named[name](value, where, errors)
+
+    checks: List[Check] = []
+    kind = schema.get("type")
+    if kind == "integer":
+        low, high = _INT_RANGES.get(schema.get("format"), (None, None))
+        checks.append(_type_check(int, "an integer", exclude_bool=True))
+        if low is not None:
+            checks.append(_range_check(low, high, schema.get("format")))
+    elif kind == "number":
+        checks.append(_type_check((int, float), "a number", exclude_bool=True))
+    elif kind == "string":
+        checks.append(_type_check(str, "a string"))
+    elif kind == "boolean":
+        checks.append(_type_check(bool, "a boolean"))
+    elif kind == "array":
+        checks.append(_type_check(list, "an array"))
+    elif kind == "object":
+        checks.append(_type_check(dict, "an object"))
+
+    if "minimum" in schema or "maximum" in schema:
+        checks.append(_range_check(schema.get("minimum"), schema.get("maximum"), None))
+    if "enum" in schema:
+        allowed = list(schema["enum"])
+        checks.append(lambda v, w, e: v in allowed or e.append(f"{w} must be one of {allowed}"))
+    if "minLength" in schema or "maxLength" in schema:
+        checks.append(_size_check(schema.get("minLength"), schema.get("maxLength"), str, "characters"))
+    if "minItems" in schema or "maxItems" in schema:
+        checks.append(_size_check(schema.get("minItems"), schema.get("maxItems"), list, "items"))
+    if "items" in schema:
+        item_check = compile_schema(schema["items"], named)
+
+        def check_items(value, where, errors):
+            if isinstance(value, list):
+                for i, item in enumerate(value):
+                    item_check(item, f"{where}[{i}]", errors)
+        checks.append(check_items)
+    if "required" in schema or "properties" in schema:
+        checks.append(_object_check(schema, named))
+
+    nullable = bool(schema.get("nullable"))
+
+    def check(value, where, errors):
+        if value is None and nullable:
+            return
+        for part in checks:
+            before = len(errors)
+            part(value, where, errors)
+            # A wrong type makes the remaining checks meaningless
+            if len(errors) > before and part is checks[0] and kind:
+                return
+    return check
+
+def _accept(value, where, errors) -> None:
+    pass
+
+def _type_check(types, label: str, exclude_bool: bool = False) -> Check:
+    def check(value, where, errors):
+        if not isinstance(value, types) or (exclude_bool and isinstance(value, bool)):
+            errors.append(f"{where} must be {label}")
+    return check
+
+def _range_check(low, high, fmt: Optional[str]) -> Check:
+    label = f" ({fmt})" if fmt else ""
+
+    def check(value, where, errors):
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            if (low is not None and value < low) or (high is not None and value > high):
+                errors.append(f"{where} is out of range{label}")
+    return check
+
+def _size_check(low, high, types, unit: str) -> Check:
+    def check(value, where, errors):
+        if isinstance(value, types):
+            if (low is not None and len(value) < low) or (high is not None and len(value) > high):
+                errors.append(f"{where} must have between {low or 0} and {high} {unit}"
+                              if high is not None else f"{where} must have at least {low} {unit}")
+    return check
+
+def _object_check(schema: Mapping, named: Dict[str, Check]) -> Check:
+    required = list(schema.get("required", ()))
+    properties = {name: compile_schema(sub, named)
+                  for name, sub in (schema.get("properties") or {}).items()}
+    additional = schema.get("additionalProperties", True)
+    extra_check = compile_schema(additional, named) if isinstance(additional, dict) else None
+
+    def check(value, where, errors):
+        if not isinstance(value, dict):
+            return
+        for name in required:
+            if name not in value:
+                errors.append(f"{where}.{name} is required")
+        for name, item in value.items():
+            prop = properties.get(name)
+            if prop is not None:
+                prop(item, f"{where}.{name}", errors)
+            elif additional is False:
+                errors.append(f"{where}.{name} is not allowed")
+            elif extra_check is not None:
+                extra_check(item, f"{where}.{name}", errors)
+    return check
+
+@dataclass
+class Parameter:
+    name: str
+    location: str
+    required: bool
+    parse: Callable[[str], Any]
+    check: Check
+
+@dataclass
+class Operation:
+    """
+    A compiled operation: bind() turns raw path, query and header values
+    into typed, validated parameters
+    """
+    id: str
+    method: str
+    path: str
+    parameters: List[Parameter]
+    request_check: Optional[Check] = None
+    request_required: bool = False
+    response_checks: Dict[str, Check] = field(default_factory=dict)
+    response_headers: Dict[str, List[str]] = field(default_factory=dict)
+
+    def bind(self, path_params: Mapping[str, str], query: Mapping[str, List[str]],
+             headers: Optional[Mapping[str, str]] = None) -> Dict[str, Any]:
+        values: Dict[str, Any] = {}
+        errors: List[str] = []
+        for parameter in self.parameters:
+            if parameter.location == "path":
+                raw = path_params.get(parameter.name)
+            elif parameter.location == "query":
+                raw_values = query.get(parameter.name)
+                raw = raw_values[-1] if raw_values else None
+            elif parameter.location == "header" and headers is not None:
+                raw = headers.get(parameter.name.lower())
+            else:
+                continue
+            if raw is None:
+                if parameter.required:
+                    errors.append(f"{parameter.location} parameter {parameter.name} is required")
+                continue
+            try:
+                value = parameter.parse(raw)
+            except ValueError:
+                errors.append(f"{parameter.location} parameter {parameter.name} is malformed")
+                continue
+            parameter.check(value, parameter.name, errors)
+            values[parameter.name] = value
+        if errors:
+            raise ValidationError(errors)
+        return values
+
+    def validate_body(self, body: Any) -> None:
+        if self.request_check is None:
+            return
+        errors: List[str] = []
+        if body is None:
+            if self.request_required:
+                errors.append("request body is required")
+        else:
+            self.request_check(body, "body", errors)
+        if errors:
+            raise ValidationError(errors)
+
+    def validate_response(self, status: int, body: Any) -> None:
+        check = self.response_checks.get(str(status)) or self.response_checks.get("default")
+        if check is None:
+            return
+        errors: List[str] = []
+        check(body, "response", errors)
+        if errors:
+            raise ValidationError(errors)
+
+def _parser(schema: Mapping) -> Callable[[str], Any]:
+    kind = schema.get("type")
+    if kind == "integer":
+        return int
+    if kind == "number":
+        return float
+    if kind == "boolean":
+        return _parse_bool
+    return str
+
+def _parse_bool(raw: str) -> bool:
+    if raw.lower() not in ("true", "false"):
+        raise ValueError(f"not a boolean: {raw}")
+    return raw.lower() == "true"
+
+class _Node:
+    __slots__ = ("static", "param_name", "param", "operations")
+
+    def __init__(self):
+        self.static: Dict[str, "_Node"] = {}
+        self.param_name: Optional[str] = None
+        self.param: Optional["_Node"] = None
+        self.operations: Dict[str, Operation] = {}
+
+class Router:
+    """
+    Path trie over the spec's operations; static segments win over
+    templated ones, as OpenAPI requires
+    """
+    def __init__(self, artifact: Mapping):
+        self.title = artifact.get("title")
+        self.spec_sha256 = artifact.get("spec_sha256")
+        self.schemas = compile_schemas(artifact.get("schemas") or {})
+        self.root = _Node()
+        self.operations: Dict[str, Operation] = {}
+        for spec_op in artifact["operations"]:
+            operation = self._compile_operation(spec_op)
+            node = self.root
+            for segment in spec_op["segments"]:
+                if segment.startswith("{") and segment.endswith("}"):
+                    if node.param is None:
+                        node.param, node.param_name = _Node(), segment[1:-1]
+                    node = node.param
+                else:
+                    node = node.static.setdefault(segment, _Node())
+            node.operations[operation.method] = operation
+            self.operations[operation.id] = operation
+
+    def _compile_operation(self, spec_op: Mapping) -> Operation:
+        parameters = [
+            Parameter(p["name"], p["in"], p["required"], _parser(p["schema"]),
+                      compile_schema(p["schema"], self.schemas))
+            for p in spec_op["parameters"]
+        ]
+        request_check = None
+        if spec_op.get("request_schema"):
+            request_check = compile_schema(spec_op["request_schema"], self.schemas)
+        return Operation(
+            id=spec_op["id"],
+            method=spec_op["method"],
+            path=spec_op["path"],
+            parameters=parameters,
+            request_check=request_check,
+            request_required=spec_op.get("request_required", False),
+            response_checks={status: compile_schema(response["schema"], self.schemas)
+                             for status, response in spec_op["responses"].items()
+                             if response["schema"]},
+            response_headers={status: response["headers"]
+                              for status, response in spec_op["responses"].items()},
+        )
+
+    def match(self, method: str, path: str) -> Tuple[Optional[Operation], Dict[str, str], List[str]]:
+        """
+        (operation, path parameters, allowed methods); the operation is
+        None when nothing matches (no allowed methods: 404) or the path
+        matches but not the method (405)
+        """
+        node = self._walk(self.root, _segments(path), 0, {})
+        if node is None:
+            return None, {}, []
+        found, params = node
+        return found.operations.get(method.upper()), params, sorted(found.operations)
+
+    def _walk(self, node: _Node, segments: List[str], i: int,
+              params: Dict[str, str]) -> Optional[Tuple[_Node, Dict[str, str]]]:
+        while i < len(segments):
+            child = node.static.get(segments[i])
+            if child is None:
+                break
+            if node.param is not None:
+                # Static first, but fall back to the templated branch
+                found = self._walk(child, segments, i + 1, params)
+                if found is not None:
+                    return found
+                break
+            node, i = child, i + 1
+        if i == len(segments):
+            return (node, params) if node.operations else None
+        if node.param is None:
+            return None
+        params = dict(params)
+        params[node.param_name] = segments[i]
+        return self._walk(node.param, segments, i + 1, params)
+
+def load_router(spec_path: str, cache_dir: Optional[str] = None) -> Router:
+    return Router(load_artifact(spec_path, cache_dir))
+
+# Example usage
+if __name__ == "__main__":
+    router = load_router(os.path.join(os.path.dirname(__file__), "..", "petstore.yaml"))
+    for method, path in [("GET", "/pets"), ("GET", "/pets/42"), ("DELETE", "/pets/42"), ("GET", "/owners")]:
+        operation, params, allowed = router.match(method, path)
+        print(f"{method} {path}: {operation.id if operation else None} {params} allowed={allowed}")
+
+    list_pets = router.operations["listPets"]
+    print(f"listPets limit=20: {list_pets.bind({}, {'limit': ['20']})}")
+    for limit in ("abc", str(2**31)):
+        try:
+            list_pets.bind({}, {"limit": [limit]})
+        except ValidationError as e:
+            print(f"listPets limit={limit}: {e}")
+    errors: List[str] = []
+    router.schemas["Pet"]({"id": "7", "tag": 3}, "pet", errors)
+    print(f"Pet errors: {errors}")
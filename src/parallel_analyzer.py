@@ -0,0 +1,376 @@
+"""
+Component-partitioned parallel analysis over shared-memory graph arrays
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from src.dependency_analyzer import (
+    Service, ServiceGraph, DependencyType, LayerAssignment,
+    _cycle_group_ids, assign_layers, find_cycle_groups, validate_layering,
+)
+
+@dataclass
+class ParallelAnalysis:
+    """
+    Cycle groups, layer violations and layer assignment of one graph
+
+    violations and the assignment match validate_layering and
+    assign_layers exactly; cycle groups are the same sets, ordered by
+    their first member in catalog order.
+    """
+    cycles: List[List[str]]
+    violations: List[str]
+    assignment: LayerAssignment
+    components: int = 0
+    tasks: int = 0
+
+def weakly_connected_components(graph: ServiceGraph) -> Tuple[array, int]:
+    """
+    Label each service with its weakly connected component over HARD
+    edges between known services
+
+    Union-find with path halving; labels are numbered in order of each
+    component's first service.
+    """
+    n = len(graph)
+    parent = array("i", range(n))
+    offsets, targets = graph.hard_offsets, graph.hard_targets
+
+    def find(x: int) -> int:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for svc_id in range(n):
+        for pos in range(offsets[svc_id], offsets[svc_id + 1]):
+            dep_id = targets[pos]
+            if dep_id < n:
+                a, b = find(svc_id), find(dep_id)
+                if a != b:
+                    # Keep the smaller id as root so labels are stable
+                    if a < b:
+                        parent[b] = a
+                    else:
+                        parent[a] = b
+
+    labels = array("i", bytes(4 * n))
+    label_of_root = {}
+    for svc_id in range(n):
+        root = find(svc_id)
+        label = label_of_root.get(root)
+        if label is None:
+            label = label_of_root[root] = len(label_of_root)
+        labels[svc_id] = label
+    return labels, len(label_of_root)
+
+def analyze_parallel(services: Mapping[str, Service], workers: Optional[int] = None,
+                     pinned: Optional[Mapping[str, int]] = None, base_layer: int = 2,
+                     tasks_per_worker: int = 4) -> ParallelAnalysis:
+    """
+    Find cycles, layer violations and layer assignment across processes
+
+    HARD edges never cross weakly connected components, so cycle detection
+    and layer assignment run per group of components. Violation scanning
+    runs per slice of services ordered by layer. The graph arrays are
+    copied once into a shared memory block that workers map, so only
+    slice bounds and id lists cross process boundaries.
+    """
+    graph = ServiceGraph.from_services(services)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or len(graph) == 0:
+        cycles = find_cycle_groups(graph)
+        return ParallelAnalysis(cycles, validate_layering(graph),
+                                assign_layers(graph, pinned, base_layer), tasks=1)
+
+    n = len(graph)
+    labels, component_count = weakly_connected_components(graph)
+    component_order = _counting_sort(labels, component_count, n)
+    layer_order = _layer_order(graph)
+
+    task_count = workers * tasks_per_worker
+    component_tasks = _balanced_slices(graph, component_order, task_count,
+                                       boundary=lambda i: labels[component_order[i]])
+    layer_tasks = _balanced_slices(graph, layer_order, task_count)
+
+    block = _SharedGraph.create(graph, component_order, layer_order)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            component_futures = [
+                pool.submit(_analyze_components, block.spec, start, end, pinned, base_layer)
+                for start, end in component_tasks
+            ]
+            layer_futures = [
+                pool.submit(_scan_layer_slice, block.spec, start, end)
+                for start, end in layer_tasks
+            ]
+            component_results = [future.result() for future in component_futures]
+            layer_results = [future.result() for future in layer_futures]
+    finally:
+        block.close()
+
+    return _merge(graph, component_results, layer_results, component_count,
+                  len(component_tasks) + len(layer_tasks))
+
+class _SharedGraph:
+    """
+    One shared memory block holding the arrays the workers need
+
+    Sections: name bytes, name offsets (q), layers (i), hard offsets (q),
+    hard targets (i), component order (i), layer order (i).
+    """
+    _LAYOUT = ("names", "name_offsets", "layers", "hard_offsets", "hard_targets",
+               "component_order", "layer_order")
+    _TYPECODES = {"names": "B", "name_offsets": "q", "layers": "i", "hard_offsets": "q",
+                  "hard_targets": "i", "component_order": "i", "layer_order": "i"}
+
+    def __init__(self, shm: shared_memory.SharedMemory, spec: tuple):
+        self.shm = shm
+        self.spec = spec
+
+    @classmethod
+    def create(cls, graph: ServiceGraph, component_order: array,
+               layer_order: array) -> "_SharedGraph":
+        encoded = [name.encode("utf-8") for name in graph.names]
+        name_offsets = array("q", [0])
+        for name in encoded:
+            name_offsets.append(name_offsets[-1] + len(name))
+        data = {
+            "names": b"".join(encoded),
+            "name_offsets": name_offsets.tobytes(),
+            "layers": array("i", graph.layers).tobytes(),
+            "hard_offsets": array("q", graph.hard_offsets).tobytes(),
+            "hard_targets": array("i", graph.hard_targets).tobytes(),
+            "component_order": component_order.tobytes(),
+            "layer_order": layer_order.tobytes(),
+        }
+
+        sections = []
+        position = 0
+        for key in cls._LAYOUT:
+            sections.append((position, len(data[key])))
+            position = (position + len(data[key]) + 7) & ~7
+        shm = shared_memory.SharedMemory(create=True, size=max(position, 8))
+        for key, (offset, size) in zip(cls._LAYOUT, sections):
+            shm.buf[offset:offset + size] = data[key]
+        return cls(shm, (shm.name, len(graph), tuple(sections)))
+
+    def close(self) -> None:
+        self.shm.close()
+        self.shm.unlink()
+
+# Per-worker-process attachments, keyed by block name
+_attached: Dict[str, Tuple[shared_memory.SharedMemory, dict]] = {}
+
+def _attach(spec: tuple) -> Tuple[dict, int]:
+    name, n, sections = spec
+    if name not in _attached:
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Before Python 3.13 attaching always registers with the tracker
+            shm = shared_memory.SharedMemory(name=name)
+        views = {}
+        for key, (offset, size) in zip(_SharedGraph._LAYOUT, sections):
+            views[key] = shm.buf[offset:offset + size].cast(_SharedGraph._TYPECODES[key])
+        # A new block means the previous analysis is over
+        for stale in list(_attached):
+            del _attached[stale]
+        _attached[name] = (shm, views)
+    return _attached[name][1], n
+
+def _analyze_components(spec: tuple, start: int, end: int,
+                        pinned: Optional[Mapping[str, int]], base_layer: int) -> dict:
+    """
+    Cycle groups and layer assignment for component_order[start:end]
+
+    The slice holds whole components, so every HARD edge between known
+    services stays inside it. It is copied into a small local ServiceGraph
+    and handed to the serial functions.
+    """
+    views, n = _attach(spec)
+    names, name_offsets = views["names"], views["name_offsets"]
+    layers, offsets, targets = views["layers"], views["hard_offsets"], views["hard_targets"]
+    global_ids = list(views["component_order"][start:end])
+
+    def name_of(svc_id: int) -> str:
+        return str(names[name_offsets[svc_id]:name_offsets[svc_id + 1]], "utf-8")
+
+    local_of = {svc_id: i for i, svc_id in enumerate(global_ids)}
+    local_names = [name_of(svc_id) for svc_id in global_ids]
+    externals = []
+    local_offsets, local_targets = array("q", [0]), array("i")
+    for svc_id in global_ids:
+        for pos in range(offsets[svc_id], offsets[svc_id + 1]):
+            dep_id = targets[pos]
+            local = local_of.get(dep_id)
+            if local is None:
+                # External dependency: give it a local external id
+                local = local_of[dep_id] = len(global_ids) + len(externals)
+                externals.append(dep_id)
+                local_names.append(name_of(dep_id))
+            local_targets.append(local)
+        local_offsets.append(len(local_targets))
+
+    local = ServiceGraph(local_names, array("i", (layers[i] for i in global_ids)),
+                         local_offsets, local_targets,
+                         array("q", bytes(8 * (len(global_ids) + 1))), array("i"))
+    local_pinned = None
+    if pinned:
+        local_pinned = {name: pinned[name] for name in local_names[:len(global_ids)]
+                        if name in pinned}
+    assignment = assign_layers(local, local_pinned, base_layer)
+
+    index_of = local.index_of
+    return {
+        "cycles": [[global_ids[i] for i in group] for group in _cycle_group_ids(local)],
+        "layers": [(global_ids[index_of[name]], layer)
+                   for name, layer in assignment.layers.items()],
+        "blocking_cycles": [[global_ids[index_of[name]] for name in group]
+                            for group in assignment.cycles],
+    }
+
+def _scan_layer_slice(spec: tuple, start: int, end: int) -> List[Tuple[int, int]]:
+    """
+    (service id, edge position) of every layer violation in a slice of
+    services ordered by layer
+    """
+    views, n = _attach(spec)
+    layers, offsets, targets = views["layers"], views["hard_offsets"], views["hard_targets"]
+    found = []
+    for svc_id in views["layer_order"][start:end]:
+        layer = layers[svc_id]
+        for pos in range(offsets[svc_id], offsets[svc_id + 1]):
+            dep_id = targets[pos]
+            if dep_id < n and layers[dep_id] >= layer:
+                found.append((svc_id, pos))
+    return found
+
+def _merge(graph: ServiceGraph, component_results: List[dict],
+           layer_results: List[List[Tuple[int, int]]], component_count: int,
+           task_count: int) -> ParallelAnalysis:
+    """
+    Combine worker results in an order independent of task scheduling
+    """
+    names, layers, targets = graph.names, graph.layers, graph.hard_targets
+    n = len(graph)
+
+    cycles = sorted((group for result in component_results for group in result["cycles"]),
+                    key=lambda group: group[0])
+
+    # Edge positions increase with service id, as validate_layering scans
+    found = sorted((pair for part in layer_results for pair in part), key=lambda pair: pair[1])
+    violations = [
+        f"{names[svc_id]} (L{layers[svc_id]}) depends on "
+        f"{names[targets[pos]]} (L{layers[targets[pos]]})"
+        for svc_id, pos in found
+    ]
+
+    assigned = [None] * n
+    for result in component_results:
+        for svc_id, layer in result["layers"]:
+            assigned[svc_id] = layer
+    blocking = sorted((group for result in component_results
+                       for group in result["blocking_cycles"]), key=lambda group: group[0])
+    assignment = LayerAssignment(
+        layers={names[i]: assigned[i] for i in range(n) if assigned[i] is not None},
+        unassigned=[names[i] for i in range(n) if assigned[i] is None],
+        cycles=[[names[i] for i in group] for group in blocking],
+    )
+
+    return ParallelAnalysis(
+        cycles=[[names[i] for i in group] for group in cycles],
+        violations=violations,
+        assignment=assignment,
+        components=component_count,
+        tasks=task_count,
+    )
+
+def _counting_sort(keys: array, key_count: int, n: int) -> array:
+    """
+    Service ids grouped by key, ascending id within each key
+    """
+    starts = array("q", bytes(8 * (key_count + 1)))
+    for key in keys:
+        starts[key + 1] += 1
+    for k in range(key_count):
+        starts[k + 1] += starts[k]
+    order = array("i", bytes(4 * n))
+    for svc_id in range(n):
+        key = keys[svc_id]
+        order[starts[key]] = svc_id
+        starts[key] += 1
+    return order
+
+def _layer_order(graph: ServiceGraph) -> array:
+    n = len(graph)
+    if n == 0:
+        return array("i")
+    low = min(graph.layers)
+    keys = array("i", (layer - low for layer in graph.layers))
+    return _counting_sort(keys, max(keys) + 1, n)
+
+def _balanced_slices(graph: ServiceGraph, order: array, count: int,
+                     boundary=None) -> List[Tuple[int, int]]:
+    """
+    Split order into about count slices of similar service + edge weight
+
+    If boundary(i) is given, slices only end where it changes, so equal
+    boundary values (one component) are never split.
+    """
+    offsets = graph.hard_offsets
+    n = len(order)
+    total = n + len(graph.hard_targets)
+    target = max(1, total // max(count, 1))
+    slices = []
+    start = weight = 0
+    for i in range(n):
+        svc_id = order[i]
+        weight += 1 + offsets[svc_id + 1] - offsets[svc_id]
+        if weight >= target and i + 1 < n and \
+                (boundary is None or boundary(i) != boundary(i + 1)):
+            slices.append((start, i + 1))
+            start, weight = i + 1, 0
+    if start < n:
+        slices.append((start, n))
+    return slices
+
+# Example usage
+if __name__ == "__main__":
+    import argparse
+    from src.catalog_loader import load_catalog
+
+    parser = argparse.ArgumentParser(description="Analyze a large catalog across processes")
+    parser.add_argument("catalogs", nargs="*")
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+
+    if args.catalogs:
+        services, _ = load_catalog(args.catalogs)
+    else:
+        # Two independent teams, one with a cycle
+        services = {
+            "dns": Service("dns", 1, {}),
+            "auth": Service("auth", 2, {"dns": DependencyType.HARD}),
+            "api": Service("api", 3, {"auth": DependencyType.HARD}),
+            "queue": Service("queue", 2, {"worker": DependencyType.HARD}),
+            "worker": Service("worker", 3, {"queue": DependencyType.HARD}),
+        }
+
+    start = time.perf_counter()
+    result = analyze_parallel(services, workers=args.workers or 2)
+    elapsed = time.perf_counter() - start
+    print(f"{len(services)} services in {result.components} components, "
+          f"{result.tasks} tasks, {elapsed:.2f}s")
+    print(f"Cycle groups: {result.cycles[:10]}")
+    print(f"Layer violations: {result.violations[:10]}")
+    print(f"Unassigned: {result.assignment.unassigned[:10]}")
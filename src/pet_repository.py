@@ -0,0 +1,300 @@
+"""
+Pet storage on a pooled SQLite stand-in for the Layer 2 table, with
+DynamoDB-style batch operations and opaque keyset cursors
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import base64
+import hashlib
+import hmac
+import itertools
+import json
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional
+
+# DynamoDB's per-request limits, kept so callers see the same batching
+BATCH_GET_LIMIT = 100
+BATCH_WRITE_LIMIT = 25
+
+_memory_ids = itertools.count()
+
+class InvalidCursor(ValueError):
+    pass
+
+class PoolTimeout(RuntimeError):
+    pass
+
+class ConnectionPool:
+    """
+    Up to size SQLite connections, opened on demand and reused
+
+    ":memory:" becomes a named shared-cache database, so every pooled
+    connection sees the same data for as long as the pool is open. Shared
+    cache locks whole tables and fails rather than waits on a conflict, so
+    its connections are used one at a time; files (in WAL mode) take
+    concurrent readers and wait for each other's writes.
+    """
+    def __init__(self, path: str = ":memory:", size: int = 4, timeout: float = 5.0):
+        self._shared_cache: Optional[threading.Lock] = None
+        if path == ":memory:":
+            path = f"file:pets-{os.getpid()}-{next(_memory_ids)}?mode=memory&cache=shared"
+            self._shared_cache = threading.Lock()
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def _open(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, uri=self.path.startswith("file:"),
+                                     timeout=self.timeout, check_same_thread=False,
+                                     isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        if self._shared_cache is None:
+            with self._checkout() as connection:
+                yield connection
+        elif not self._shared_cache.acquire(timeout=self.timeout):
+            raise PoolTimeout(f"No connection free after {self.timeout}s")
+        else:
+            try:
+                with self._checkout() as connection:
+                    yield connection
+            finally:
+                self._shared_cache.release()
+
+    @contextmanager
+    def _checkout(self) -> Iterator[sqlite3.Connection]:
+        try:
+            connection = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_open = self._opened < self.size
+                if can_open:
+                    self._opened += 1
+            if can_open:
+                connection = self._open()
+            else:
+                try:
+                    connection = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise PoolTimeout(f"No connection free after {self.timeout}s") from None
+        try:
+            yield connection
+        finally:
+            if connection.in_transaction:
+                connection.rollback()
+            self._idle.put(connection)
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+@dataclass
+class Page:
+    items: List[dict]
+    next_cursor: Optional[str] = None
+
+@dataclass
+class BatchGetResult:
+    """
+    Found items in request order; missing ids are simply absent, as in BatchGetItem
+    """
+    items: List[dict] = field(default_factory=list)
+    missing: List[int] = field(default_factory=list)
+
+class PetRepository:
+    """
+    Pets keyed by id, like the Layer 2 table's single hash key
+
+    Listing is keyset-paginated on the id, so a page costs the same at
+    any depth and holds at most one page in memory. Cursors are opaque
+    base64 tokens; with a cursor_key they are also HMAC-signed, so
+    clients cannot forge positions.
+    """
+    def __init__(self, pool: Optional[ConnectionPool] = None, cursor_key: Optional[bytes] = None):
+        self.pool = pool or ConnectionPool()
+        self.cursor_key = cursor_key
+        with self.pool.connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS pets ("
+                "id INTEGER PRIMARY KEY, name TEXT NOT NULL, tag TEXT)")
+
+    def get(self, pet_id: int) -> Optional[dict]:
+        with self.pool.connection() as connection:
+            row = connection.execute("SELECT id, name, tag FROM pets WHERE id = ?",
+                                     (pet_id,)).fetchone()
+        return _pet(row) if row else None
+
+    def create(self, pet: dict) -> bool:
+        """
+        Conditional put: False if the id is taken
+        """
+        with self.pool.connection() as connection:
+            cursor = connection.execute(
+                "INSERT OR IGNORE INTO pets (id, name, tag) VALUES (?, ?, ?)",
+                (pet["id"], pet["name"], pet.get("tag")))
+        return cursor.rowcount == 1
+
+    def batch_get(self, ids: Iterable[int]) -> BatchGetResult:
+        ids = list(ids)
+        found: Dict[int, dict] = {}
+        with self.pool.connection() as connection:
+            for start in range(0, len(ids), BATCH_GET_LIMIT):
+                chunk = ids[start:start + BATCH_GET_LIMIT]
+                marks = ",".join("?" * len(chunk))
+                for row in connection.execute(
+                        f"SELECT id, name, tag FROM pets WHERE id IN ({marks})", chunk):
+                    found[row[0]] = _pet(row)
+        result = BatchGetResult()
+        for pet_id in ids:
+            if pet_id in found:
+                result.items.append(found[pet_id])
+            else:
+                result.missing.append(pet_id)
+        return result
+
+    def batch_write(self, puts: Iterable[dict] = (), deletes: Iterable[int] = ()) -> int:
+        """
+        Unconditional puts and deletes, one transaction per
+        BATCH_WRITE_LIMIT requests; returns the number of requests applied
+        """
+        requests = itertools.chain((("put", pet) for pet in puts),
+                                   (("delete", pet_id) for pet_id in deletes))
+        applied = 0
+        with self.pool.connection() as connection:
+            while True:
+                chunk = list(itertools.islice(requests, BATCH_WRITE_LIMIT))
+                if not chunk:
+                    break
+                rows = [(p["id"], p["name"], p.get("tag")) for kind, p in chunk if kind == "put"]
+                gone = [(pet_id,) for kind, pet_id in chunk if kind == "delete"]
+                with connection:
+                    connection.execute("BEGIN")
+                    connection.executemany(
+                        "INSERT OR REPLACE INTO pets (id, name, tag) VALUES (?, ?, ?)", rows)
+                    connection.executemany("DELETE FROM pets WHERE id = ?", gone)
+                applied += len(chunk)
+        return applied
+
+    def page(self, limit: int, cursor: Optional[str] = None) -> Page:
+        after = self.decode_cursor(cursor) if cursor else None
+        with self.pool.connection() as connection:
+            if after is None:
+                rows = connection.execute(
+                    "SELECT id, name, tag FROM pets ORDER BY id LIMIT ?", (limit + 1,)).fetchall()
+            else:
+                rows = connection.execute(
+                    "SELECT id, name, tag FROM pets WHERE id > ? ORDER BY id LIMIT ?",
+                    (after, limit + 1)).fetchall()
+        items = [_pet(row) for row in rows[:limit]]
+        next_cursor = self.encode_cursor(items[-1]["id"]) if len(rows) > limit else None
+        return Page(items, next_cursor)
+
+    def scan(self, page_size: int = 1000, cursor: Optional[str] = None) -> Iterator[dict]:
+        """
+        Every pet in id order, a page at a time; the connection goes back
+        to the pool between pages
+        """
+        while True:
+            page = self.page(page_size, cursor)
+            yield from page.items
+            if page.next_cursor is None:
+                return
+            cursor = page.next_cursor
+
+    def count(self) -> int:
+        with self.pool.connection() as connection:
+            return connection.execute("SELECT COUNT(*) FROM pets").fetchone()[0]
+
+    def encode_cursor(self, last_id: int) -> str:
+        payload = base64.urlsafe_b64encode(
+            json.dumps({"after": last_id}, separators=(",", ":")).encode()).rstrip(b"=")
+        if self.cursor_key:
+            payload += b"." + self._sign(payload)
+        return payload.decode("ascii")
+
+    def decode_cursor(self, cursor: str) -> int:
+        raw = cursor.encode("ascii", "replace")
+        payload, _, signature = raw.partition(b".")
+        if self.cursor_key and not hmac.compare_digest(signature, self._sign(payload)):
+            raise InvalidCursor("cursor signature does not match")
+        try:
+            after = json.loads(base64.urlsafe_b64decode(payload + b"=" * (-len(payload) % 4)))["after"]
+        except (ValueError, TypeError, KeyError):
+            raise InvalidCursor("malformed cursor") from None
+        if not isinstance(after, int) or isinstance(after, bool):
+            raise InvalidCursor("malformed cursor")
+        if not -2**63 <= after < 2**63:
+            # SQLite integers are 64-bit; binding a larger one raises OverflowError
+            raise InvalidCursor("cursor position out of range")
+        return after
+
+    def _sign(self, payload: bytes) -> bytes:
+        digest = hmac.new(self.cursor_key, payload, hashlib.sha256).digest()[:16]
+        return base64.urlsafe_b64encode(digest).rstrip(b"=")
+
+def _pet(row) -> dict:
+    pet = {"id": row[0], "name": row[1]}
+    if row[2] is not None:
+        pet["tag"] = row[2]
+    return pet
+
+def json_array_chunks(items: Iterable[dict], chunk_items: int = 64) -> Iterator[bytes]:
+    """
+    Encode items as one JSON array, chunk_items at a time
+    """
+    encode = json.JSONEncoder(separators=(",", ":")).encode
+    yield b"["
+    batch: List[str] = []
+    first = True
+    for item in items:
+        batch.append(encode(item))
+        if len(batch) == chunk_items:
+            yield ((b"" if first else b",") + ",".join(batch).encode())
+            batch, first = [], False
+    if batch:
+        yield ((b"" if first else b",") + ",".join(batch).encode())
+    yield b"]"
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Load or export pets in a SQLite pet store")
+    parser.add_argument("database")
+    commands = parser.add_subparsers(dest="command", required=True)
+    load = commands.add_parser("load", help="Write synthetic pets")
+    load.add_argument("count", type=int)
+    commands.add_parser("export", help="Stream every pet to stdout as one JSON array")
+    args = parser.parse_args(argv)
+
+    repository = PetRepository(ConnectionPool(args.database, size=1))
+    if args.command == "load":
+        start = repository.count()
+        written = repository.batch_write(
+            {"id": start + i, "name": f"pet-{start + i}", "tag": ("cat", "dog")[i % 2]}
+            for i in range(args.count))
+        print(f"Wrote {written} pets, {repository.count()} in total")
+    else:
+        out = sys.stdout.buffer
+        for chunk in json_array_chunks(repository.scan()):
+            out.write(chunk)
+        out.write(b"\n")
+    repository.pool.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
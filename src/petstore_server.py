@@ -0,0 +1,372 @@
+"""
+Local PetStore API: the compiled OpenAPI router in front of the actor,
+served as an ASGI app by a small asyncio HTTP/1.1 server
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote
+
+from src.event_bus import LocalEventBus
+from src.openapi_router import Router, ValidationError, load_router
+from src.pet_repository import (
+    ConnectionPool, InvalidCursor, PetRepository, PoolTimeout, json_array_chunks,
+)
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SPEC_PATH = os.path.join(ROOT, "petstore.yaml")
+STACK_DIR = os.path.join(ROOT, "pulumi", "petstore")
+
+# petstore.yaml gives createPet no request body; it is validated as a Pet
+CREATE_PET_SCHEMA = "Pet"
+# listPets documents "max 100" without a schema maximum
+MAX_LIMIT = 100
+# listPets pages continue from ?cursor=, as linked by the x-next header
+CURSOR_PARAM = "cursor"
+# Arrays longer than this are sent as a chunked stream
+STREAM_MIN_ITEMS = 32
+# Larger request bodies are refused with 413 before any of it is read
+MAX_BODY_BYTES = 1 << 20
+
+Response = Tuple[int, Any, List[Tuple[str, str]]]
+
+def stack_publisher(stack_dir: str = STACK_DIR) -> Callable[[dict], None]:
+    """
+    Deliver an event synchronously to the handlers the stack's
+    EventBridge rules route it to
+    """
+    bus = LocalEventBus.from_stack(stack_dir)
+    # Build the pattern index now; publish runs on handler threads
+    bus.route({})
+
+    def publish(event: dict) -> None:
+        for name in bus.route(event):
+            bus.handlers[name](event, None)
+    return publish
+
+def pet_created(pet: dict) -> dict:
+    return {
+        "version": "0",
+        "id": f"pet-created-{pet['id']}",
+        "source": "com.petstore",
+        "detail-type": "PetCreated",
+        "detail": pet,
+    }
+
+class PetstoreApp:
+    """
+    ASGI app for petstore.yaml over a PetRepository (in-memory SQLite
+    by default)
+
+    createPet publishes a PetCreated event and stores the pet only if
+    the actor accepts it. listPets pages by opaque cursor and links the
+    next page in x-next. With validate_responses, responses are checked
+    against the spec too (a failure is a 500).
+
+    Handlers block on SQLite and the actor, so they run on a thread pool
+    as large as the repository's connection pool, keeping the event loop
+    free for other connections.
+    """
+    def __init__(self, router: Router, publish: Optional[Callable[[dict], None]] = None,
+                 repository: Optional[PetRepository] = None, validate_responses: bool = True):
+        self.router = router
+        self.publish = publish
+        self.repository = repository or PetRepository()
+        self.validate_responses = validate_responses
+        self.executor = ThreadPoolExecutor(max_workers=self.repository.pool.size,
+                                           thread_name_prefix="petstore")
+        self.handlers: Dict[str, Callable[[Dict[str, Any], Any, Dict[str, List[str]]], Response]] = {
+            "listPets": self.list_pets,
+            "createPet": self.create_pet,
+            "showPetById": self.show_pet_by_id,
+        }
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        status, body, headers = await self.respond(scope, receive)
+        if isinstance(body, list) and len(body) > STREAM_MIN_ITEMS:
+            await send_json_stream(send, status, body, headers)
+        else:
+            await send_json(send, status, body, headers)
+
+    async def respond(self, scope, receive) -> Response:
+        operation, path_params, allowed = self.router.match(scope["method"], scope["path"])
+        if operation is None:
+            if allowed:
+                return 405, error(405, "Method not allowed"), [("allow", ", ".join(allowed))]
+            return 404, error(404, "Not found"), []
+
+        raw_body = await read_body(receive)
+        try:
+            query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+            headers = {name.decode("latin-1"): value.decode("latin-1")
+                       for name, value in scope.get("headers", ())}
+            params = operation.bind(path_params, query, headers)
+            payload = json.loads(raw_body) if raw_body else None
+            operation.validate_body(payload)
+            handler = self.handlers.get(operation.id)
+            if handler is None:
+                return 501, error(501, f"{operation.id} is not implemented"), []
+            status, body, extra = await asyncio.get_running_loop().run_in_executor(
+                self.executor, handler, params, payload, query)
+        except ValidationError as e:
+            return 400, error(400, str(e)), []
+        except InvalidCursor as e:
+            return 400, error(400, f"Invalid cursor: {e}"), []
+        except PoolTimeout as e:
+            return 503, error(503, str(e)), []
+        except ValueError:
+            # JSONDecodeError, and UnicodeDecodeError for a body that is not UTF-8
+            return 400, error(400, "Request body is not valid JSON"), []
+
+        if self.validate_responses and body is not None:
+            try:
+                operation.validate_response(status, body)
+            except ValidationError as e:
+                return 500, error(500, f"Invalid response: {e}"), []
+        return status, body, extra
+
+    def list_pets(self, params: Dict[str, Any], payload: Any, query) -> Response:
+        limit = params.get("limit", MAX_LIMIT)
+        if not 1 <= limit <= MAX_LIMIT:
+            return 400, error(400, f"limit must be between 1 and {MAX_LIMIT}"), []
+        cursor = (query.get(CURSOR_PARAM) or [None])[-1]
+        page = self.repository.page(limit, cursor)
+        headers = []
+        if page.next_cursor is not None:
+            headers.append(("x-next", f"/pets?limit={limit}&{CURSOR_PARAM}={page.next_cursor}"))
+        return 200, page.items, headers
+
+    def create_pet(self, params: Dict[str, Any], payload: Any, query) -> Response:
+        errors: List[str] = []
+        self.router.schemas[CREATE_PET_SCHEMA](payload, "body", errors)
+        if errors:
+            raise ValidationError(errors)
+        exists = error(409, f"Pet {payload['id']} already exists")
+        if self.repository.get(payload["id"]) is not None:
+            return 409, exists, []
+        if self.publish is not None:
+            try:
+                self.publish(pet_created(payload))
+            except Exception as e:
+                return 500, error(500, f"Actor failed: {e}"), []
+        if not self.repository.create(payload):
+            return 409, exists, []
+        return 201, None, []
+
+    def show_pet_by_id(self, params: Dict[str, Any], payload: Any, query) -> Response:
+        try:
+            pet = self.repository.get(int(params["petId"]))
+        except (ValueError, OverflowError):
+            pet = None
+        if pet is None:
+            return 404, error(404, f"Pet {params['petId']} not found"), []
+        return 200, pet, []
+
+def error(code: int, message: str) -> dict:
+    return {"code": code, "message": message}
+
+async def read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+async def send_json(send, status: int, body: Any, headers: List[Tuple[str, str]]) -> None:
+    payload = b"" if body is None else json.dumps(body, separators=(",", ":")).encode()
+    raw_headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in headers]
+    if body is not None:
+        raw_headers.append((b"content-type", b"application/json"))
+    raw_headers.append((b"content-length", str(len(payload)).encode()))
+    await send({"type": "http.response.start", "status": status, "headers": raw_headers})
+    await send({"type": "http.response.body", "body": payload})
+
+async def send_json_stream(send, status: int, items, headers: List[Tuple[str, str]]) -> None:
+    """
+    Send a JSON array chunk by chunk, without building the whole body
+    """
+    raw_headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in headers]
+    raw_headers.append((b"content-type", b"application/json"))
+    await send({"type": "http.response.start", "status": status, "headers": raw_headers})
+    for chunk in json_array_chunks(items):
+        await send({"type": "http.response.body", "body": chunk, "more_body": True})
+    await send({"type": "http.response.body", "body": b""})
+
+_REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found",
+            405: "Method Not Allowed", 409: "Conflict", 411: "Length Required",
+            413: "Payload Too Large",
+            500: "Internal Server Error", 501: "Not Implemented", 503: "Service Unavailable"}
+
+async def serve(app, host: str = "127.0.0.1", port: int = 8080,
+                started: Optional[asyncio.Future] = None,
+                max_body: int = MAX_BODY_BYTES) -> None:
+    """
+    Serve an ASGI app over HTTP/1.1 with keep-alive until cancelled
+
+    Request bodies need a Content-Length of at most max_body. Responses
+    without one are sent chunked, so apps can stream. started, if given,
+    gets the bound (host, port).
+    """
+    server = await asyncio.start_server(
+        lambda reader, writer: _serve_connection(app, reader, writer, max_body), host, port)
+    if started is not None:
+        started.set_result(server.sockets[0].getsockname()[:2])
+    async with server:
+        await server.serve_forever()
+
+async def _serve_connection(app, reader: asyncio.StreamReader,
+                            writer: asyncio.StreamWriter, max_body: int = MAX_BODY_BYTES) -> None:
+    server = writer.get_extra_info("sockname")
+    client = writer.get_extra_info("peername")
+    try:
+        while True:
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                return
+            lines = head[:-4].decode("latin-1").split("\r\n")
+            try:
+                method, target, version = lines[0].split(" ", 2)
+            except ValueError:
+                return
+            headers = []
+            for line in lines[1:]:
+                name, _, value = line.partition(":")
+                headers.append((name.strip().lower().encode("latin-1"),
+                                value.strip().encode("latin-1")))
+            fields = dict(headers)
+            if b"chunked" in fields.get(b"transfer-encoding", b"").lower():
+                writer.write(b"HTTP/1.1 411 Length Required\r\ncontent-length: 0\r\n"
+                             b"connection: close\r\n\r\n")
+                return
+            try:
+                length = int(fields.get(b"content-length", b"0") or 0)
+                if length < 0:
+                    raise ValueError(length)
+            except ValueError:
+                writer.write(b"HTTP/1.1 400 Bad Request\r\ncontent-length: 0\r\n"
+                             b"connection: close\r\n\r\n")
+                return
+            if length > max_body:
+                writer.write(b"HTTP/1.1 413 Payload Too Large\r\ncontent-length: 0\r\n"
+                             b"connection: close\r\n\r\n")
+                return
+            try:
+                body = await reader.readexactly(length) if length else b""
+            except (asyncio.IncompleteReadError, ConnectionError):
+                return
+            keep_alive = version == "HTTP/1.1" and fields.get(b"connection", b"").lower() != b"close"
+
+            path, _, query = target.partition("?")
+            scope = {
+                "type": "http",
+                "asgi": {"version": "3.0"},
+                "http_version": version[5:],
+                "method": method.upper(),
+                "scheme": "http",
+                "path": unquote(path),
+                "raw_path": path.encode("latin-1"),
+                "query_string": query.encode("latin-1"),
+                "headers": headers,
+                "client": client,
+                "server": server,
+            }
+            await app(scope, _receiver(body), _Sender(writer, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                return
+    finally:
+        writer.close()
+
+def _receiver(body: bytes):
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+
+    async def receive():
+        return messages.pop() if messages else {"type": "http.disconnect"}
+    return receive
+
+class _Sender:
+    """
+    ASGI send: fixed-length responses as one write, others chunked
+    """
+    def __init__(self, writer: asyncio.StreamWriter, keep_alive: bool):
+        self.writer = writer
+        self.keep_alive = keep_alive
+        self.head: Optional[dict] = None
+        self.chunked = False
+
+    async def __call__(self, message: dict) -> None:
+        if message["type"] == "http.response.start":
+            self.head = message
+            return
+        if message["type"] != "http.response.body":
+            return
+        body = message.get("body", b"")
+        more = message.get("more_body", False)
+        if self.head is not None:
+            headers = list(self.head.get("headers", ()))
+            names = {name.lower() for name, _ in headers}
+            if b"content-length" not in names:
+                if more:
+                    headers.append((b"transfer-encoding", b"chunked"))
+                    self.chunked = True
+                else:
+                    headers.append((b"content-length", str(len(body)).encode()))
+            headers.append((b"connection", b"keep-alive" if self.keep_alive else b"close"))
+            status = self.head["status"]
+            head = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}".encode("latin-1")]
+            head.extend(name + b": " + value for name, value in headers)
+            self.writer.write(b"\r\n".join(head) + b"\r\n\r\n")
+            self.head = None
+        if self.chunked:
+            if body:
+                self.writer.write(b"%x\r\n%s\r\n" % (len(body), body))
+            if not more:
+                self.writer.write(b"0\r\n\r\n")
+            else:
+                # Let a slow client push back on a streaming app
+                await self.writer.drain()
+        elif body:
+            self.writer.write(body)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Serve petstore.yaml locally, backed by the PetStore actor")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--spec", default=SPEC_PATH)
+    parser.add_argument("--cache-dir", help="Reuse the compiled spec for unchanged spec files")
+    parser.add_argument("--no-actor", action="store_true", help="Do not publish PetCreated events")
+    parser.add_argument("--database", default=":memory:", help="SQLite file for the pets")
+    parser.add_argument("--pool-size", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    router = load_router(args.spec, cache_dir=args.cache_dir)
+    # Sign cursors when a key is configured, so clients cannot forge them
+    cursor_key = os.environ.get("PETSTORE_CURSOR_KEY")
+    repository = PetRepository(ConnectionPool(args.database, size=args.pool_size),
+                               cursor_key=cursor_key.encode() if cursor_key else None)
+    app = PetstoreApp(router, None if args.no_actor else stack_publisher(), repository)
+    print(f"Serving {router.title} on http://{args.host}:{args.port}")
+    try:
+        asyncio.run(serve(app, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,286 @@
+"""
+Extract service dependencies from Pulumi stacks without running Pulumi
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import ast
+import bisect
+import hashlib
+import io
+import json
+import re
+import tokenize
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from src.dependency_analyzer import (
+    Service, DependencyType, find_cycle_groups, validate_layering,
+)
+
+# Bump when the extraction rules change so cached results are not reused
+EXTRACTOR_VERSION = "1"
+
+# Values under these keys are configuration read at runtime (env vars),
+# so references there are SOFT dependencies
+SOFT_KEYS = {"environment", "variables", "env"}
+
+_LAYER_IN_NAME = re.compile(r"layer[-_]?(\d+)", re.IGNORECASE)
+_LAYER_IN_COMMENT = re.compile(r"\bLayer\s+(\d+)", re.IGNORECASE)
+
+def extract_program(source: str) -> List[dict]:
+    """
+    Find resources and their dependencies in one Pulumi program
+
+    Resources are calls to classes of imported pulumi_* provider modules.
+    A resource HARD-depends on resources listed in depends_on or whose
+    outputs it reads (role.arn, table.arn.apply(...)), and SOFT-depends on
+    outputs it only passes through environment variables. Layers come
+    from the logical name (layer2-table) or the nearest preceding
+    "Layer N" comment.
+
+    Returns [{"name", "layer", "line", "dependencies": {name: type}}]
+    """
+    tree = ast.parse(source)
+    extractor = _Extractor(_provider_aliases(tree), _layer_comments(source))
+    extractor.visit_body(tree.body)
+    return extractor.resources
+
+def stack_name(stack_dir: str) -> str:
+    """
+    The name from Pulumi.yaml, or the directory name
+    """
+    try:
+        with open(os.path.join(stack_dir, "Pulumi.yaml"), encoding="utf-8") as f:
+            for line in f:
+                match = re.match(r"name:\s*(\S+)", line)
+                if match:
+                    return match.group(1).strip("'\"")
+    except OSError:
+        pass
+    return os.path.basename(os.path.abspath(stack_dir))
+
+def find_stacks(roots: Iterable[str]) -> List[str]:
+    """
+    Directories under roots holding a Pulumi.yaml and a __main__.py
+    """
+    stacks = []
+    for root in roots:
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = sorted(d for d in dirnames if not d.startswith((".", "node_modules", "venv")))
+            if "Pulumi.yaml" in filenames and "__main__.py" in filenames:
+                stacks.append(dirpath)
+    return stacks
+
+def extract_stack(stack_dir: str, cache_dir: Optional[str] = None) -> Tuple[str, List[dict]]:
+    """
+    Extract one stack, reusing a cached result for identical file content
+    """
+    with open(os.path.join(stack_dir, "__main__.py"), "rb") as f:
+        content = f.read()
+
+    cache_path = None
+    if cache_dir:
+        key = hashlib.sha256(EXTRACTOR_VERSION.encode() + b"\0" + content).hexdigest()
+        cache_path = os.path.join(cache_dir, f"{key}.json")
+        try:
+            with open(cache_path, encoding="utf-8") as f:
+                return stack_name(stack_dir), json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    resources = extract_program(content.decode("utf-8"))
+    if cache_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(resources, f)
+        os.replace(tmp_path, cache_path)
+    return stack_name(stack_dir), resources
+
+def scan_stacks(roots: Iterable[str], cache_dir: Optional[str] = None,
+                workers: Optional[int] = None) -> Dict[str, Service]:
+    """
+    Extract every stack under roots into one Dict[str, Service]
+
+    Services are named "<stack>/<logical name>". Stacks are parsed across
+    a process pool; with a cache_dir, unchanged files are not re-parsed.
+    """
+    stacks = find_stacks(roots)
+    if workers is None:
+        workers = min(len(stacks), os.cpu_count() or 1)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(extract_stack, stacks, [cache_dir] * len(stacks),
+                                    chunksize=max(1, len(stacks) // (workers * 4))))
+    else:
+        results = [extract_stack(stack, cache_dir) for stack in stacks]
+
+    services = {}
+    for stack, resources in results:
+        for resource in resources:
+            name = f"{stack}/{resource['name']}"
+            services[name] = Service(
+                name=name,
+                layer=resource["layer"],
+                dependencies={f"{stack}/{dep}": DependencyType(dep_type)
+                              for dep, dep_type in resource["dependencies"].items()},
+            )
+    return services
+
+def _provider_aliases(tree: ast.Module) -> Set[str]:
+    """
+    Local names bound to pulumi_* provider modules
+    """
+    aliases = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                if alias.name.startswith("pulumi_"):
+                    aliases.add(alias.asname or alias.name.split(".")[0])
+        elif isinstance(node, ast.ImportFrom) and (node.module or "").startswith("pulumi_"):
+            for alias in node.names:
+                aliases.add(alias.asname or alias.name)
+    return aliases
+
+def _layer_comments(source: str) -> Tuple[List[int], List[int]]:
+    """
+    Sorted line numbers of "Layer N" comments and their layers
+    """
+    lines, layers = [], []
+    for token in tokenize.generate_tokens(io.StringIO(source).readline):
+        if token.type == tokenize.COMMENT:
+            match = _LAYER_IN_COMMENT.search(token.string)
+            if match:
+                lines.append(token.start[0])
+                layers.append(int(match.group(1)))
+    return lines, layers
+
+class _Extractor:
+    def __init__(self, providers: Set[str], layer_comments: Tuple[List[int], List[int]]):
+        self.providers = providers
+        self.comment_lines, self.comment_layers = layer_comments
+        self.resources: List[dict] = []
+        # Variable -> logical name of the resource it holds
+        self.resource_vars: Dict[str, str] = {}
+        # Variable -> resources its (non-resource) value was computed from
+        self.derived: Dict[str, Dict[str, str]] = {}
+
+    def visit_body(self, body: List[ast.stmt]) -> None:
+        for stmt in body:
+            if isinstance(stmt, ast.Assign) and isinstance(stmt.value, ast.Call) \
+                    and self._is_resource(stmt.value):
+                target = stmt.targets[0]
+                self._add_resource(stmt.value, target.id if isinstance(target, ast.Name) else None)
+            elif isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Call) \
+                    and self._is_resource(stmt.value):
+                self._add_resource(stmt.value, None)
+            elif isinstance(stmt, ast.Assign):
+                refs = self._references(stmt.value, False)
+                for target in stmt.targets:
+                    if isinstance(target, ast.Name):
+                        self.resource_vars.pop(target.id, None)
+                        self.derived[target.id] = refs
+            for field in ("body", "orelse", "finalbody"):
+                nested = getattr(stmt, field, None)
+                if isinstance(nested, list):
+                    self.visit_body(nested)
+            for handler in getattr(stmt, "handlers", []):
+                self.visit_body(handler.body)
+
+    def _is_resource(self, call: ast.Call) -> bool:
+        func = call.func
+        if not isinstance(func, ast.Attribute) or not func.attr[:1].isupper():
+            return False
+        root = func.value
+        while isinstance(root, ast.Attribute):
+            root = root.value
+        return isinstance(root, ast.Name) and root.id in self.providers
+
+    def _add_resource(self, call: ast.Call, variable: Optional[str]) -> None:
+        first = call.args[0] if call.args else None
+        if isinstance(first, ast.Constant) and isinstance(first.value, str):
+            name = first.value
+        elif variable:
+            name = variable
+        else:
+            return
+
+        dependencies: Dict[str, str] = {}
+        for arg in call.args[1:]:
+            _merge(dependencies, self._references(arg, False))
+        for keyword in call.keywords:
+            _merge(dependencies, self._references(keyword.value, keyword.arg in SOFT_KEYS))
+        dependencies.pop(name, None)
+
+        self.resources.append({
+            "name": name,
+            "layer": self._layer(name, call.lineno),
+            "line": call.lineno,
+            "dependencies": dependencies,
+        })
+        if variable:
+            self.derived.pop(variable, None)
+            self.resource_vars[variable] = name
+
+    def _layer(self, name: str, line: int) -> int:
+        match = _LAYER_IN_NAME.search(name)
+        if match:
+            return int(match.group(1))
+        position = bisect.bisect_right(self.comment_lines, line) - 1
+        return self.comment_layers[position] if position >= 0 else 0
+
+    def _references(self, node: ast.AST, soft: bool) -> Dict[str, str]:
+        """
+        Resources read by an expression, SOFT under env-var configuration
+        """
+        found: Dict[str, str] = {}
+        kind = DependencyType.SOFT.value if soft else DependencyType.HARD.value
+        if isinstance(node, ast.Name):
+            if node.id in self.resource_vars:
+                found[self.resource_vars[node.id]] = kind
+            elif node.id in self.derived:
+                for name, derived_kind in self.derived[node.id].items():
+                    _merge(found, {name: DependencyType.SOFT.value if soft else derived_kind})
+            return found
+        if isinstance(node, ast.Dict):
+            for key, value in zip(node.keys, node.values):
+                key_soft = soft or (isinstance(key, ast.Constant) and key.value in SOFT_KEYS)
+                if key is not None:
+                    _merge(found, self._references(key, soft))
+                _merge(found, self._references(value, key_soft))
+            return found
+        if isinstance(node, ast.keyword):
+            return self._references(node.value, soft or node.arg in SOFT_KEYS)
+        for child in ast.iter_child_nodes(node):
+            _merge(found, self._references(child, soft))
+        return found
+
+def _merge(into: Dict[str, str], refs: Dict[str, str]) -> None:
+    # HARD wins over SOFT for the same resource
+    for name, kind in refs.items():
+        if into.get(name) != DependencyType.HARD.value:
+            into[name] = kind
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Check Pulumi stacks for dependency cycles and layer violations")
+    parser.add_argument("roots", nargs="*", default=["."])
+    parser.add_argument("--cache-dir", help="Reuse results for unchanged __main__.py files")
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args(argv)
+
+    services = scan_stacks(args.roots, cache_dir=args.cache_dir, workers=args.workers)
+    for name, service in services.items():
+        deps = ", ".join(f"{dep} ({dep_type.value})" for dep, dep_type in service.dependencies.items())
+        print(f"L{service.layer} {name}" + (f" -> {deps}" if deps else ""))
+
+    cycles = find_cycle_groups(services)
+    violations = validate_layering(services)
+    print(f"\nCircular dependencies found: {cycles}")
+    print(f"Layer violations: {violations}")
+    return 1 if cycles else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
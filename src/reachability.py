@@ -0,0 +1,159 @@
+"""
+Precomputed transitive HARD-dependency reachability for fast has_path queries
+"""
+
+import hashlib
+import json
+import struct
+from array import array
+from typing import Iterable, List, Mapping, Tuple
+
+from src.dependency_analyzer import (
+    Service, ServiceGraph, _strongly_connected_ids,
+)
+
+_MAGIC = b"RIDX"
+_VERSION = 1
+_HEADER = struct.Struct("<4sH32sIII")
+
+def graph_fingerprint(services: Mapping[str, Service]) -> bytes:
+    """
+    Hash of the service names and HARD edges a reachability index depends on
+    """
+    graph = ServiceGraph.from_services(services)
+    digest = hashlib.sha256()
+    digest.update("\0".join(graph.names).encode())
+    digest.update(struct.pack("<I", len(graph)))
+    digest.update(graph.hard_offsets.tobytes())
+    digest.update(graph.hard_targets.tobytes())
+    return digest.digest()
+
+class ReachabilityIndex:
+    """
+    Transitive closure of HARD dependencies over the condensation DAG
+
+    Each strongly connected component gets one bitset row of the components
+    it reaches, so a query is a single bit test. Building is
+    O(C * (C + E) / wordsize) over C components; memory is C^2 / 8 bytes.
+    Rows are stored back to back in one buffer of width bytes each, which
+    may be a memory-mapped file.
+    """
+
+    def __init__(self, names: List[str], component_of: array,
+                 matrix: bytes, width: int, fingerprint: bytes):
+        self.names = names
+        self.index_of = {name: i for i, name in enumerate(names)}
+        self.component_of = component_of
+        self.matrix = matrix
+        self.width = width
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def build(cls, services: Mapping[str, Service]) -> "ReachabilityIndex":
+        """
+        Build the index in one pass over the SCCs in reverse topological order
+        """
+        graph = ServiceGraph.from_services(services)
+        n = len(graph)
+        components = _strongly_connected_ids(graph)
+
+        component_of = array("i", bytes(4 * n))
+        for component_id, members in enumerate(components):
+            for member in members:
+                component_of[member] = component_id
+
+        # Tarjan emits dependencies first, so successor rows are ready
+        reach: List[int] = []
+        for component_id, members in enumerate(components):
+            row = 0
+            for member in members:
+                for dep_id in graph.hard_dependencies(member):
+                    if dep_id >= n:
+                        continue
+                    dep_component = component_of[dep_id]
+                    if dep_component == component_id:
+                        # Only members of a cycle reach their own component
+                        row |= 1 << component_id
+                    elif not (row >> dep_component) & 1:
+                        row |= reach[dep_component] | (1 << dep_component)
+            reach.append(row)
+
+        width = (len(components) + 7) // 8
+        matrix = b"".join(row.to_bytes(width, "little") for row in reach)
+        return cls(graph.names[:n], component_of, matrix, width, graph_fingerprint(graph))
+
+    def is_current(self, services: Mapping[str, Service]) -> bool:
+        """
+        Whether the index still describes the given services
+        """
+        return graph_fingerprint(services) == self.fingerprint
+
+    def depends_on(self, service_name: str, dep_name: str) -> bool:
+        """
+        Whether service_name transitively hard-depends on dep_name
+        """
+        source = self.component_of[self.index_of[service_name]]
+        target = self.component_of[self.index_of[dep_name]]
+        return bool(self.matrix[source * self.width + (target >> 3)] >> (target & 7) & 1)
+
+    def has_path(self, start: str, end: str) -> bool:
+        """
+        Whether end is reachable from start over HARD edges (start == end counts)
+        """
+        return start == end or self.depends_on(start, end)
+
+    def depends_on_many(self, pairs: Iterable[Tuple[str, str]]) -> List[bool]:
+        """
+        Answer depends_on for many (service, dependency) pairs at once
+        """
+        index_of, component_of = self.index_of, self.component_of
+        matrix, width = self.matrix, self.width
+        results = []
+        for service_name, dep_name in pairs:
+            target = component_of[index_of[dep_name]]
+            source = component_of[index_of[service_name]]
+            results.append(bool(matrix[source * width + (target >> 3)] >> (target & 7) & 1))
+        return results
+
+    def transitive_dependencies(self, service_name: str) -> List[str]:
+        """
+        All services that service_name transitively hard-depends on
+        """
+        start = self.component_of[self.index_of[service_name]] * self.width
+        row = int.from_bytes(self.matrix[start:start + self.width], "little")
+        return [name for i, name in enumerate(self.names)
+                if (row >> self.component_of[i]) & 1]
+
+    def save(self, path: str) -> None:
+        """
+        Write the index to disk
+        """
+        names = json.dumps(self.names).encode()
+        with open(path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, self.fingerprint,
+                                 len(names), len(self.matrix) // max(self.width, 1), self.width))
+            f.write(names)
+            f.write(self.component_of.tobytes())
+            f.write(self.matrix)
+
+    @classmethod
+    def load(cls, path: str, services: Mapping[str, Service] = None) -> "ReachabilityIndex":
+        """
+        Read an index from disk
+
+        If services are given, raises ValueError when the index was built
+        for a different graph
+        """
+        with open(path, "rb") as f:
+            magic, version, fingerprint, names_size, row_count, width = \
+                _HEADER.unpack(f.read(_HEADER.size))
+            if magic != _MAGIC or version != _VERSION:
+                raise ValueError(f"{path} is not a version {_VERSION} reachability index")
+            names = json.loads(f.read(names_size))
+            component_of = array("i")
+            component_of.frombytes(f.read(4 * len(names)))
+            matrix = f.read(row_count * width)
+
+        if services is not None and graph_fingerprint(services) != fingerprint:
+            raise ValueError(f"{path} is stale: the service graph has changed")
+        return cls(names, component_of, matrix, width, fingerprint)
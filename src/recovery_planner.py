@@ -0,0 +1,234 @@
+"""
+Recovery wave planning under a parallelism budget, using recovery costs
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import heapq
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
+
+from src.dependency_analyzer import Service, ServiceGraph, DependencyType
+
+@dataclass
+class WavePlan:
+    """
+    Recovery waves: each wave starts once the previous one has finished
+    and holds at most max_parallel services
+
+    layers numbers the waves from base_layer, so it is a valid layering
+    that orders recovery the same way. lower_bound is the larger of the
+    critical path and total cost spread over max_parallel; no plan can
+    beat it.
+    """
+    waves: List[List[str]]
+    durations: List[float]
+    layers: Dict[str, int]
+    unscheduled: List[str] = field(default_factory=list)
+    critical_path: float = 0.0
+    lower_bound: float = 0.0
+    strategy: str = ""
+
+    @property
+    def makespan(self) -> float:
+        return sum(self.durations)
+
+    def apply_layers(self, services: Mapping[str, Service]) -> Dict[str, Service]:
+        """
+        Copy of services with the planned layers, for layer-ordered tools
+        """
+        return {
+            name: Service(service.name, self.layers.get(name, service.layer),
+                          dict(service.dependencies))
+            for name, service in services.items()
+        }
+
+def plan_recovery(services: Mapping[str, Service],
+                  costs: Optional[Mapping[str, float]] = None,
+                  default_cost: float = 1.0,
+                  max_parallel: Optional[int] = None,
+                  base_layer: int = 2,
+                  strategy: str = "auto") -> WavePlan:
+    """
+    Group services into recovery waves that keep the makespan short
+
+    A wave lasts as long as its slowest service. Strategies:
+    - "critical-path": highest level first; fill each wave with the
+      ready services that have the longest remaining chain of work
+    - "critical-path-fit": same priority, but after the wave's first
+      service only add services no slower than it, so short services
+      do not wait behind long ones (and vice versa)
+    - "coffman-graham": Coffman-Graham labels, optimal for unit costs
+      and max_parallel=2
+    - "auto": all of the above, keeping the shortest makespan
+
+    Services blocked by a HARD cycle or an unknown HARD dependency are
+    left unscheduled. O((V+E) log V) per strategy.
+    """
+    graph = ServiceGraph.from_services(services)
+    names = graph.names
+    n = len(graph)
+    costs = costs or {}
+    cost = [float(costs.get(names[i], default_cost)) for i in range(n)]
+    if max_parallel is not None and max_parallel < 1:
+        raise ValueError("max_parallel must be at least 1")
+
+    dep_offsets, dependents = graph.reverse_hard_edges()
+    pending = [len(graph.hard_dependencies(i)) for i in range(n)]
+
+    # Topological order of the services that can ever be recovered
+    order = [i for i in range(n) if pending[i] == 0]
+    remaining = list(pending)
+    for svc_id in order:
+        for pos in range(dep_offsets[svc_id], dep_offsets[svc_id + 1]):
+            dependent = dependents[pos]
+            remaining[dependent] -= 1
+            if remaining[dependent] == 0:
+                order.append(dependent)
+    schedulable = bytearray(n)
+    for svc_id in order:
+        schedulable[svc_id] = 1
+
+    # Bottom level: own cost plus the longest chain of work that waits on it
+    level = [0.0] * n
+    for svc_id in reversed(order):
+        longest = 0.0
+        for pos in range(dep_offsets[svc_id], dep_offsets[svc_id + 1]):
+            dependent = dependents[pos]
+            if schedulable[dependent] and level[dependent] > longest:
+                longest = level[dependent]
+        level[svc_id] = cost[svc_id] + longest
+
+    critical_path = max(level, default=0.0)
+    total = sum(cost[i] for i in order)
+    lower_bound = max(critical_path, total / max_parallel if max_parallel else 0.0)
+
+    candidates: Dict[str, Tuple[Callable[[int], tuple], bool]] = {
+        "critical-path": (lambda i: (-level[i], -cost[i], i), False),
+        "critical-path-fit": (lambda i: (-level[i], -cost[i], i), True),
+    }
+    if strategy in ("coffman-graham", "auto"):
+        label = _coffman_graham_labels(order, dep_offsets, dependents, schedulable)
+        candidates["coffman-graham"] = (lambda i: (-label[i], i), False)
+    if strategy == "auto":
+        chosen = list(candidates)
+    elif strategy in candidates:
+        chosen = [strategy]
+    else:
+        raise ValueError(f"Unknown strategy: {strategy}")
+
+    best = None
+    for name in chosen:
+        priority, fit = candidates[name]
+        waves = _schedule(order, pending, dep_offsets, dependents, cost,
+                          priority, fit, max_parallel)
+        durations = [max(cost[i] for i in wave) for wave in waves]
+        if best is None or (sum(durations), len(waves)) < (sum(best[1]), len(best[0])):
+            best = (waves, durations, name)
+
+    waves, durations, name = best
+    return WavePlan(
+        waves=[[names[i] for i in wave] for wave in waves],
+        durations=durations,
+        layers={names[i]: base_layer + w for w, wave in enumerate(waves) for i in wave},
+        unscheduled=[names[i] for i in range(n) if not schedulable[i]],
+        critical_path=critical_path,
+        lower_bound=lower_bound,
+        strategy=name,
+    )
+
+def _schedule(order: List[int], pending: List[int], dep_offsets, dependents,
+              cost: List[float], priority: Callable[[int], tuple], fit: bool,
+              max_parallel: Optional[int]) -> List[List[int]]:
+    """
+    Fill waves from a ready heap in priority order
+    """
+    remaining = list(pending)
+    ready = [(priority(i), i) for i in order if pending[i] == 0]
+    heapq.heapify(ready)
+    width = max_parallel or len(order) or 1
+    # With fit, look this far past skipped services before closing a wave
+    scan_limit = 4 * width
+
+    waves = []
+    while ready:
+        wave = [heapq.heappop(ready)[1]]
+        skipped = []
+        while ready and len(wave) < width and len(skipped) < scan_limit:
+            entry = heapq.heappop(ready)
+            if fit and cost[entry[1]] > cost[wave[0]]:
+                skipped.append(entry)
+            else:
+                wave.append(entry[1])
+        for entry in skipped:
+            heapq.heappush(ready, entry)
+
+        for svc_id in wave:
+            for pos in range(dep_offsets[svc_id], dep_offsets[svc_id + 1]):
+                dependent = dependents[pos]
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    heapq.heappush(ready, (priority(dependent), dependent))
+        waves.append(wave)
+    return waves
+
+def _coffman_graham_labels(order: List[int], dep_offsets, dependents,
+                           schedulable: bytearray) -> Dict[int, int]:
+    """
+    Coffman-Graham labels: sinks first, each next label going to the
+    service whose dependents' labels (sorted descending) are
+    lexicographically smallest
+    """
+    waiting = {}
+    for svc_id in order:
+        waiting[svc_id] = sum(1 for pos in range(dep_offsets[svc_id], dep_offsets[svc_id + 1])
+                              if schedulable[dependents[pos]])
+    # Reverse edges of the reverse graph: a service's HARD dependencies
+    dependencies: Dict[int, List[int]] = {svc_id: [] for svc_id in order}
+    for svc_id in order:
+        for pos in range(dep_offsets[svc_id], dep_offsets[svc_id + 1]):
+            dependent = dependents[pos]
+            if schedulable[dependent]:
+                dependencies[dependent].append(svc_id)
+
+    label: Dict[int, int] = {}
+    heap = [((), svc_id) for svc_id in order if waiting[svc_id] == 0]
+    heapq.heapify(heap)
+    while heap:
+        _, svc_id = heapq.heappop(heap)
+        label[svc_id] = len(label) + 1
+        for dep_id in dependencies[svc_id]:
+            waiting[dep_id] -= 1
+            if waiting[dep_id] == 0:
+                key = tuple(sorted(
+                    (label[dependents[pos]]
+                     for pos in range(dep_offsets[dep_id], dep_offsets[dep_id + 1])
+                     if schedulable[dependents[pos]]),
+                    reverse=True))
+                heapq.heappush(heap, (key, dep_id))
+    return label
+
+# Example usage
+if __name__ == "__main__":
+    services = {
+        "aws-infra": Service("aws-infra", 1, {}),
+        "iam": Service("iam", 2, {"aws-infra": DependencyType.HARD}),
+        "vpc": Service("vpc", 3, {"iam": DependencyType.HARD}),
+        "dns": Service("dns", 2, {"aws-infra": DependencyType.HARD}),
+        "database": Service("database", 4, {"vpc": DependencyType.HARD}),
+        "cache": Service("cache", 4, {"vpc": DependencyType.HARD}),
+        "metrics": Service("metrics", 2, {"aws-infra": DependencyType.HARD}),
+        "app-api": Service("app-api", 5, {"database": DependencyType.HARD,
+                                          "cache": DependencyType.HARD}),
+        "frontend": Service("frontend", 6, {"app-api": DependencyType.HARD,
+                                            "dns": DependencyType.HARD}),
+    }
+    costs = {"database": 10.0, "vpc": 3.0, "metrics": 6.0}
+
+    plan = plan_recovery(services, costs, max_parallel=2)
+    print(f"Strategy: {plan.strategy}")
+    for wave, duration in zip(plan.waves, plan.durations):
+        print(f"  {duration:5.1f}  {wave}")
+    print(f"Makespan: {plan.makespan} (critical path {plan.critical_path}, "
+          f"lower bound {plan.lower_bound})")